@@ -13,6 +13,12 @@ import urllib.parse
 from pathlib import Path
 from decouple import config
 
+# Use the pooled keep-alive sessions of the ODS application when available
+try:
+    from ods import http_sessions
+except Exception:
+    http_sessions = requests
+
 # Import database reader for querying odsActions database
 try:
     from . import db_reader
@@ -172,7 +178,7 @@ def get_hf_api_key():
             print("Error: HF_API_KEY not found in environment variables.")
             print("Please add HF_API_KEY=your_key_here to your .env file")
             return None
-            except Exception as e:
+    except Exception as e:
         print(f"Error getting HF_API_KEY: {e}")
         return None
 
@@ -870,13 +876,13 @@ Answer:"""
             used_model = model_name
             
             try:
-                response = requests.post(model_url, headers=headers, json=payload, timeout=60)
+                response = http_sessions.post(model_url, headers=headers, json=payload, timeout=60)
                 
                 # If model is loading (503), wait and retry
                 if response.status_code == 503:
                     import time
                     time.sleep(5)
-                    response = requests.post(model_url, headers=headers, json=payload, timeout=60)
+                    response = http_sessions.post(model_url, headers=headers, json=payload, timeout=60)
                 
                 # If successful, break out of loop
                 if response.status_code == 200:
@@ -888,14 +894,14 @@ Answer:"""
                     # Try inference API as fallback
                     inference_url = f"https://api-inference.huggingface.co/models/{model_name}"
                     try:
-                        inference_response = requests.post(inference_url, headers=headers, json=payload, timeout=60)
+                        inference_response = http_sessions.post(inference_url, headers=headers, json=payload, timeout=60)
                         if inference_response.status_code == 200:
                             response = inference_response
                             break
                         elif inference_response.status_code == 503:
                             import time
                             time.sleep(5)
-                            inference_response = requests.post(inference_url, headers=headers, json=payload, timeout=60)
+                            inference_response = http_sessions.post(inference_url, headers=headers, json=payload, timeout=60)
                             if inference_response.status_code == 200:
                                 response = inference_response
                                 break
@@ -1051,864 +1057,3 @@ if __name__ == "__main__":
     else:
         print("✗ Failed to initialize Hugging Face API")
         print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
-
-            elif 'text' in response_data:
-                response_text = response_data['text']
-            else:
-                response_text = str(response_data)
-        else:
-            response_text = str(response_data)
-        
-        # Clean up the response text (remove any prompt artifacts)
-        if response_text:
-            # Remove the original prompt if it was included
-            if user_message in response_text:
-                response_text = response_text.split(user_message)[-1].strip()
-            if "Answer:" in response_text:
-                response_text = response_text.split("Answer:")[-1].strip()
-            
-            return {
-                'success': True,
-                'response': response_text,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'response': '',
-                'error': "No response generated from Hugging Face API."
-            }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'response': '',
-            'error': f"Error: {str(e)}"
-        }
-
-
-# Alias for backward compatibility
-def initialize_gemini():
-    """Alias for initialize_hf() for backward compatibility"""
-    return initialize_hf()
-
-def chat_with_gemini(user_message, conversation_history=None):
-    """Alias for simple_chat() for backward compatibility"""
-    return simple_chat(user_message)
-
-if __name__ == "__main__":
-    # Test the chatbot
-    print("Testing ODS Actions Chatbot...")
-    print("=" * 60)
-    
-    # Check if Hugging Face API is available
-    if not HF_API_AVAILABLE:
-        print("✗ Hugging Face API not available")
-        print("Please ensure requests library is installed: pip install requests")
-        sys.exit(1)
-    
-    # Check documentation (no global needed at module level)
-    if not _DOCUMENTATION_CACHE:
-        _DOCUMENTATION_CACHE = load_documentation_from_file()
-        
-    if not _DOCUMENTATION_CACHE:
-        print("✗ Documentation not loaded")
-        print("Please ensure extracted_documentation.txt exists in the ai folder")
-        sys.exit(1)
-    
-    print(f"✓ Documentation loaded: {len(_DOCUMENTATION_CACHE)} characters")
-    
-    # Test initialization
-    if initialize_hf():
-        print("✓ Hugging Face API initialized successfully")
-        
-        # Test a simple question
-        print("\nTesting with sample question...")
-        test_question = "How do I display metadata for a document symbol?"
-        
-        result = simple_chat(test_question)
-        
-        if result['success']:
-            print(f"\nQuestion: {test_question}")
-            print(f"\nAnswer:\n{result['response']}")
-        else:
-            print(f"\nError: {result['error']}")
-    else:
-        print("✗ Failed to initialize Hugging Face API")
-        print("Make sure HF_API_KEY is set in your .env file")
-
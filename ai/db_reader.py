@@ -10,6 +10,12 @@ from datetime import datetime
 import json
 from typing import Dict, List, Optional, Any, Union
 
+# Use the pooled client of the ODS application when available
+try:
+    from ods import mongo
+except Exception:
+    mongo = None
+
 # Database connection
 _DB_CLIENT = None
 _DB_DATABASE = None
@@ -17,13 +23,20 @@ _DB_DATABASE = None
 def get_database():
     """
     Get or create database connection.
-    Uses singleton pattern to reuse connection.
+    Shares the client of the ODS application, or creates its own once when run alone.
     
     Returns:
         Database: MongoDB database instance
     """
     global _DB_CLIENT, _DB_DATABASE
     
+    if mongo is not None:
+        try:
+            return mongo.get_database("odsActions")
+        except Exception as e:
+            print(f"Error connecting to database: {e}")
+            return None
+    
     if _DB_DATABASE is None:
         try:
             conn_string = config("CONN")
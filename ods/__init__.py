@@ -3,22 +3,25 @@
 ##############################################################################################
 
 from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.http import http_date, is_resource_modified
+from werkzeug.wsgi import wrap_file
 import json
 import datetime
 import os
-import platform
-import requests
-import copy
 import traceback
 import ods.ods_rutines
-from flask import Flask, jsonify,render_template,request,redirect,session, url_for, send_file
-from io import BytesIO
-from urllib.parse import quote, unquote
-from pymongo.collation import Collation
+from ods import http_sessions
+from ods import scratch
+from ods import job_queue
+from ods import mongo
+from ods import indexes
+from ods import directory
+from ods import prefix_index
+from ods import pdf_cache
+from flask import Flask, jsonify,render_template,request,redirect,session, url_for, send_file, Response, stream_with_context
+from urllib.parse import quote
 from decouple import config
-from pymongo import MongoClient
 from bson import json_util
-from dlx.marc import AuthSet, BibSet, Query, QueryDocument, Condition
 
 return_data=""
 
@@ -31,10 +34,20 @@ username = config("USERNAME")
 password = config("PASSWORD")
 client_id = config("CLIENT_ID")
 client_secret = config("CLIENT_SECRET")
-database_conn=config("CONN")
 
 
 
+########################################################################
+# batch endpoints : run in the job queue when the client asks for it
+########################################################################
+
+def is_async_request()->bool:
+    if request.is_json:
+        value=(request.get_json(silent=True) or {}).get("async", False)
+    else:
+        value=request.values.get("async", "false")
+    return str(value).lower() in ["1","true","yes"]
+
 ##############################################################################################
 ##########  APP INIZIALISATION
 ##############################################################################################
@@ -66,6 +79,15 @@ def create_app(test_config=None):
         os.makedirs(app.instance_path)
     except OSError:
         pass
+
+    # create the missing indexes of the odsActions collections
+    indexes.bootstrap()
+
+    # build the prefix index of the identifiers searched by /browse_docs
+    prefix_index.bootstrap()
+
+    # run the queued jobs in this process unless a worker service runs them
+    job_queue.ensure_workers()
     
     ############################################################################
     # LOGIN
@@ -114,18 +136,8 @@ def create_app(test_config=None):
                     })
 
             
-            # check if the user exists in the database with the good password
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
-            my_collection = my_database["ods_actions_users_collection"]
-            
-
-
-            user = {
-                "email": request.form.get("email"),
-            }
-
-            results= list(my_collection.find(user))
+            # check if the user exists in the directory with the good password
+            results= directory.find_users(request.form.get("email"))
             #print(results)
            
             find_record=False
@@ -154,22 +166,11 @@ def create_app(test_config=None):
                         
                          # management of the access to the tabs
                         # Use the SAME conversion logic as list_users route for consistency
-                        def to_string_value(val):
-                            if val is None:
-                                return "false"
-                            if isinstance(val, bool):
-                                return "true" if val else "false"
-                            if isinstance(val, str):
-                                normalized = val.strip().lower()
-                                return "true" if normalized == "true" else "false"
-                            return "false"
-                        
-                        # Convert to strings first (same as list_users), then to boolean for session
-                        show_display_str = to_string_value(result.get("show_display", "false"))
-                        show_create_update_str = to_string_value(result.get("show_create_update", "false"))
-                        show_send_file_str = to_string_value(result.get("show_send_file", "false"))
-                        show_download_files_str = to_string_value(result.get("show_download_files", "false"))
-                        show_parameters_str = to_string_value(result.get("show_parameters", "false"))
+                        show_display_str = directory.permission_value(result.get("show_display", "false"))
+                        show_create_update_str = directory.permission_value(result.get("show_create_update", "false"))
+                        show_send_file_str = directory.permission_value(result.get("show_send_file", "false"))
+                        show_download_files_str = directory.permission_value(result.get("show_download_files", "false"))
+                        show_parameters_str = directory.permission_value(result.get("show_parameters", "false"))
                         
                         # Convert strings to boolean for session storage
                         session["show_display"] = show_display_str == "true"
@@ -246,15 +247,8 @@ def create_app(test_config=None):
     @app.route("/list_sites",methods=['GET'])
     def list_sites():
 
-        client = MongoClient(database_conn)
-        my_database = client["odsActions"] 
-        my_collection = my_database["ods_actions_sites_collection"]
-        
-        # get all the logs
-        my_sites=my_collection.find(sort=[( "creation_date", -1 )])
-            
-        # just render the logs
-        return json.loads(json_util.dumps(my_sites))    
+        # just render the sites
+        return jsonify(directory.sites())
         
     ############################################################################
     # CREATE SITE ROUTE
@@ -264,8 +258,7 @@ def create_app(test_config=None):
     def add_site():
     
         try :    
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
+            my_database = mongo.get_database("odsActions")
             my_collection = my_database["ods_actions_sites_collection"]
 
             site = {
@@ -277,6 +270,7 @@ def create_app(test_config=None):
             
             # save the site in the database
             my_site=my_collection.insert_one(site)
+            directory.invalidate()
             
             # create log
             ods.ods_rutines.add_log(datetime.datetime.now(tz=datetime.timezone.utc),session['username'],"Site " + str(my_site.inserted_id) + "  added to the system!!!")
@@ -310,8 +304,7 @@ def create_app(test_config=None):
     def add_user():
     
         try :    
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
+            my_database = mongo.get_database("odsActions")
             my_collection = my_database["ods_actions_users_collection"]
 
             # converting password to array of bytes 
@@ -354,6 +347,7 @@ def create_app(test_config=None):
             
             # save the user in the database
             my_user=my_collection.insert_one(user)
+            directory.invalidate()
             
             # create log
             ods.ods_rutines.add_log(datetime.datetime.now(tz=datetime.timezone.utc),session['username'],"User " + str(my_user.inserted_id) + "  added to the system!!!")
@@ -386,68 +380,8 @@ def create_app(test_config=None):
     @app.route("/list_users", methods=['GET'])
     def list_users():
         try:
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
-            my_collection = my_database["ods_actions_users_collection"]
-            
-            # Get all users (excluding passwords), sorted by email
-            my_users = my_collection.find({}, {"password": 0}, sort=[("email", 1)])
-            
-            # Convert to list and format dates, ensuring no duplicates by email
-            users_list = []
-            seen_emails = set()
-            for user in my_users:
-                # Helper function to convert MongoDB value to string "true"/"false"
-                def to_string_value(val):
-                    if val is None:
-                        return "false"
-                    if isinstance(val, bool):
-                        return "true" if val else "false"
-                    if isinstance(val, str):
-                        normalized = val.strip().lower()
-                        return "true" if normalized == "true" else "false"
-                    return "false"
-                
-                # Convert MongoDB document to dict, preserving all fields
-                user_dict = json.loads(json_util.dumps(user))
-                
-                # Get email from user_dict
-                email = user_dict.get("email", "")
-                # Only add if we haven't seen this email before
-                if email and email not in seen_emails:
-                    seen_emails.add(email)
-                    
-                    # Convert all permission fields to strings "true"/"false" using ORIGINAL MongoDB values
-                    # This ensures we use the actual database values, not defaults
-                    user_dict["show_display"] = to_string_value(user.get("show_display", "false"))
-                    user_dict["show_create_update"] = to_string_value(user.get("show_create_update", "false"))
-                    user_dict["show_send_file"] = to_string_value(user.get("show_send_file", "false"))
-                    user_dict["show_download_files"] = to_string_value(user.get("show_download_files", "false"))
-                    user_dict["show_parameters"] = to_string_value(user.get("show_parameters", "false"))
-                    
-                    # Debug: log values for eric.attere@un.org
-                    if email == "eric.attere@un.org":
-                        print(f"\n{'='*60}")
-                        print(f"=== DEBUG: Processing user {email} ===")
-                        print(f"{'='*60}")
-                        print(f"MongoDB document keys: {list(user.keys())}")
-                        print(f"\nMongoDB RAW values (before any conversion):")
-                        print(f"  show_display: {repr(user.get('show_display'))} (type: {type(user.get('show_display')).__name__}, in dict: {'show_display' in user})")
-                        print(f"  show_create_update: {repr(user.get('show_create_update'))} (type: {type(user.get('show_create_update')).__name__}, in dict: {'show_create_update' in user})")
-                        print(f"  show_send_file: {repr(user.get('show_send_file'))} (type: {type(user.get('show_send_file')).__name__}, in dict: {'show_send_file' in user})")
-                        print(f"  show_download_files: {repr(user.get('show_download_files'))} (type: {type(user.get('show_download_files')).__name__}, in dict: {'show_download_files' in user})")
-                        print(f"  show_parameters: {repr(user.get('show_parameters'))} (type: {type(user.get('show_parameters')).__name__}, in dict: {'show_parameters' in user})")
-                        print(f"\nAfter to_string_value conversion:")
-                        print(f"  show_display: {user_dict.get('show_display')} (type: {type(user_dict.get('show_display')).__name__})")
-                        print(f"  show_create_update: {user_dict.get('show_create_update')} (type: {type(user_dict.get('show_create_update')).__name__})")
-                        print(f"  show_send_file: {user_dict.get('show_send_file')} (type: {type(user_dict.get('show_send_file')).__name__})")
-                        print(f"  show_download_files: {user_dict.get('show_download_files')} (type: {type(user_dict.get('show_download_files')).__name__})")
-                        print(f"  show_parameters: {user_dict.get('show_parameters')} (type: {type(user_dict.get('show_parameters')).__name__})")
-                        print(f"{'='*60}\n")
-                    
-                    users_list.append(user_dict)
-            
-            return jsonify(users_list)
+            # users sorted by email, without passwords, one per email
+            return jsonify(directory.users())
             
         except Exception as e:
             return jsonify({
@@ -461,8 +395,7 @@ def create_app(test_config=None):
     @app.route("/update_user", methods=['POST'])
     def update_user():
         try:
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
+            my_database = mongo.get_database("odsActions")
             my_collection = my_database["ods_actions_users_collection"]
             
             user_email = request.form.get("email", "").strip()
@@ -515,6 +448,7 @@ def create_app(test_config=None):
                 {"email": user_email},
                 {"$set": update_data}
             )
+            directory.invalidate()
             
             if result.modified_count > 0 or result.matched_count > 0:
                 # Create log
@@ -547,8 +481,7 @@ def create_app(test_config=None):
     @app.route("/delete_user", methods=['POST'])
     def delete_user():
         try:
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
+            my_database = mongo.get_database("odsActions")
             my_collection = my_database["ods_actions_users_collection"]
             
             user_email = request.form.get("email", "").strip()
@@ -574,6 +507,7 @@ def create_app(test_config=None):
             
             # Delete user
             result = my_collection.delete_one({"email": user_email})
+            directory.invalidate()
             
             if result.deleted_count > 0:
                 # Create log
@@ -608,19 +542,23 @@ def create_app(test_config=None):
         docsymbols = request.form["docsymbols"].split("\r\n")
         final=[]
         
+        # metadata of all the symbols read from CDB at once
+        cb_data=ods.ods_rutines.get_data_from_cb_bulk(docsymbols)
+        
         for docsymbol in docsymbols:
             result=ods.ods_rutines.ods_get_loading_symbol(docsymbol)
             try:
                 tcodes=result["body"]["data"][0]["tcodes"]
                 #print(tcodes)
-                subjects=[ods.ods_rutines.get_subject(tcode) for tcode in tcodes]
+                subjects_found=ods.ods_rutines.resolve_subjects(tcodes)
+                subjects=[subjects_found[tcode.upper()] for tcode in tcodes]
                 result["body"]["data"][0]["subjects"]=subjects
             except:
                 pass
             
             # Get title and other metadata from CDB
             try:
-                cdb_data = ods.ods_rutines.get_data_from_cb(docsymbol)
+                cdb_data = cb_data.get(docsymbol.strip(), [])
                 if cdb_data and len(cdb_data) > 0:
                     cdb_record = cdb_data[0]
                     # Add title from CDB to the result
@@ -651,15 +589,8 @@ def create_app(test_config=None):
     @app.route("/get_sites",methods=['GET'])
     def get_sites():
 
-        client = MongoClient(database_conn)
-        my_database = client["odsActions"] 
-        my_collection = my_database["ods_actions_sites_collection"]
-        
-        # get all the logs
-        my_sites=my_collection.find(sort=[( "creation_date", -1 )])
-           
-        # just render the logs
-        return json.loads(json_util.dumps(my_sites))        
+        # just render the sites
+        return jsonify(directory.sites())
         
     ####################################################################################################################################        
     # return prefix from the database
@@ -667,16 +598,7 @@ def create_app(test_config=None):
     def get_prefix_from_site(my_site:str)->str:
 
         try:
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"] 
-            my_collection = my_database["ods_actions_sites_collection"]
-            site = {
-                "code_site": my_site,
-            }
-
-            results= list(my_collection.find(site))
-
-            return results[0]["prefix_site"]
+            return directory.site_prefix(my_site)
         
         except:
 
@@ -692,25 +614,18 @@ def create_app(test_config=None):
         data=[]
         prefix=session["prefix_site"]
         
+        # run the batch in the job queue, the client polls /jobs/<job_id>
+        if is_async_request():
+            job_id=job_queue.enqueue_job("create_update_metadata",docsymbols,session['username'],{"prefix":prefix})
+            return jsonify({"job_id":job_id}), 202
+        
+        # metadata of all the symbols read from CDB at once
+        cb_data=ods.ods_rutines.get_data_from_cb_bulk(docsymbols)
+        
         for docsymbol in docsymbols:
-            result=ods.ods_rutines.ods_create_update_metadata(docsymbol,prefix)
+            result=ods.ods_rutines.ods_create_update_metadata(docsymbol,prefix,cb_data.get(docsymbol.strip()))
             #print(result)
-            text="-1 this is default value"
-            if (result["status"]== 0 and result["update"]==False):
-                text="Metadata not found in the Central DB/ME"
-            if (result["status"]== -1 and result["update"]==False):
-                text=result["message"]
-            if (result["status"]== 1 and result["update"]==False) :
-                text="Metadata created!!!"
-            if (result["status"]== 2 and result["update"]==True) :
-                text="Metadata updated!!!"
-            if (result["status"]==3) :
-                text="There is a duplicate symbol in ODS!!!"                
-            summary={
-                "docsymbol":docsymbol,
-                "text":text
-                }
-            data.append(summary)
+            data.append(ods.ods_rutines.create_update_summary(docsymbol,result))
         # create log
         ods.ods_rutines.add_log(datetime.datetime.now(tz=datetime.timezone.utc),session['username'],"ODS creating/updating endpoint called from the system!!!")
         
@@ -726,6 +641,12 @@ def create_app(test_config=None):
     @app.route('/exporttoodswithfile',methods=['POST'])
     def exporttoodswithfile():
         data_send_multiple= request.form["docsymbols2"].replace("\r","").split("\n")
+        
+        # run the batch in the job queue, the client polls /jobs/<job_id>
+        if is_async_request():
+            job_id=job_queue.enqueue_job("send_files",data_send_multiple,session.get('username', 'unknown_user'))
+            return jsonify({"job_id":job_id}), 202
+        
         result=[]
         for record in data_send_multiple:
             result.append(ods.ods_rutines.download_file_and_send_to_ods(record))  
@@ -771,14 +692,11 @@ def create_app(test_config=None):
             username = session.get('username', 'unknown_user')
             print(f"DEBUG: Username from session: {username}")
             
-            for language in languages:
-                language = language.strip()
-                if not language:
-                    continue
-                
-                # Call the download function
-                result = ods.ods_rutines.download_file_from_ods(docsymbol, language)
-                result['docsymbol'] = docsymbol
+            # Download the languages at the same time
+            languages = [language.strip() for language in languages if language.strip()]
+            downloads = ods.ods_rutines.download_files_from_ods([(docsymbol, language) for language in languages])
+            
+            for language, result in zip(languages, downloads):
                 result['language'] = language
                 
                 # Create log for each download
@@ -836,6 +754,43 @@ def create_app(test_config=None):
     # BATCH DOWNLOAD FILES FROM ODS
     ############################################################################
     
+    def get_batch_download_params():
+        """
+        Document symbols and languages of a batch download, from JSON or from form/query parameters.
+        Supports backward compatibility with single docsymbol.
+        """
+        if request.is_json:
+            # Check for new format: array of symbols
+            docsymbols = request.json.get('docsymbols', [])
+            # Backward compatibility: single docsymbol
+            if not docsymbols:
+                single_symbol = request.json.get('docsymbol', '').strip()
+                if single_symbol:
+                    docsymbols = [single_symbol]
+            
+            languages = request.json.get('languages', [])
+        else:
+            # Form data - check for multiple symbols
+            docsymbols_str = request.values.get('docsymbols', '')
+            single_symbol = request.values.get('docsymbol', '').strip()
+            
+            if docsymbols_str:
+                # Parse comma/newline separated symbols
+                docsymbols = [s.strip() for s in docsymbols_str.replace('\n', ',').split(',') if s.strip()]
+            elif single_symbol:
+                docsymbols = [single_symbol]
+            else:
+                docsymbols = []
+            
+            # Languages can come as comma-separated string or array
+            languages_str = request.values.get('languages', '')
+            if languages_str:
+                languages = [lang.strip() for lang in languages_str.split(',') if lang.strip()]
+            else:
+                languages = []
+        
+        return docsymbols, languages
+    
     @app.route('/batch_download_files_from_ods', methods=['POST'])
     def batch_download_files_from_ods_route():
         """
@@ -845,35 +800,7 @@ def create_app(test_config=None):
         """
         try:
             # Get parameters from request
-            if request.is_json:
-                # Check for new format: array of symbols
-                docsymbols = request.json.get('docsymbols', [])
-                # Backward compatibility: single docsymbol
-                if not docsymbols:
-                    single_symbol = request.json.get('docsymbol', '').strip()
-                    if single_symbol:
-                        docsymbols = [single_symbol]
-                
-                languages = request.json.get('languages', [])
-            else:
-                # Form data - check for multiple symbols
-                docsymbols_str = request.form.get('docsymbols', '')
-                single_symbol = request.form.get('docsymbol', '').strip()
-                
-                if docsymbols_str:
-                    # Parse comma/newline separated symbols
-                    docsymbols = [s.strip() for s in docsymbols_str.replace('\n', ',').split(',') if s.strip()]
-                elif single_symbol:
-                    docsymbols = [single_symbol]
-                else:
-                    docsymbols = []
-                
-                # Languages can come as comma-separated string or array
-                languages_str = request.form.get('languages', '')
-                if languages_str:
-                    languages = [lang.strip() for lang in languages_str.split(',') if lang.strip()]
-                else:
-                    languages = []
+            docsymbols, languages = get_batch_download_params()
             
             # Validate required parameters
             username = session.get('username', 'unknown_user')
@@ -906,14 +833,23 @@ def create_app(test_config=None):
                 )
                 return jsonify(error_result), 400
             
-            # Download files for each symbol and each language
-            results = []
-            for docsymbol in docsymbols:
-                for language in languages:
-                    result = ods.ods_rutines.download_file_from_ods(docsymbol, language)
-                    # Add docsymbol to result for tracking
-                    result['docsymbol'] = docsymbol
-                    results.append(result)
+            # Run the batch in the job queue, the client polls /jobs/<job_id>
+            if is_async_request():
+                items = [{"docsymbol": docsymbol, "language": language} for docsymbol in docsymbols for language in languages]
+                job_id = job_queue.enqueue_job("batch_download", items, username)
+                return jsonify({
+                    "status": 1,
+                    "job_id": job_id,
+                    "docsymbols": docsymbols,
+                    "total_symbols": len(docsymbols),
+                    "total": len(items)
+                }), 202
+            
+            # Download files for each symbol and each language at the same time
+            # (each result has its docsymbol for tracking)
+            results = ods.ods_rutines.download_files_from_ods(
+                [(docsymbol, language) for docsymbol in docsymbols for language in languages]
+            )
             
             # Create log
             successful = sum(1 for r in results if r.get("status") == 1)
@@ -968,6 +904,76 @@ def create_app(test_config=None):
             
             return jsonify(error_result), 500
     
+    ############################################################################
+    # STREAM A ZIP OF FILES DOWNLOADED FROM ODS
+    ############################################################################
+    
+    @app.route('/download_zip', methods=['GET', 'POST'])
+    def download_zip_route():
+        """
+        Stream a ZIP of the files of the document symbols in the requested languages.
+        Accepts the parameters of /batch_download_files_from_ods, the files are added
+        to the archive while the others are still downloading.
+        """
+        docsymbols, languages = get_batch_download_params()
+        
+        if not docsymbols or not languages:
+            return jsonify({
+                "status": 0,
+                "error": "At least one document symbol and one language are required"
+            }), 400
+        
+        username = session.get('username', 'unknown_user')
+        ods.ods_rutines.add_log(
+            datetime.datetime.now(tz=datetime.timezone.utc),
+            username,
+            f"ZIP download from ODS: {len(docsymbols)} symbol(s), {len(languages)} language(s)"
+        )
+        
+        pairs = [(docsymbol, language) for docsymbol in docsymbols for language in languages]
+        return Response(
+            stream_with_context(ods.ods_rutines.stream_zip(pairs)),
+            mimetype='application/zip',
+            headers={
+                "Content-Disposition": 'attachment; filename="ods_files.zip"',
+                "X-Accel-Buffering": "no"
+            }
+        )
+    
+    ############################################################################
+    # STATUS AND PARTIAL RESULTS OF A QUEUED JOB
+    ############################################################################
+    
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def job_status_route(job_id):
+        """
+        Progress of a job created by the batch endpoints with the async flag.
+        The results of the items already processed are returned while the job runs.
+        """
+        job_queue.ensure_workers()
+        job = job_queue.get_job(job_id)
+        if job is None:
+            return jsonify({"status": 0, "error": "Job not found"}), 404
+        return json.loads(json_util.dumps(job_queue.job_status(job)))
+    
+    @app.route('/jobs/<job_id>/events', methods=['GET'])
+    def job_events_route(job_id):
+        """
+        Server-Sent Events of a queued job : one "unit" event per finished (symbol, language)
+        with its report entry, stage timings and running count, then an "end" event.
+        """
+        try:
+            last_seq = int(request.headers.get('Last-Event-ID', request.args.get('last_event_id', 0)))
+        except ValueError:
+            last_seq = 0
+        
+        job_queue.ensure_workers()
+        return Response(
+            stream_with_context(job_queue.stream_events(job_id, last_seq)),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     ############################################################################
     # SERVE DOWNLOADED FILE CONTENT
     ############################################################################
@@ -983,10 +989,7 @@ def create_app(test_config=None):
                 return jsonify({"error": "filepath parameter is required"}), 400
             
             # Security: ensure file is in temp_01 directory (used for download from ODS)
-            if platform.system() in ['Windows', 'nt']:
-                temp_dir = os.path.abspath('ods\\temp_01')
-            else:
-                temp_dir = os.path.abspath('./ods/tmp_01')
+            temp_dir = os.path.abspath(scratch.DOWNLOAD_DIR)
             
             filepath_abs = os.path.abspath(filepath)
             temp_dir_abs = os.path.abspath(temp_dir)
@@ -1016,41 +1019,19 @@ def create_app(test_config=None):
     @app.route('/cleanup_download_temp', methods=['POST'])
     def cleanup_download_temp_route():
         """
-        Clean up the tmp_01 folder after downloads are complete.
-        Removes all files from the temporary download directory.
+        Ask the janitor to sweep the scratch folders after downloads are complete.
+        Only the entries past their age or over the disk quota are removed, the files
+        still in use by other users are kept.
         """
         try:
-            # Determine temp directory path based on platform
-            if platform.system() in ['Windows', 'nt']:
-                temp_dir = os.path.abspath('ods\\temp_01')
-            else:
-                temp_dir = os.path.abspath('./ods/tmp_01')
-            
-            # Check if directory exists
-            if not os.path.exists(temp_dir):
-                return jsonify({
-                    "status": 1,
-                    "message": "Temp directory does not exist, nothing to clean"
-                })
-            
-            # Remove all files in the directory
-            files_removed = 0
-            for filename in os.listdir(temp_dir):
-                file_path = os.path.join(temp_dir, filename)
-                try:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                        files_removed += 1
-                except Exception as e:
-                    # Log error but continue cleaning other files
-                    print(f"Error removing file {file_path}: {str(e)}")
+            files_removed = scratch.sweep()
             
             # Log cleanup action
             username = session.get('username', 'unknown_user')
             ods.ods_rutines.add_log(
                 datetime.datetime.now(tz=datetime.timezone.utc),
                 username,
-                f"Cleaned up download temp folder: {files_removed} file(s) removed"
+                f"Cleaned up download temp folder: {files_removed} expired file(s) removed"
             )
             
             return jsonify({
@@ -1092,8 +1073,7 @@ def create_app(test_config=None):
     #this is a temp route to diplay documents in a language using a symbol main8
     @app.route("/<lang>/<path:symbol>")
     def show_document1(symbol, lang=None):
-        client = MongoClient(database_conn)
-        my_database = client["undlFiles"] 
+        my_database = mongo.get_database("undlFiles")
         filesColl=my_database.files
         lang=lang.upper()
         LANGUAGES = {
@@ -1106,13 +1086,6 @@ def create_app(test_config=None):
         }
         #LANGUAGESList =['DE', 'AR', 'FR', 'ES', 'RU', 'ZH', 'EN']
         LANGUAGESList =['EN']
-        print(symbol)
-        #symbol=unquote(symbol)
-        print(f"after unquote the symbol is {symbol}")
-        cln = Collation(locale='en', strength=2)
-        docs = filesColl.find({"identifiers.value": symbol}, collation=cln)
-        languages = [''.join(doc.get("languages")) for doc in docs]
-        print(languages)
         if lang is None:
             # Find all documents matching the symbol
             docs = filesColl.find({"identifiers.value": symbol})
@@ -1122,143 +1095,221 @@ def create_app(test_config=None):
                 return "No available languages for this document.", 404
             return render_template("language_selection.html", symbol=symbol, languages='en', LANGUAGES=LANGUAGES)
 
-        # Look up the specific document for the given language, preferring the one with the largest size
-        doc = filesColl.find_one(
-            {"identifiers.value": symbol, "languages": lang},
-            sort=[("timestamp", -1)],
-            collation=cln
-        )
+        # Look up the specific document for the given language, the latest one
+        doc = ods.ods_rutines.find_file_record(symbol, lang)
         if not doc or not doc.get("uri"):
             return "Document not found for this language.", 404
 
-        # Fetch and serve the PDF
+        # the browser revalidates with the ETag / Last-Modified of the file record
+        etag, last_modified = ods.ods_rutines.file_validators(doc)
+        headers = {"ETag": f'"{etag}"', "Accept-Ranges": "bytes", "Cache-Control": "public, max-age=0, must-revalidate"}
+        if last_modified:
+            headers["Last-Modified"] = http_date(last_modified)
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            return Response(status=304, headers=headers)
+
+        # a Range is only honoured for the version of the file the browser has
+        range_header = request.headers.get("Range")
+        if range_header and request.headers.get("If-Range"):
+            if_range = request.if_range
+            same_file = (if_range.etag == etag) or (if_range.date is not None and last_modified is not None
+                                                    and if_range.date >= last_modified.replace(tzinfo=datetime.timezone.utc, microsecond=0))
+            if not same_file:
+                range_header = None
+
         symbol=quote(symbol, safe='/')
-        print(symbol)
         uri = "https://"+doc["uri"]
-        response = requests.get(uri)
-        if response.status_code == 200:
-            return send_file(BytesIO(response.content), download_name=f"{symbol}_{lang}.pdf", mimetype='application/pdf')
-        else:
+        headers["Content-Disposition"] = f'inline; filename="{symbol.replace("/", "_")}_{lang}.pdf"'
+
+        # Serve the local copy of the file when there is one, werkzeug answers the Range
+        cached = pdf_cache.lookup(etag) if pdf_cache.PDF_CACHE_ENABLED else None
+        if cached:
+            try:
+                if pdf_cache.PDF_CACHE_MMAP:
+                    mapped = pdf_cache.open_mapped(cached)
+                    response = Response(wrap_file(request.environ, mapped), mimetype='application/pdf', direct_passthrough=True)
+                    response.call_on_close(mapped.close)
+                    complete_length = len(mapped)
+                else:
+                    complete_length = os.path.getsize(cached)
+                    response = send_file(cached, mimetype='application/pdf', conditional=False, etag=False, max_age=0)
+            except OSError as e:
+                # removed by the eviction of another worker since the lookup, read from S3
+                print(f"PDF cache read of {cached} failed : {e}")
+            else:
+                response.headers.update(headers)
+                return response.make_conditional(request.environ, accept_ranges=True, complete_length=complete_length)
+
+        # Stream the PDF as it comes from S3
+        upstream = ods.ods_rutines.open_file_stream(uri, range_header)
+        if upstream is None:
             return "Unable to fetch PDF", 502
+        if upstream.status_code == 416:
+            upstream.close()
+            return Response(status=416, headers={"Content-Range": upstream.headers.get("Content-Range", "bytes */*")})
+
+        for name in ["Content-Length", "Content-Range"]:
+            if upstream.headers.get(name):
+                headers[name] = upstream.headers[name]
+
+        def generate():
+            with upstream:
+                for chunk in upstream.iter_content(chunk_size=ods.ods_rutines.DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        yield chunk
+
+        body = generate()
+        if upstream.status_code == 200:
+            # the whole file is kept while it is sent
+            expected_size = upstream.headers.get("Content-Length")
+            body = pdf_cache.tee(etag, body, int(expected_size) if expected_size else None)
+        else:
+            # a part was asked, the whole file is read into the cache aside
+            pdf_cache.fill_in_background(etag, uri)
+
+        response = Response(body, status=upstream.status_code, mimetype='application/pdf', headers=headers)
+        # also closed when the body is never read (HEAD)
+        response.call_on_close(upstream.close)
+        return response
 
     
 
-    @app.route('/browse_docs', methods=['GET'])
-    def search_identifiers():
+    @app.route("/pdf_cache_stats", methods=['GET'])
+    def pdf_cache_stats():
+        """Hits, misses, stores and evictions of the PDF cache of this worker."""
+        return jsonify(pdf_cache.stats())
+
+    def browse_identifiers(query, page, limit, after=None):
+        """
+        English identifiers starting with query, in order, with the first identifier of their file.
+        Read from the in-memory prefix index, or from the files collection while it is being built.
+        """
+        index = prefix_index.english_identifiers
+        if index.ready:
+            index.refresh_in_background()
+            return index.search(query, limit, after=after, skip=0 if after else (page - 1) * limit)
+
         import re
-        query = request.args.get('q', '')
-        lang = request.args.get('lang', 'en').upper()
-        lang='en'
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
-        if not query:
-            return jsonify([])
-        
-        client = MongoClient(database_conn)
-        my_database = client["undlFiles"] 
+        my_database = mongo.get_database("undlFiles")
         filesColl = my_database.files
-        cln = Collation(locale='en', strength=2, numericOrdering=True)
         
-        # Build the query
-        mongo_query = {"identifiers.value": {"$regex": "^" + re.escape(query)}}
-        if lang:
-            #mongo_query["languages"] = lang
-            mongo_query["languages"] = 'en'
+        # Build the query, the prefix and the cursor apply to the same identifier,
+        # compared as plain strings like in the index so its cursors stay valid here
+        value = {"$regex": "^" + re.escape(query)}
+        if after:
+            value["$gt"] = after
+        mongo_query = {"identifiers": {"$elemMatch": {"value": value}}, **prefix_index.ENGLISH_FILES}
         
         # Calculate skip
-        skip = (page - 1) * limit
+        skip = 0 if after else (page - 1) * limit
         
         # Find documents with sorting, skipping, and limiting
-        docs = filesColl.find(mongo_query, collation=cln).sort([("identifiers.value", 1)]).skip(skip).limit(limit)
+        docs = filesColl.find(mongo_query).sort([("identifiers.value", 1)]).skip(skip).limit(limit)
         
-        results = {}
+        results = []
         for doc in docs:
-            uri = doc.get("uri", "")
-            uri="https://ods-actions.sjtwsr1nwt8y4.us-east-1.cs.amazonlightsail.com/"+lang+"/"+quote(doc["identifiers"][0]["value"], safe='/')
             for ident in doc.get("identifiers", []):
-                if ident["value"].startswith(query):
-                    results[ident["value"]] = {"identifier": ident["value"], "url": uri}
+                if ident["value"].startswith(query) and (not after or ident["value"] > after):
+                    results.append((ident["value"], doc["identifiers"][0]["value"]))
                     break  # Assuming one matching identifier per document
-        return jsonify(list(results.values()))
+        return results
+
+    def browse_response(results, hits, limit):
+        """JSON list of the results, X-Next-Cursor gives the after parameter of the next page."""
+        response = jsonify(results)
+        if len(hits) == limit:
+            response.headers["X-Next-Cursor"] = hits[-1][0]
+        return response
+
+    @app.route('/browse_docs', methods=['GET'])
+    def search_identifiers():
+        query = request.args.get('q', '')
+        lang='en'
+        page = int(request.args.get('page', 1))
+        limit = int(request.args.get('limit', 50))
+        after = request.args.get('after')
+        if not query:
+            return jsonify([])
+        
+        hits = browse_identifiers(query, page, limit, after)
+        results = []
+        for identifier, target in hits:
+            uri="https://ods-actions.sjtwsr1nwt8y4.us-east-1.cs.amazonlightsail.com/"+lang+"/"+quote(target, safe='/')
+            results.append({"identifier": identifier, "url": uri})
+        return browse_response(results, hits, limit)
 
     @app.route('/browse_docs_erp', methods=['GET'])
     def search_identifiers1():
-        import re
         query = request.args.get('q', '')
-        lang = request.args.get('lang', 'en').upper()
         lang='en'
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
+        after = request.args.get('after')
         if not query:
             return jsonify([])
         
-        client = MongoClient(database_conn)
-        my_database = client["undlFiles"] 
-        filesColl = my_database.files
-        cln = Collation(locale='en', strength=2, numericOrdering=True)
+        hits = browse_identifiers(query, page, limit, after)
         
-        # Build the query
-        mongo_query = {"identifiers.value": {"$regex": "^" + re.escape(query)}}
-        if lang:
-            #mongo_query["languages"] = lang
-            mongo_query["languages"] = 'en'
+        # titles of the whole page at once, the identifiers without record are left out
+        titles = ods.ods_rutines.resolve_titles([identifier for identifier, _ in hits])
         
-        # Calculate skip
-        skip = (page - 1) * limit
-        
-        # Find documents with sorting, skipping, and limiting
-        docs = filesColl.find(mongo_query, collation=cln).sort([("identifiers.value", 1)]).skip(skip).limit(limit)
-        
-        results = {}
-        for doc in docs:
-            uri = doc.get("uri", "")
-            uri="https://ods-actions.sjtwsr1nwt8y4.us-east-1.cs.amazonlightsail.com/"+lang+"/"+quote(doc["identifiers"][0]["value"], safe='/')
-            for ident in doc.get("identifiers", []):
-                #sel_query={f"191":ident['value']}
-                query1={"symbol":ident['value']}
-                #query = Query.from_string("191__a:'"+ident['value']+"'")
-                #query1 = Query.from_string("symbol":{ident['value']}) # Dataset-search_query f"191__a:'{path}'""
-                #print(f"query1 is {query1}")
-                bibset = BibSet.from_query(query1)
-                for bib in bibset.records:
-                    title1=bib.get_value('245','a')
-                    title=title1
-                    title2=bib.get_value('245','b')
-                    title3=bib.get_value('245','c')
-                    if title2!="":
-                        title=title1+" "+title2
-                    if title3!="":
-                        title=title+" "+title3  
-                    #print (title)
-                    if ident["value"].startswith(query):
-                        results[ident["value"]] = {"identifier": ident["value"], "url": uri, "title": title}
-                        break  # Assuming one matching identifier per document
-        return jsonify(list(results.values()))
-
-
-
-
-
+        results = []
+        for identifier, target in hits:
+            if identifier in titles:
+                uri="https://ods-actions.sjtwsr1nwt8y4.us-east-1.cs.amazonlightsail.com/"+lang+"/"+quote(target, safe='/')
+                results.append({"identifier": identifier, "url": uri, "title": titles[identifier]})
+        return browse_response(results, hits, limit)
 
     @app.route("/display_logs",methods=['GET'])
     def display_logs():
+        """
+        Logs newest first, streamed as a JSON array, or one log per line with format=ndjson.
+        Filters : user, action (text contained), start_date and end_date (YYYY-MM-DD).
+        With limit, one page is returned and the X-Next-Cursor header gives the
+        cursor parameter of the next page, the header is missing on the last page.
+        """
+        filters = {
+            "user": request.args.get("user"),
+            "action": request.args.get("action"),
+            "start_date": request.args.get("start_date"),
+            "end_date": request.args.get("end_date"),
+        }
+        headers = {}
+        try:
+            if request.args.get("cursor"):
+                filters["after"] = ods.ods_rutines.decode_logs_cursor(request.args["cursor"])
+            if request.args.get("limit"):
+                my_logs, next_cursor = ods.ods_rutines.logs_page(request.args["limit"], **filters)
+                if next_cursor:
+                    headers["X-Next-Cursor"] = next_cursor
+            else:
+                # all the logs, read from the database while they are sent
+                my_logs = ods.ods_rutines.find_logs(**filters)
+        except ValueError as e:
+            return jsonify({"status": 0, "error": str(e)}), 400
 
-        client = MongoClient(database_conn)
-        my_database = client["odsActions"] 
-        my_collection = my_database["ods_actions_logs_collection"]
-        
-        # get all the logs
-        my_logs=my_collection.find(sort=[( "date", -1 )])
-            
-        # just render the logs
-        return json.loads(json_util.dumps(my_logs))    
+        if request.args.get("format") == "ndjson":
+            def generate():
+                for log in my_logs:
+                    yield json_util.dumps(log) + "\n"
+            mimetype = "application/x-ndjson"
+        else:
+            def generate():
+                separator = "["
+                for log in my_logs:
+                    yield separator + json_util.dumps(log)
+                    separator = ","
+                yield "[]" if separator == "[" else "]"
+            mimetype = "application/json"
+
+        return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
     
     '''
     Display the IP address a remote resource sees in its logs. Necessary for firewall updates.
     '''
     @app.route("/ip")
     def get_ip():
-        data = requests.get("https://api.ipify.org?format=json")
+        data = http_sessions.get("https://api.ipify.org?format=json")
         return data.json()
     
     ############################################################################
@@ -1411,8 +1462,7 @@ def create_app(test_config=None):
                 return jsonify({"success": False, "message": "Password must be at least 6 characters long"})
             
             # Connect to MongoDB
-            client = MongoClient(database_conn)
-            my_database = client["odsActions"]
+            my_database = mongo.get_database("odsActions")
             my_collection = my_database["ods_actions_users_collection"]
             
             # Find user by email first
@@ -1446,6 +1496,7 @@ def create_app(test_config=None):
                 update_query,
                 {"$set": {"password": hashed_password}}
             )
+            directory.invalidate()
             
             if result.modified_count > 0:
                 # Log the password change
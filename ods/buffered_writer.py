@@ -0,0 +1,137 @@
+########################################################################
+# imports
+########################################################################
+
+import atexit
+import threading
+from decouple import config
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+########################################################################
+# setup of the writers
+########################################################################
+
+# documents written with one insert_many
+AUDIT_BATCH_SIZE = int(config("AUDIT_BATCH_SIZE", default=200))
+
+# seconds a document waits at most before being written
+AUDIT_FLUSH_INTERVAL = float(config("AUDIT_FLUSH_INTERVAL", default=2))
+
+# documents kept in memory at most, the next ones are dropped
+AUDIT_BUFFER_SIZE = int(config("AUDIT_BUFFER_SIZE", default=10000))
+
+########################################################################
+# buffered, batched writer of a Mongo collection
+########################################################################
+
+
+class BufferedWriter:
+    """
+    Collect the documents of one collection in memory and write them with insert_many,
+    from a background thread, when batch_size documents are waiting or every flush_interval seconds.
+    The documents are written on shutdown too, those coming when the buffer is full are counted and dropped.
+    When Mongo cannot be reached the documents not written go back to the buffer for the next flush.
+    """
+
+    def __init__(self,name:str,get_collection,batch_size:int=None,flush_interval:float=None,max_size:int=None):
+        self.name=name
+        self.get_collection=get_collection
+        self.batch_size=batch_size or AUDIT_BATCH_SIZE
+        self.flush_interval=flush_interval or AUDIT_FLUSH_INTERVAL
+        self.max_size=max_size or AUDIT_BUFFER_SIZE
+        self.written=0
+        self.dropped=0
+        self.failed=0
+        self._buffer=[]
+        self._dropped_reported=0
+        self._lock=threading.Lock()
+        self._flush_lock=threading.Lock()
+        self._wakeup=threading.Event()
+        self._thread=None
+        self._closed=False
+        atexit.register(self.close)
+
+    def put(self,document:dict)->bool:
+        """Queue a document, return False when it is dropped because the buffer is full."""
+        with self._lock:
+            if self._closed or len(self._buffer)>=self.max_size:
+                self.dropped+=1
+                return False
+            self._buffer.append(document)
+            full=len(self._buffer)>=self.batch_size
+        self._start()
+        if full:
+            self._wakeup.set()
+        return True
+
+    def flush(self)->int:
+        """Write every waiting document now, return the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch,self._buffer=self._buffer,[]
+                dropped=self.dropped-self._dropped_reported
+                self._dropped_reported=self.dropped
+
+            if dropped:
+                print(f"{self.name} writer: {dropped} documents dropped, the buffer was full")
+
+            written=0
+            waiting=[]
+            for i in range(0,len(batch),self.batch_size):
+                chunk=batch[i:i+self.batch_size]
+                try:
+                    self.get_collection().insert_many(chunk,ordered=False)
+                    written+=len(chunk)
+                except BulkWriteError as e:
+                    # the unordered insert wrote every document but the rejected ones
+                    rejected=len(e.details.get("writeErrors",[]))
+                    written+=e.details.get("nInserted",len(chunk)-rejected)
+                    self.failed+=rejected
+                    print(f"{self.name} writer: {rejected} documents not written : {e}")
+                except AutoReconnect as e:
+                    # Mongo not reachable (network error, timeout), this chunk and the next ones wait
+                    waiting=batch[i:]
+                    print(f"{self.name} writer: {len(waiting)} documents kept for the next flush : {e}")
+                    break
+                except Exception as e:
+                    self.failed+=len(chunk)
+                    print(f"{self.name} writer: {len(chunk)} documents not written : {e}")
+            self.written+=written
+            if waiting:
+                self._put_back(waiting)
+            return written
+
+    def _put_back(self,documents:list):
+        """Return documents not written to the front of the buffer, the ones beyond its bound fail."""
+        with self._lock:
+            room=0 if self._closed else max(0,self.max_size-len(self._buffer))
+            self._buffer=documents[:room]+self._buffer
+            lost=len(documents)-min(room,len(documents))
+            self.failed+=lost
+        if lost:
+            print(f"{self.name} writer: {lost} documents not written, no room left in the buffer")
+
+    def stats(self)->dict:
+        with self._lock:
+            return {"pending":len(self._buffer),"written":self.written,"dropped":self.dropped,"failed":self.failed}
+
+    def close(self):
+        """Stop accepting documents and write the ones still waiting."""
+        with self._lock:
+            self._closed=True
+        self._wakeup.set()
+        self.flush()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread=threading.Thread(target=self._run,name=f"{self.name}-writer",daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,71 @@
+########################################################################
+# imports
+########################################################################
+
+import threading
+import time
+from collections import OrderedDict
+
+########################################################################
+# bounded LRU cache whose entries expire
+########################################################################
+
+_MISSING=object()
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache of at most maxsize entries, each one kept ttl seconds.
+    The least recently used entry is dropped when the cache is full.
+    """
+
+    def __init__(self,maxsize:int,ttl:float):
+        self.maxsize=maxsize
+        self.ttl=ttl
+        self._data=OrderedDict()
+        self._lock=threading.Lock()
+
+    def get(self,key,default=None):
+        with self._lock:
+            item=self._data.get(key,_MISSING)
+            if item is _MISSING:
+                return default
+            value,expires_at=item
+            if expires_at<time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self,key,value,ttl:float=None):
+        expires_at=time.monotonic()+(self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key]=(value,expires_at)
+            self._data.move_to_end(key)
+            while len(self._data)>self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_many(self,keys)->tuple:
+        """Return the cached values of keys and the list of the keys not found."""
+        found={}
+        missing=[]
+        for key in keys:
+            value=self.get(key,_MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key]=value
+        return found,missing
+
+    def pop(self,key,default=None):
+        with self._lock:
+            item=self._data.pop(key,_MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
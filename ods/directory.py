@@ -0,0 +1,146 @@
+########################################################################
+# imports
+########################################################################
+
+import json
+import threading
+import time
+from bson import json_util
+from decouple import config
+from pymongo import ReturnDocument
+
+from ods import mongo
+
+########################################################################
+# setup of the directory
+########################################################################
+
+# seconds between two checks of the version stamp shared by the workers
+DIRECTORY_CHECK_INTERVAL = float(config("DIRECTORY_CHECK_INTERVAL", default=5))
+
+PERMISSIONS = ["show_display", "show_create_update", "show_send_file", "show_download_files", "show_parameters"]
+
+########################################################################
+# sites and users kept in memory, reloaded when any worker changes them
+########################################################################
+
+_state = {"version": None, "checked": 0.0}
+_cache = {}
+_lock = threading.Lock()
+
+
+def _versions_collection():
+    return mongo.get_collection("ods_actions_versions_collection")
+
+
+def _stored_version() -> int:
+    stamp = _versions_collection().find_one({"_id": "directory"})
+    return stamp["version"] if stamp else 0
+
+
+def _check_version():
+    """Drop the cached entries when another worker changed the sites or the users."""
+    now = time.monotonic()
+    if now - _state["checked"] < DIRECTORY_CHECK_INTERVAL:
+        return
+    version = _stored_version()
+    with _lock:
+        if version != _state["version"]:
+            _cache.clear()
+            _state["version"] = version
+        _state["checked"] = now
+
+
+def _cached(key, load):
+    _check_version()
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+        version = _state["version"]
+    value = load()
+    with _lock:
+        # not kept when the directory changed during the load
+        if _state["version"] == version:
+            _cache[key] = value
+    return value
+
+
+def invalidate():
+    """To call after any change of the sites or the users, in this worker and the others."""
+    stamp = _versions_collection().find_one_and_update(
+        {"_id": "directory"},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER)
+    with _lock:
+        _cache.clear()
+        _state["version"] = stamp["version"]
+        _state["checked"] = time.monotonic()
+
+
+def permission_value(val) -> str:
+    """Permission of a user document as the string "true" or "false"."""
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, str):
+        return "true" if val.strip().lower() == "true" else "false"
+    return "false"
+
+########################################################################
+# sites
+########################################################################
+
+def sites() -> list:
+    """Sites as JSON-ready documents, newest first."""
+    def load():
+        my_sites = mongo.get_collection("ods_actions_sites_collection").find(sort=[("creation_date", -1)])
+        return json.loads(json_util.dumps(my_sites))
+    return _cached("sites", load)
+
+
+def site_prefix(code_site: str) -> str:
+    """Job number prefix of a site, empty when the site is unknown."""
+    def load():
+        return {site.get("code_site"): site.get("prefix_site", "") for site in sites()}
+    return _cached("prefixes", load).get(code_site, "")
+
+########################################################################
+# users
+########################################################################
+
+def _users() -> list:
+    """Users documents, with their password hash, sorted by email."""
+    def load():
+        return list(mongo.get_collection("ods_actions_users_collection").find({}, sort=[("email", 1)]))
+    return _cached("users", load)
+
+
+def find_users(email: str) -> list:
+    """Users documents of an email, as read by the login."""
+    def load():
+        by_email = {}
+        for user in _users():
+            by_email.setdefault(user.get("email"), []).append(user)
+        return by_email
+    return _cached("users_by_email", load).get(email, [])
+
+
+def users() -> list:
+    """
+    Users as JSON-ready documents without their password, one per email,
+    with their permissions as the strings "true" or "false".
+    """
+    def load():
+        users_list = []
+        seen_emails = set()
+        for user in _users():
+            email = user.get("email", "")
+            if not email or email in seen_emails:
+                continue
+            seen_emails.add(email)
+            user_dict = {key: value for key, value in user.items() if key != "password"}
+            for permission in PERMISSIONS:
+                user_dict[permission] = permission_value(user.get(permission, "false"))
+            users_list.append(user_dict)
+        return json.loads(json_util.dumps(users_list))
+    return _cached("users_list", load)
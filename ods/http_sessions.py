@@ -0,0 +1,129 @@
+########################################################################
+# imports
+########################################################################
+
+import atexit
+import socket
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from decouple import config
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+########################################################################
+# pool settings
+########################################################################
+
+# number of connection pools kept by a session and connections per pool
+POOL_CONNECTIONS=int(config("HTTP_POOL_CONNECTIONS", default=10))
+POOL_MAXSIZE=int(config("HTTP_POOL_MAXSIZE", default=20))
+
+# wait for a free connection instead of opening one outside the pool
+POOL_BLOCK=str(config("HTTP_POOL_BLOCK", default="false")).lower()=="true"
+
+# TCP keep-alive probes on idle pooled connections (0 disables them)
+KEEPALIVE_IDLE=int(config("HTTP_KEEPALIVE_IDLE", default=60))
+
+# requests sent at the same time to one host inside host_slot (0 disables the limit)
+HOST_LIMIT=int(config("HTTP_HOST_LIMIT", default=6))
+
+########################################################################
+# session registry : one pooled session per upstream host
+########################################################################
+
+_sessions={}
+_sessions_lock=threading.Lock()
+
+
+def _keepalive_socket_options()->list:
+    if KEEPALIVE_IDLE<=0:
+        return []
+    options=[(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(KEEPALIVE_IDLE // 4, 1)))
+    return options
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections keep the TCP keep-alive options."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"]=HTTPConnection.default_socket_options + _keepalive_socket_options()
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _host_key(url:str)->str:
+    parts=urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _new_session()->requests.Session:
+    session=requests.Session()
+    adapter=PooledAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"]="keep-alive"
+    return session
+
+
+def get_session(url:str)->requests.Session:
+    """
+    Return the shared session used for the host of the url.
+    The session is created on first use and reused by every thread of the worker.
+    """
+    key=_host_key(url)
+    session=_sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session=_sessions.get(key)
+            if session is None:
+                session=_new_session()
+                _sessions[key]=session
+    return session
+
+
+_host_slots={}
+
+
+@contextmanager
+def host_slot(url:str):
+    """Wait for one of the HOST_LIMIT slots of the host of the url before sending requests to it."""
+    if HOST_LIMIT<=0:
+        yield
+        return
+    key=_host_key(url)
+    slots=_host_slots.get(key)
+    if slots is None:
+        with _sessions_lock:
+            slots=_host_slots.setdefault(key, threading.BoundedSemaphore(HOST_LIMIT))
+    with slots:
+        yield
+
+
+def request(method:str, url:str, **kwargs)->requests.Response:
+    """Same signature as requests.request, sent through the pooled session of the host."""
+    return get_session(url).request(method, url, **kwargs)
+
+
+def get(url:str, **kwargs)->requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url:str, **kwargs)->requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def close_sessions():
+    """Close every pooled session (called when the worker exits)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+atexit.register(close_sessions)
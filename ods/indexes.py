@@ -0,0 +1,167 @@
+########################################################################
+# imports
+########################################################################
+
+import sys
+import threading
+from decouple import config
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from ods import mongo
+
+########################################################################
+# setup of the bootstrap
+########################################################################
+
+# create the missing indexes when the application starts
+MONGO_ENSURE_INDEXES = str(config("MONGO_ENSURE_INDEXES", default="true")).lower() == "true"
+
+########################################################################
+# manifest : the indexes of the odsActions collections
+########################################################################
+
+INDEXES = {
+    "ods_actions_users_collection": [
+        IndexModel([("email", ASCENDING)], name="email_1"),
+        IndexModel([("username", ASCENDING)], name="username_1"),
+    ],
+    "ods_actions_sites_collection": [
+        IndexModel([("code_site", ASCENDING)], name="code_site_1"),
+        IndexModel([("creation_date", DESCENDING)], name="creation_date_-1"),
+    ],
+    "ods_actions_logs_collection": [
+        # keyset pages of /display_logs
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date_-1__id_-1"),
+        IndexModel([("user", ASCENDING), ("date", DESCENDING)], name="user_1_date_-1"),
+    ],
+    "ods_actions_analytics_collection": [
+        IndexModel([("date", DESCENDING)], name="date_-1"),
+        IndexModel([("action", ASCENDING), ("date", DESCENDING)], name="action_1_date_-1"),
+        IndexModel([("user", ASCENDING), ("date", DESCENDING)], name="user_1_date_-1"),
+    ],
+    "ods_actions_jobnumbers_collection": [
+        IndexModel([("jobnumber_value", ASCENDING)], name="jobnumber_value_1"),
+        IndexModel([("docsymbol", ASCENDING), ("language", ASCENDING)], name="docsymbol_1_language_1"),
+        IndexModel([("created_date", DESCENDING)], name="created_date_-1"),
+    ],
+    "ods_jobnumber_collection": [
+        IndexModel([("jobnumber_value", ASCENDING)], name="jobnumber_value_1"),
+    ],
+    "ods_actions_jobs_collection": [
+        IndexModel([("status", ASCENDING), ("created", ASCENDING)], name="status_1_created_1"),
+        IndexModel([("status", ASCENDING), ("heartbeat", ASCENDING)], name="status_1_heartbeat_1"),
+    ],
+    "ods_actions_job_events_collection": [
+        IndexModel([("job_id", ASCENDING), ("seq", ASCENDING)], name="job_id_1_seq_1", unique=True),
+    ],
+    "ods_actions_variant_cache_collection": [
+        # Mongo removes the entries once expired
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+    ],
+}
+
+# hot queries of the application : (collection, filter, sort), each one must use an index
+HOT_QUERIES = [
+    ("ods_actions_users_collection", {"email": "user@un.org"}, None),
+    ("ods_actions_sites_collection", {"code_site": "NY"}, None),
+    ("ods_actions_sites_collection", {}, [("creation_date", DESCENDING)]),
+    ("ods_actions_logs_collection", {}, [("date", DESCENDING), ("_id", DESCENDING)]),
+    ("ods_actions_logs_collection", {"user": "user@un.org"}, [("date", DESCENDING)]),
+    ("ods_actions_analytics_collection", {"action": "send_file_to_ods"}, [("date", DESCENDING)]),
+    ("ods_actions_analytics_collection", {"user": "user@un.org"}, [("date", DESCENDING)]),
+    ("ods_actions_jobnumbers_collection", {"jobnumber_value": "NY000001"}, None),
+    ("ods_actions_jobnumbers_collection", {"docsymbol": "A/1"}, None),
+    ("ods_actions_jobnumbers_collection", {}, [("_id", DESCENDING)]),
+    ("ods_jobnumber_collection", {"jobnumber_value": "NY000001"}, None),
+    ("ods_actions_jobs_collection", {"status": "queued"}, [("created", ASCENDING)]),
+    ("ods_actions_job_events_collection", {"job_id": "job", "seq": {"$gt": 0}}, [("seq", ASCENDING)]),
+]
+
+########################################################################
+# bootstrap and checks
+########################################################################
+
+def ensure_indexes(database=None) -> dict:
+    """
+    Create the indexes of the manifest, the ones already there are left as they are.
+    Return the errors by collection (an index existing with other options for example).
+    """
+    database = database if database is not None else mongo.get_database("odsActions")
+    errors = {}
+    for collection, models in INDEXES.items():
+        try:
+            database[collection].create_indexes(models)
+        except Exception as e:
+            errors[collection] = str(e)
+    return errors
+
+def missing_indexes(database=None) -> dict:
+    """Names of the indexes of the manifest not found, by collection."""
+    database = database if database is not None else mongo.get_database("odsActions")
+    missing = {}
+    for collection, models in INDEXES.items():
+        existing = database[collection].index_information()
+        names = [model.document["name"] for model in models if model.document["name"] not in existing]
+        if names:
+            missing[collection] = names
+    return missing
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+def collection_scans(database=None) -> list:
+    """The hot queries whose winning plan reads the whole collection."""
+    database = database if database is not None else mongo.get_database("odsActions")
+    scans = []
+    for collection, query, sort in HOT_QUERIES:
+        cursor = database[collection].find(query).limit(50)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(plan):
+            scans.append({"collection": collection, "filter": query, "sort": sort})
+    return scans
+
+def bootstrap():
+    """Create the missing indexes in the background when the application starts."""
+    def run():
+        errors = ensure_indexes()
+        for collection, error in errors.items():
+            print(f"Index bootstrap of {collection} failed : {error}")
+
+    if MONGO_ENSURE_INDEXES:
+        threading.Thread(target=run, name="index-bootstrap", daemon=True).start()
+
+########################################################################
+# command line : python -m ods.indexes [--check]
+########################################################################
+
+def main(argv) -> int:
+    check_only = "--check" in argv
+    failed = False
+
+    if not check_only:
+        for collection, error in ensure_indexes().items():
+            print(f"{collection}: {error}")
+            failed = True
+
+    for collection, names in missing_indexes().items():
+        print(f"{collection}: missing {', '.join(names)}")
+        failed = True
+
+    for scan in collection_scans():
+        print(f"{scan['collection']}: collection scan for {scan['filter']} sorted by {scan['sort']}")
+        failed = True
+
+    print("Indexes KO" if failed else "Indexes OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
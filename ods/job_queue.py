@@ -0,0 +1,375 @@
+########################################################################
+# imports
+########################################################################
+
+import contextvars
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from decouple import config
+from pymongo import ReturnDocument
+
+import ods.ods_rutines
+
+########################################################################
+# queue settings
+########################################################################
+
+# worker threads started by a worker process
+JOB_WORKERS=int(config("JOB_WORKERS", default=2))
+
+# also run the workers inside the web process (false when a separate worker service runs them)
+JOB_RUN_IN_WEB=str(config("JOB_RUN_IN_WEB", default="true")).lower()=="true"
+
+# seconds between two polls of the queue when it is empty
+JOB_POLL_INTERVAL=float(config("JOB_POLL_INTERVAL", default=2))
+
+# a running job whose heartbeat is older than this is given back to the queue
+JOB_HEARTBEAT_INTERVAL=int(config("JOB_HEARTBEAT_INTERVAL", default=15))
+JOB_STALE_SECONDS=int(config("JOB_STALE_SECONDS", default=120))
+
+# a job requeued this many times is marked as failed
+JOB_MAX_ATTEMPTS=int(config("JOB_MAX_ATTEMPTS", default=3))
+
+# an events stream is closed after this time, the browser reconnects with Last-Event-ID
+JOB_EVENTS_MAX_SECONDS=int(config("JOB_EVENTS_MAX_SECONDS", default=300))
+JOB_EVENTS_POLL_INTERVAL=float(config("JOB_EVENTS_POLL_INTERVAL", default=1))
+JOB_EVENTS_KEEPALIVE=15
+
+# a missing sequence number not filled within this time is skipped by the streams
+JOB_EVENTS_GAP_SECONDS=5
+
+QUEUED="queued"
+RUNNING="running"
+DONE="done"
+FAILED="failed"
+
+WORKER_ID=f"{socket.gethostname()}-{os.getpid()}"
+
+_workers=[]
+_workers_lock=threading.Lock()
+_events_lock=threading.Lock()
+
+########################################################################
+# kinds of jobs : one function per item and one once the job is finished
+########################################################################
+
+def _send_files_item(item,params):
+    return ods.ods_rutines.download_file_and_send_to_ods(item)
+
+def _send_files_done(job):
+    ods.ods_rutines.add_log(_now(),job["user"],"ODS send file to ods endpoint called from the system!!!")
+    ods.ods_rutines.add_analytics(_now(),job["user"],"send_file_endpoint",job["results"])
+
+def _create_update_prepare(items,params):
+    # read the metadata of all the symbols from CDB at once
+    params["cb_data"]=ods.ods_rutines.get_data_from_cb_bulk(items)
+
+def _create_update_item(item,params):
+    start=time.time()
+    cb_data=params.get("cb_data",{}).get(item.strip())
+    result=ods.ods_rutines.ods_create_update_metadata(item,params["prefix"],cb_data)
+    summary=ods.ods_rutines.create_update_summary(item,result)
+    ods.ods_rutines.report_progress(summary,{"total":time.time()-start})
+    return summary
+
+def _create_update_done(job):
+    ods.ods_rutines.add_log(_now(),job["user"],"ODS creating/updating endpoint called from the system!!!")
+    ods.ods_rutines.add_analytics(_now(),job["user"],"creating_updating_endpoint",job["results"])
+
+def _batch_download_item(item,params):
+    start=time.time()
+    result=ods.ods_rutines.download_file_from_ods(item["docsymbol"],item["language"])
+    result["docsymbol"]=item["docsymbol"]
+    ods.ods_rutines.report_progress(result,{"download":time.time()-start})
+    return result
+
+def _batch_download_done(job):
+    results=job["results"]
+    successful=sum(1 for r in results if r and r.get("status")==1)
+    symbols=len({item["docsymbol"] for item in job["items"]})
+    log_message=f"Batch download from ODS: {symbols} symbol(s), {successful}/{len(results)} files downloaded successfully"
+    ods.ods_rutines.add_log(_now(),job["user"],log_message)
+    ods.ods_rutines.add_analytics(_now(),job["user"],"batch_download_files_from_ods_endpoint",results)
+
+JOB_KINDS={
+    "send_files":(_send_files_item,_send_files_done),
+    "create_update_metadata":(_create_update_item,_create_update_done),
+    "batch_download":(_batch_download_item,_batch_download_done),
+}
+
+# items of a job processed at the same time (one by one when the kind is not listed)
+JOB_PARALLEL={
+    "batch_download":ods.ods_rutines.BATCH_DOWNLOAD_WORKERS,
+}
+
+# optional step run before the items, it can add in memory data to the params
+JOB_PREPARE={
+    "create_update_metadata":_create_update_prepare,
+}
+
+########################################################################
+# queue
+########################################################################
+
+def _now():
+    return datetime.datetime.now(tz=datetime.timezone.utc)
+
+def _jobs_collection():
+    return ods.ods_rutines.my_database["ods_actions_jobs_collection"]
+
+def enqueue_job(kind:str,items:list,user:str,params:dict=None)->str:
+    """
+    Save a new job in the queue and return its id.
+    Every item is processed on its own and its result is stored as soon as it is ready.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job_id=uuid.uuid4().hex
+    _jobs_collection().insert_one({
+        "_id":job_id,
+        "kind":kind,
+        "user":user,
+        "params":params or {},
+        "items":items,
+        "results":[None]*len(items),
+        "total":len(items),
+        "done":0,
+        "status":QUEUED,
+        "attempts":0,
+        "created":_now(),
+        "started":None,
+        "finished":None,
+        "heartbeat":None,
+        "worker":None,
+        "error":None,
+        "events":0,
+        "units":0,
+    })
+    ensure_workers()
+    return job_id
+
+def get_job(job_id:str):
+    return _jobs_collection().find_one({"_id":job_id})
+
+def job_status(job:dict)->dict:
+    """Public view of a job : its progress and the results already available, in the order of the items."""
+    return {
+        "job_id":job["_id"],
+        "kind":job["kind"],
+        "status":job["status"],
+        "total":job["total"],
+        "done":job["done"],
+        "results":[result for result in job["results"] if result is not None],
+        "error":job.get("error"),
+        "created":job["created"],
+        "started":job.get("started"),
+        "finished":job.get("finished"),
+    }
+
+def _events_collection():
+    return ods.ods_rutines.my_database["ods_actions_job_events_collection"]
+
+def emit_event(job_id:str,event:str,data:dict)->int:
+    """
+    Save an event of a job with the next sequence number of the job and return it.
+    A "unit" event also carries the running count of the finished units.
+    """
+    increment={"events":1,"units":1} if event=="unit" else {"events":1}
+    # the threads of a job store their events in the order of their numbers
+    with _events_lock:
+        job=_jobs_collection().find_one_and_update(
+            {"_id":job_id},
+            {"$inc":increment},
+            projection={"events":1,"units":1},
+            return_document=ReturnDocument.AFTER)
+        if event=="unit":
+            data={**data,"count":job["units"]}
+        _events_collection().insert_one({"job_id":job_id,"seq":job["events"],"event":event,"data":data,"date":_now()})
+    return job["events"]
+
+def get_events(job_id:str,after_seq:int=0)->list:
+    return list(_events_collection().find({"job_id":job_id,"seq":{"$gt":after_seq}},sort=[("seq",1)]))
+
+def _sse(seq:int,event:str,data:dict)->str:
+    return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data,default=str)}\n\n"
+
+def _without_gaps(events:list,last_seq:int)->list:
+    """The events following last_seq up to the first missing sequence number."""
+    ready=[]
+    for event in events:
+        if event["seq"]>last_seq+1:
+            break
+        ready.append(event)
+        last_seq=max(last_seq,event["seq"])
+    return ready
+
+def stream_events(job_id:str,last_seq:int=0):
+    """
+    Server-Sent Events of a job after last_seq, until its "end" event.
+    The stream is closed after JOB_EVENTS_MAX_SECONDS and resumed by the browser from its Last-Event-ID.
+    The events are sent in the order of their numbers, a missing one is waited for up to JOB_EVENTS_GAP_SECONDS.
+    """
+    deadline=time.time()+JOB_EVENTS_MAX_SECONDS
+    keepalive=time.time()
+    gap_since=None
+    yield "retry: 2000\n\n"
+
+    while time.time()<deadline:
+        events=get_events(job_id,last_seq)
+        if not events:
+            job=_jobs_collection().find_one({"_id":job_id},projection={"status":1,"error":1,"events":1})
+            if job is None or job["status"] in (DONE,FAILED):
+                # the job may have ended between the two reads
+                events=get_events(job_id,last_seq)
+                if not any(event["event"]=="end" for event in events):
+                    status=job["status"] if job else FAILED
+                    events.append({"seq":last_seq,"event":"end","data":{"status":status,"error":job.get("error") if job else "Job not found"}})
+
+        ready=_without_gaps(events,last_seq)
+        if len(ready)<len(events):
+            # an event still being stored is read again at the next poll, a lost one is skipped
+            gap_since=gap_since or time.time()
+            if time.time()-gap_since>=JOB_EVENTS_GAP_SECONDS:
+                ready=events
+        if len(ready)==len(events):
+            gap_since=None
+
+        for event in ready:
+            last_seq=event["seq"]
+            yield _sse(event["seq"],event["event"],event["data"])
+            if event["event"]=="end":
+                return
+
+        if not ready:
+            if time.time()-keepalive>=JOB_EVENTS_KEEPALIVE:
+                keepalive=time.time()
+                yield ": keep-alive\n\n"
+            time.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+def requeue_stale_jobs()->int:
+    """Give back to the queue the running jobs whose worker stopped sending heartbeats."""
+    my_collection=_jobs_collection()
+    limit=_now()-datetime.timedelta(seconds=JOB_STALE_SECONDS)
+    stale={"status":RUNNING,"heartbeat":{"$lt":limit}}
+
+    my_collection.update_many(
+        {**stale,"attempts":{"$gte":JOB_MAX_ATTEMPTS}},
+        {"$set":{"status":FAILED,"finished":_now(),"error":"The job was interrupted too many times"}})
+
+    result=my_collection.update_many(stale,{"$set":{"status":QUEUED,"worker":None}})
+    return result.modified_count
+
+def claim_job(worker_id:str):
+    """Take the oldest queued job, or None when the queue is empty."""
+    return _jobs_collection().find_one_and_update(
+        {"status":QUEUED},
+        {"$set":{"status":RUNNING,"worker":worker_id,"heartbeat":_now(),"started":_now()},
+         "$inc":{"attempts":1}},
+        sort=[("created",1)],
+        return_document=ReturnDocument.AFTER)
+
+def _heartbeat(job_id:str,worker_id:str,stop:threading.Event):
+    while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+        try:
+            _jobs_collection().update_one({"_id":job_id,"worker":worker_id},{"$set":{"heartbeat":_now()}})
+        except Exception as e:
+            # the next beat may go through, the job is only requeued after JOB_STALE_SECONDS
+            print(f"Job {job_id} heartbeat failed : {e}")
+
+def run_job(job:dict,worker_id:str):
+    """
+    Process the items of a claimed job not done yet (a requeued job resumes where it stopped),
+    store each result as soon as it is ready, then run the end of job actions.
+    """
+    my_collection=_jobs_collection()
+    process_item,job_done=JOB_KINDS[job["kind"]]
+    owner={"_id":job["_id"],"worker":worker_id}
+
+    stop=threading.Event()
+    threading.Thread(target=_heartbeat,args=(job["_id"],worker_id,stop),daemon=True).start()
+
+    def report_unit(entry,timings):
+        emit_event(job["_id"],"unit",{"entry":entry,"timings":timings})
+
+    def process(index):
+        item=job["items"][index]
+        try:
+            return process_item(item,params)
+        except Exception as e:
+            print(f"Job {job['_id']} item {item} failed : {e}")
+            return {"docsymbol":str(item),"status":0,"error":str(e)}
+
+    try:
+        params=dict(job["params"])
+        pending=[index for index in range(len(job["items"])) if job["results"][index] is None]
+        if job["kind"] in JOB_PREPARE:
+            JOB_PREPARE[job["kind"]]([job["items"][index] for index in pending],params)
+
+        executor=ThreadPoolExecutor(max_workers=JOB_PARALLEL.get(job["kind"],1))
+        try:
+            with ods.ods_rutines.progress_reporter(report_unit):
+                futures={executor.submit(contextvars.copy_context().run,process,index):index for index in pending}
+
+            for future in as_completed(futures):
+                index=futures[future]
+                result=future.result()
+                job["results"][index]=result
+                update=my_collection.update_one(owner,{"$set":{f"results.{index}":result,"heartbeat":_now()},"$inc":{"done":1}})
+                if update.matched_count==0:
+                    # the job was given to another worker
+                    return
+        finally:
+            executor.shutdown(wait=False,cancel_futures=True)
+
+        job_done(job)
+        emit_event(job["_id"],"end",{"status":DONE,"error":None})
+        my_collection.update_one(owner,{"$set":{"status":DONE,"finished":_now()}})
+
+    except Exception as e:
+        print(f"Job {job['_id']} failed : {e}")
+        emit_event(job["_id"],"end",{"status":FAILED,"error":str(e)})
+        my_collection.update_one(owner,{"$set":{"status":FAILED,"finished":_now(),"error":str(e)}})
+
+    finally:
+        stop.set()
+
+########################################################################
+# workers
+########################################################################
+
+def _worker_loop(worker_id:str):
+    while True:
+        try:
+            requeue_stale_jobs()
+            job=claim_job(worker_id)
+            if job is None:
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+            run_job(job,worker_id)
+        except Exception as e:
+            print(f"Job worker {worker_id} error : {e}")
+            time.sleep(JOB_POLL_INTERVAL)
+
+def start_workers(count:int=JOB_WORKERS)->list:
+    """Start the worker threads of this process once (again in a forked process, where they do not run)."""
+    with _workers_lock:
+        if not any(worker.is_alive() for worker in _workers):
+            _workers.clear()
+            for number in range(count):
+                worker=threading.Thread(target=_worker_loop,args=(f"{WORKER_ID}-{number}",),daemon=True)
+                worker.start()
+                _workers.append(worker)
+    return _workers
+
+def ensure_workers():
+    """Start the workers in the web process when it is configured to run them."""
+    if JOB_RUN_IN_WEB:
+        start_workers()
@@ -0,0 +1,56 @@
+########################################################################
+# imports
+########################################################################
+
+import os
+import threading
+from pymongo import MongoClient
+from decouple import config
+
+########################################################################
+# setup of the clients
+########################################################################
+
+# connections kept at most by the client of one worker
+MONGO_MAX_POOL_SIZE = int(config("MONGO_MAX_POOL_SIZE", default=100))
+
+########################################################################
+# one MongoDB client per worker process, shared by the whole application
+########################################################################
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(conn: str = None) -> MongoClient:
+    """
+    Return the client of the connection string (CONN by default), created on the first call.
+    A forked worker gets its own client, a client is never shared between processes.
+    """
+    conn = conn or config("CONN")
+    key = (os.getpid(), conn)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = MongoClient(conn, maxPoolSize=MONGO_MAX_POOL_SIZE)
+                _clients[key] = client
+    return client
+
+
+def get_database(name: str = "odsActions", conn: str = None):
+    """Return the database handle, sharing the pooled client."""
+    return get_client(conn)[name]
+
+
+def get_collection(name: str, database: str = "odsActions", conn: str = None):
+    """Return the collection handle, sharing the pooled client."""
+    return get_client(conn)[database][name]
+
+
+def close_clients():
+    """Close the clients of this process (tests, shutdown)."""
+    with _lock:
+        for key in [key for key in _clients if key[0] == os.getpid()]:
+            _clients.pop(key).close()
@@ -4,25 +4,37 @@
 
 from datetime import datetime, timedelta
 import re
-from pymongo import MongoClient
-import requests
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.collation import Collation
+from bson import json_util
 from decouple import config
 import urllib3
 import urllib.parse
 import json
-import requests
 from dlx import DB
 from ods.config_dlx import Config
+from ods import http_sessions
+from ods import mongo
+from ods import scratch
+from ods.caching import TTLCache
+from ods.buffered_writer import BufferedWriter
 from dlx.file import File, Identifier
-from dlx.marc import BibSet, Query,Condition,AuthSet
+from dlx.marc import BibSet, Query,AuthSet
 import os
-import platform
 import base64
+import uuid
 import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+import zipfile
+import hashlib
 import copy
-import traceback
-import traceback
+import contextvars
+import functools
+import threading
+from contextlib import contextmanager
 
 ########################################################################
 # setup urllib3
@@ -82,8 +94,7 @@ client_secret = config("CLIENT_SECRET")
 # management of the JobNumber
 ########################################################################
 
-client = MongoClient(config("CONN"))
-my_database = client["odsActions"] 
+my_database = mongo.get_database("odsActions")
 
 ########################################################################
 # Connect to Central DB
@@ -91,32 +102,35 @@ my_database = client["odsActions"]
 #print(Config.connect_string)
 DB.connect(Config.connect_string, database="undlFiles")
 
+########################################################################
+# logs and analytics are written in batches out of the requests
+########################################################################
+
+_logs_writer = BufferedWriter("logs", lambda: my_database["ods_actions_logs_collection"])
+_analytics_writer = BufferedWriter("analytics", lambda: my_database["ods_actions_analytics_collection"])
+
+def flush_audit() -> int:
+    """Write the logs and analytics still waiting, return the number written."""
+    return _logs_writer.flush() + _analytics_writer.flush()
+
+def audit_stats() -> dict:
+    return {"logs": _logs_writer.stats(), "analytics": _analytics_writer.stats()}
+
 ########################################################################
 # function managing the creation of the logs depending of the context
 ########################################################################
 
 def add_log(date_log:str,user_connected:str,action_log:str)-> int:
     
-    try:
-        
-        # setup the database and the collection
-        my_collection = my_database["ods_actions_logs_collection"]
-
-        # creation of the log object
-        my_log = {
-            "user": user_connected,
-            "action": action_log,
-            "date": date_log
-        }
-        
-        # save the log in the database
-        my_collection.insert_one(my_log)
-        
-        return 0
-        
-    except:
-
-        return -1
+    # creation of the log object
+    my_log = {
+        "user": user_connected,
+        "action": action_log,
+        "date": date_log
+    }
+    
+    # queue the log, it is saved in the database with the next batch
+    return 0 if _logs_writer.put(my_log) else -1
 
 ########################################################################
 # function managing the creation of the logs depending of the context
@@ -124,71 +138,97 @@ def add_log(date_log:str,user_connected:str,action_log:str)-> int:
 
 def add_analytics(date_analytics:str,user_connected:str,action_analytics:str,data:list)-> int:
     
+    # Check if this is a download action
+    is_download_action = (action_analytics == "batch_download_files_from_ods_endpoint" or 
+                         action_analytics == "download_file_from_ods_endpoint" or
+                         "batch_download" in str(action_analytics).lower() or
+                         "download_file_from_ods" in str(action_analytics).lower())
+    
+    # For download actions, remove the local filepath from the data
+    cleaned_data = data
+    if is_download_action:
+        if isinstance(data, list):
+            cleaned_data = [
+                {k: v for k, v in item.items() if k != 'filepath'} if isinstance(item, dict) else item
+                for item in data
+            ]
+        elif isinstance(data, dict):
+            cleaned_data = {k: v for k, v in data.items() if k != 'filepath'}
+    
+    my_analytics = {
+        "user": user_connected,
+        "action": action_analytics,
+        "date": date_analytics,
+        "data": cleaned_data
+    }
+    
+    # queue the analytics, they are saved in the database with the next batch
+    return 0 if _analytics_writer.put(my_analytics) else -1
+
+########################################################################
+# reading the logs page by page, newest first
+########################################################################
+
+# logs of one page at most
+LOGS_PAGE_MAX = int(config("LOGS_PAGE_MAX", default=5000))
+
+LOGS_SORT = [("date", -1), ("_id", -1)]
+
+def encode_logs_cursor(log: dict) -> str:
+    """Opaque position after a log, keyset on (date, _id)."""
+    position = json_util.dumps({"date": log.get("date"), "_id": log["_id"]})
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+def decode_logs_cursor(cursor: str) -> dict:
+    """Position encoded by encode_logs_cursor, ValueError when the cursor is invalid."""
     try:
-        
-        # setup the database and the collection
-        my_collection = my_database["ods_actions_analytics_collection"]
-        
-        print(f"DEBUG: Database connection test - collection: {my_collection.name}")
-
-        # For download actions, create a new data structure without filepath
-        # Check if this is a download action
-        is_download_action = (action_analytics == "batch_download_files_from_ods_endpoint" or 
-                             action_analytics == "download_file_from_ods_endpoint" or
-                             "batch_download" in str(action_analytics).lower() or
-                             "download_file_from_ods" in str(action_analytics).lower())
-        
-        # For download actions, build a new structure without filepath
-        cleaned_data = data
-        if is_download_action:
-            print(f"DEBUG: Processing download action: {action_analytics}")
-            print(f"DEBUG: Original data: {data}")
-            
-            # Simply remove filepath from the data
-            if isinstance(data, list):
-                cleaned_data = []
-                for item in data:
-                    if isinstance(item, dict):
-                        # Remove filepath if it exists
-                        cleaned_item = {k: v for k, v in item.items() if k != 'filepath'}
-                        cleaned_data.append(cleaned_item)
-                    else:
-                        cleaned_data.append(item)
-            elif isinstance(data, dict):
-                cleaned_data = {k: v for k, v in data.items() if k != 'filepath'}
-            
-            print(f"DEBUG: Cleaned data: {cleaned_data}")
-        
-        print(f"DEBUG: Final cleaned_data: {cleaned_data}")
-        
-        # For download actions, always insert new document (for testing)
-        if is_download_action:
-            print(f"DEBUG: Processing download action: {action_analytics} for user: {user_connected}")
-            # Always insert new document for download actions
-            my_analytics = {
-                "user": user_connected,
-                "action": action_analytics,
-                "date": date_analytics,
-                "data": cleaned_data
-            }
-            result = my_collection.insert_one(my_analytics)
-            print(f"DEBUG: Insert result: {result.inserted_id}")
-            return 0
-        else:
-            # For non-download actions, insert as new entry
-            my_analytics = {
-                "user": user_connected,
-                "action": action_analytics,
-                "date": date_analytics,
-                "data": cleaned_data
-            }
-            my_collection.insert_one(my_analytics)
-            return 0
-        
-    except Exception as e:
-        print(f"ERROR: Exception in add_analytics: {e}")
-        print(f"ERROR: Traceback: {traceback.format_exc()}")
-        return -1
+        position = json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        return {"date": position["date"], "_id": position["_id"]}
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def logs_query(user=None, action=None, start_date=None, end_date=None, after=None) -> dict:
+    """
+    Filter of the logs : user and action contain the text (case-insensitive),
+    start_date and end_date are days included (YYYY-MM-DD), after is a decoded cursor.
+    """
+    conditions = []
+    if user:
+        conditions.append({"user": {"$regex": re.escape(user), "$options": "i"}})
+    if action:
+        conditions.append({"action": {"$regex": re.escape(action), "$options": "i"}})
+    if start_date:
+        conditions.append({"date": {"$gte": datetime.strptime(start_date, "%Y-%m-%d")}})
+    if end_date:
+        conditions.append({"date": {"$lt": datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)}})
+    if after:
+        conditions.append({"$or": [
+            {"date": {"$lt": after["date"]}},
+            {"date": after["date"], "_id": {"$lt": after["_id"]}},
+        ]})
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def find_logs(limit=None, **filters):
+    """Cursor on the logs matching the filters, newest first (see logs_query)."""
+    my_collection = my_database["ods_actions_logs_collection"]
+    logs = my_collection.find(logs_query(**filters), sort=LOGS_SORT)
+    if limit:
+        logs = logs.limit(limit)
+    return logs
+
+def logs_page(limit: int, **filters) -> tuple:
+    """
+    One page of at most limit logs and the cursor of the next page,
+    None when there is no more logs.
+    """
+    limit = max(1, min(int(limit), LOGS_PAGE_MAX))
+    logs = list(find_logs(limit + 1, **filters))
+    if len(logs) > limit:
+        logs = logs[:limit]
+        return logs, encode_logs_cursor(logs[-1])
+    return logs, None
 
 ########################################################################
 # encode base64
@@ -219,10 +259,11 @@ def check_if_docsymbol_exists(my_docsymbol:str)-> bool:
   job_numbers=[]
   
   # display result
-  if ods_get_loading_symbol(my_docsymbol)["body"]["meta"]["matches"]>0:
+  result=ods_get_loading_symbol(my_docsymbol)
+  if result["body"]["meta"]["matches"]>0:
     find_occurence=True
     # retrieve job numbers as well
-    job_numbers=ods_get_loading_symbol(my_docsymbol)["body"]["data"][0]["job_numbers"]
+    job_numbers=result["body"]["data"][0]["job_numbers"]
 
   # returning a tuple with the information required  
   return find_occurence,job_numbers
@@ -250,8 +291,6 @@ def check_if_job_number_exists(my_job_number:str):
 # find job numbers using a batch
 #################################################################################################################################### 
 def find_update_job_numbers(my_docsymbol:str,my_language:str):
-  # get the token
-  my_token=get_token()
   
   # build the url
   url1=config("BASE_URL") + "api/loading/symbol?s=" +my_docsymbol.upper()+"&em=true"
@@ -259,111 +298,101 @@ def find_update_job_numbers(my_docsymbol:str,my_language:str):
   # build the payload
   payload={}
   
-  # build the header
-  headers = {
-          "authorization":  "Access {}".format(my_token),
-          }
-  
   # get the response 
-  response = requests.request("GET", url1, headers=headers, data=payload,verify=False)
+  response = ods_api_request("GET", url1, data=payload)
   #print(f"job numbers in ODS are {response['body']['data'][0]['job_numbers']}")
   # return the response
   #print(response.json())
   return response.json()['body']['data'][0]['job_numbers']
 
 ####################################################################################################################################        
-# create a job number using a batch
+# create job numbers using a block reserved on the counter of the prefix
 ####################################################################################################################################        
 
-def get_new_job_number(my_docsymbol:str,my_language:str,my_prefix_jobnumber:str)->dict:
+# first number handed out when no job number was ever recorded
+JOBNUMBER_FIRST_VALUE=900000
 
-  # try
-  
-  # get the collection
+# parallel calls used to check a reserved block against ODS
+JOBNUMBER_CHECK_WORKERS=int(config("JOBNUMBER_CHECK_WORKERS", default=7))
+
+def _jobnumber_counter_seed()->int:
+  """
+  Start value of a new counter: the number following the last job number
+  recorded in the collection, as the previous scan did.
+  The _id index gives the last inserted record without reading the collection.
+  """
   my_collection = my_database["ods_actions_jobnumbers_collection"]
-  
-  # get the last value
-  number_of_records=my_collection.estimated_document_count()
+  for doc in my_collection.find().sort([('_id',-1)]).limit(1):
+    try:
+      return int(doc["jobnumber_value"][2:]) + 1
+    except (KeyError, TypeError, ValueError):
+      pass
+  return JOBNUMBER_FIRST_VALUE
 
-  # if the collection is empty        
-  if number_of_records == 0:
+def reserve_job_number_block(my_prefix_jobnumber:str,count:int)->list:
+  """
+  Reserve count consecutive job numbers for the prefix.
+  The counter document of the prefix is advanced with one atomic
+  find-and-modify, so two workers can never get the same numbers.
+  """
+  my_counters = my_database["ods_actions_jobnumber_counters_collection"]
+  increment={"$inc":{"next_value":count}}
 
-    my_number=900000
-    
-    found_number=False
-    jobnumber_to_insert=""
-    
-    # loop to check if the number exists
-    while found_number==False:
+  counter=my_counters.find_one_and_update({"_id":my_prefix_jobnumber},increment,return_document=ReturnDocument.BEFORE)
 
-      jobnumber_to_insert=my_prefix_jobnumber + str(my_number)
-      result=check_if_job_number_exists(jobnumber_to_insert)
-      if (result==False):
-        found_number=True
-      else:
-        my_number=my_number+1
-                  
-    # the collection is empty
-    data = {
-        "created_date": datetime.now(), 
-        "jobnumber_value":jobnumber_to_insert,
-        "docsymbol": my_docsymbol,
-        "language":my_language
-    }
+  if counter is None:
+    # first reservation for this prefix : create the counter
+    try:
+      my_counters.insert_one({"_id":my_prefix_jobnumber,"next_value":_jobnumber_counter_seed()})
+    except DuplicateKeyError:
+      # another worker created it in the meantime
+      pass
+    counter=my_counters.find_one_and_update({"_id":my_prefix_jobnumber},increment,return_document=ReturnDocument.BEFORE)
+
+  first_value=int(counter["next_value"])
+  return [my_prefix_jobnumber + str(value) for value in range(first_value,first_value+count)]
+
+def find_existing_job_numbers(job_numbers:list)->set:
+  """Check a list of job numbers against ODS in one parallel pass and return the ones already used."""
+  if not job_numbers:
+    return set()
+  with ThreadPoolExecutor(max_workers=min(len(job_numbers),JOBNUMBER_CHECK_WORKERS)) as executor:
+    results=list(executor.map(check_if_job_number_exists,job_numbers))
+  return {job_number for job_number,exists in zip(job_numbers,results) if exists}
+
+def get_new_job_numbers(my_docsymbol:str,my_languages:list,my_prefix_jobnumber:str)->list:
+  """
+  Create one job number per language.
+  Numbers are reserved by block on the counter of the prefix and the ones
+  already known by ODS are skipped ; a new block is only reserved to
+  replace those.
+  """
+  my_collection = my_database["ods_actions_jobnumbers_collection"]
 
-    # save the record in the database
-    resultat=my_collection.insert_one(data)
+  free_job_numbers=[]
+  while len(free_job_numbers)<len(my_languages):
+    block=reserve_job_number_block(my_prefix_jobnumber,len(my_languages)-len(free_job_numbers))
+    existing=find_existing_job_numbers(block)
+    free_job_numbers.extend(job_number for job_number in block if job_number not in existing)
 
-    # return the jobnumber
-    return data
-  
-  # if the collection is not empty     
-  if number_of_records !=0:
+  records=[]
+  for job_number,language in zip(free_job_numbers,my_languages):
+    records.append({
+        "created_date": datetime.now(), 
+        "jobnumber_value":job_number,
+        "docsymbol": my_docsymbol,
+        "language":language
+    })
 
-    # get the job number of the last record
-    last_record=my_collection.find().limit(1).sort([('$natural',-1)])
-    
-    # retrieve last_record_number value
-    last_record_number=0 
-    for doc in last_record:
-        last_record_number=doc["jobnumber_value"]
-
-    last_record =int(last_record_number[2:]) + 1
-    found_number=False
-    jobnumber_to_insert=my_prefix_jobnumber + str(last_record)
-    
-    # loop to check if the number exists
-    while found_number==False:
+  if records:
+    # save the records in the database
+    my_collection.insert_many(records)
 
-      result= check_if_job_number_exists(jobnumber_to_insert)
+  return records
 
-      if result==False:
-        found_number=True
-      else:
-        last_record=last_record+1
-        jobnumber_to_insert=my_prefix_jobnumber + str(last_record)        
-    
-    data = {
-        "created_date": datetime.now(), 
-        "jobnumber_value":jobnumber_to_insert,
-        "docsymbol": my_docsymbol,
-        "language":my_language
-    }
-      
-                  
-    # save the log in the database
-    my_collection.insert_one(data)
-    return data
-      
-  # except:
-    
-  #   result={
-  #       "result":"NOK",
-  #       "jobnumber":"",
-  #       "id":""
-  #   }
+def get_new_job_number(my_docsymbol:str,my_language:str,my_prefix_jobnumber:str)->dict:
 
-  #   return result
+  return get_new_job_numbers(my_docsymbol,[my_language],my_prefix_jobnumber)[0]
 
 ####################################################################################################################################                
 #release job number not used
@@ -399,25 +428,195 @@ def release_job_number(jobnumber:str):
 
 
 ########################################################################
-# call the API for getting the Token every time : /api/auth/token
+# call the API for getting the Token : /api/auth/token
 ########################################################################
 
-def get_token()->str:
+# renew the token this many seconds before it expires
+TOKEN_REFRESH_MARGIN=int(config("ODS_TOKEN_REFRESH_MARGIN", default=120))
+
+# lifetime assumed when the token response does not carry an expiry
+TOKEN_DEFAULT_TTL=int(config("ODS_TOKEN_DEFAULT_TTL", default=1800))
+
+# token shared by all the requests of this worker
+_token_cache={"token":None,"expires_at":0.0,"refreshing":False}
+_token_lock=threading.Lock()
+
+def _token_expiry(json_data:dict,token:str)->float:
+  """
+  Compute the expiry timestamp of a token, using in order the
+  expires_in value of the response, the exp claim of the JWT or
+  the default lifetime.
+  """
+  now=time.time()
+  for key in ("expires_in","expiresIn"):
+    if json_data.get(key):
+      try:
+        return now + float(json_data[key])
+      except (TypeError, ValueError):
+        pass
+  try:
+    claims=token.split(".")[1]
+    claims+="=" * (-len(claims) % 4)
+    exp=json.loads(base64.urlsafe_b64decode(claims)).get("exp")
+    if exp:
+      return float(exp)
+  except Exception:
+    pass
+  return now + TOKEN_DEFAULT_TTL
+
+def _request_token():
 
   url = f"{base_url}api/auth/token?username={username}&password={password}&client_id={client_id}&client_secret={client_secret}"
   payload0 = {}
   headers0 = {
     'Authorization': f'Basic {get_encode_base64()}'
   }
-  response = requests.request("GET", url, headers=headers0, data=payload0,verify=False)
-  #print(f"username is {username}")
-  #print(f"password is {password}")
-  #print(f"client_id is {client_id}")
-  #print(f"client_secret is {client_secret}")
-  #print(f"url is {url}")
-  #print(f"response is {response.text}")
+  response = http_sessions.request("GET", url, headers=headers0, data=payload0,verify=False)
   json_data = json.loads(response.text)
-  return json_data["token"]
+  token=json_data["token"]
+  return token,_token_expiry(json_data,token)
+
+def _refresh_token_in_background():
+  try:
+    token,expires_at=_request_token()
+    with _token_lock:
+      _token_cache["token"]=token
+      _token_cache["expires_at"]=expires_at
+  except Exception as e:
+    print(f"Background token refresh failed: {e}")
+  finally:
+    _token_cache["refreshing"]=False
+
+def get_token()->str:
+  """
+  Return the cached ODS token, fetching a new one when it is missing
+  or expired. When the token is about to expire it is still returned
+  and a new one is fetched in the background.
+  """
+  token=_token_cache["token"]
+  remaining=_token_cache["expires_at"] - time.time()
+
+  if token and remaining > TOKEN_REFRESH_MARGIN:
+    return token
+
+  if token and remaining > 0:
+    with _token_lock:
+      start_refresh=not _token_cache["refreshing"]
+      _token_cache["refreshing"]=True
+    if start_refresh:
+      threading.Thread(target=_refresh_token_in_background,daemon=True).start()
+    return token
+
+  with _token_lock:
+    # another thread may have fetched it while we were waiting
+    if _token_cache["token"] and _token_cache["expires_at"] > time.time():
+      return _token_cache["token"]
+    token,expires_at=_request_token()
+    _token_cache["token"]=token
+    _token_cache["expires_at"]=expires_at
+    return token
+
+def refresh_token(rejected_token:str=None)->str:
+  """
+  Drop the cached token after the API refused it and fetch a new one.
+  If another thread already replaced the rejected token, reuse its result.
+  """
+  with _token_lock:
+    if _token_cache["token"] and _token_cache["token"]!=rejected_token:
+      return _token_cache["token"]
+    token,expires_at=_request_token()
+    _token_cache["token"]=token
+    _token_cache["expires_at"]=expires_at
+    return token
+
+def ods_api_request(method:str,url:str,headers:dict=None,retry_unauthorized:bool=True,**kwargs):
+  """
+  Send a request to the ODS API with the cached token.
+  If the API answers 401 the token is renewed and the request is sent once more
+  (unless retry_unauthorized is False, for bodies that cannot be sent twice).
+  """
+  my_token=get_token()
+  my_headers=dict(headers or {})
+  my_headers["authorization"]="Access {}".format(my_token)
+  response=http_sessions.request(method,url,headers=my_headers,verify=False,**kwargs)
+
+  if response.status_code==401:
+    if not retry_unauthorized:
+      refresh_token(my_token)
+      return response
+    my_headers=dict(my_headers,authorization="Access {}".format(refresh_token(my_token)))
+    # rewind the files already read by the first attempt
+    for value in (kwargs.get("files") or {}).values():
+      if isinstance(value,tuple) and len(value)>1 and hasattr(value[1],"seek"):
+        value[1].seek(0)
+    response=http_sessions.request(method,url,headers=my_headers,verify=False,**kwargs)
+
+  return response
+
+########################################################################
+# per operation cache of the /api/loading/symbol answers
+########################################################################
+
+# symbol -> answer of the API, only set inside a loading_symbol_cache block
+_loading_symbol_cache=contextvars.ContextVar("loading_symbol_cache",default=None)
+
+def _loading_symbol_key(my_param:str)->str:
+  return my_param.strip().upper()
+
+@contextmanager
+def loading_symbol_cache():
+  """
+  Inside this block each symbol is read from /api/loading/symbol only once.
+  Nested blocks share the cache of the outermost one.
+  """
+  if _loading_symbol_cache.get() is not None:
+    yield
+    return
+  token=_loading_symbol_cache.set({})
+  try:
+    yield
+  finally:
+    _loading_symbol_cache.reset(token)
+
+def with_loading_symbol_cache(function):
+  """Run the decorated function inside a loading_symbol_cache block."""
+  @functools.wraps(function)
+  def wrapper(*args,**kwargs):
+    with loading_symbol_cache():
+      return function(*args,**kwargs)
+  return wrapper
+
+def invalidate_loading_symbol(my_param:str):
+  """Forget the cached answer of a symbol after its record was changed in ODS."""
+  cache=_loading_symbol_cache.get()
+  if cache is not None:
+    cache.pop(_loading_symbol_key(my_param),None)
+
+########################################################################
+# progress of the long operations (one call per finished unit)
+########################################################################
+
+# function(entry, timings) called for each finished unit, set by the job queue
+_progress_reporter=contextvars.ContextVar("progress_reporter",default=None)
+
+@contextmanager
+def progress_reporter(reporter):
+  """Inside this block report_progress sends each finished unit to reporter."""
+  token=_progress_reporter.set(reporter)
+  try:
+    yield
+  finally:
+    _progress_reporter.reset(token)
+
+def report_progress(entry:dict,timings:dict=None):
+  """Report a finished unit (its report entry and the seconds spent in each stage)."""
+  reporter=_progress_reporter.get()
+  if reporter is None:
+    return
+  try:
+    reporter(entry,{stage:round(seconds,3) for stage,seconds in (timings or {}).items()})
+  except Exception as e:
+    print(f"Error while reporting progress : {e}")
 
 ########################################################################
 # call the API for loading the symbols : /api/loading/symbol
@@ -425,27 +624,27 @@ def get_token()->str:
 
 def ods_get_loading_symbol(my_param:str):
 
-  # get the token
-  my_token=get_token()
-  
+  # reuse the answer already read during this operation
+  cache=_loading_symbol_cache.get()
+  if cache is not None and _loading_symbol_key(my_param) in cache:
+    return copy.deepcopy(cache[_loading_symbol_key(my_param)])
+
   # build the url
   url1=config("BASE_URL") + "api/loading/symbol?s=" + my_param.strip().upper()+"&em=true"
   
   # build the payload
   payload={}
   
-  # build the header
-  headers = {
-          "authorization":  "Access {}".format(my_token),
-          }
-  
   # get the response 
-  response = requests.request("GET", url1, headers=headers, data=payload,verify=False)
+  response = ods_api_request("GET", url1, data=payload)
   
   #need to check if the response is not empty and has more than 1 record (duplicate) in ODS
   # return the response
   #print(f"len of json is {len(response.json())}")
-  return response.json()
+  data=response.json()
+  if cache is not None:
+    cache[_loading_symbol_key(my_param)]=copy.deepcopy(data)
+  return data
 
 ######################################################################################
 # call the API for loading the symbols using search endpoint : /api/loading/search
@@ -453,22 +652,14 @@ def ods_get_loading_symbol(my_param:str):
 
 def ods_get_loading_search(my_param):
 
-  # get the token
-  my_token=get_token()
-  
   # build the url
   url1=config("BASE_URL") + "api/loading/search?k=" + my_param.upper()+"&em=true"
   
   # build the payload
   payload={}
   
-  # build the header
-  headers = {
-          "authorization":  "Access {}".format(my_token),
-          }
-  
   # get the response 
-  response = requests.request("GET", url1, headers=headers, data=payload,verify=False)
+  response = ods_api_request("GET", url1, data=payload)
   
   # return the response
   return response.json()
@@ -483,23 +674,102 @@ def escape_characters(input_string, chars_to_escape):
       input_string = input_string.replace(char, f'\\{char}')
   return input_string
 
-def get_tcodes(subject):
-  query = Query.from_string("150__a:'"+subject.upper()+"'")
-  authset = AuthSet.from_query(query, projection={'035':1,'150':1})
+########################################################################
+# subject <-> tcode resolution (one auth query per list, cached)
+########################################################################
 
-  for auth in authset:
-      val_035a=auth.get_values('035','a')
-      val_035a=''.join([str for str in val_035a if str[0] in {'T', 'P'}] )
-  return val_035a
+TCODE_CACHE_SIZE=int(config("TCODE_CACHE_SIZE", default=4096))
+TCODE_CACHE_TTL=int(config("TCODE_CACHE_TTL", default=24*3600))
 
-def get_subject(tcode):
-    query = Query.from_string("035__a:'"+tcode.upper()+"'") 
-    authset = AuthSet.from_query(query, projection={'035':1,'150':1})
+# subject -> tcode and tcode -> subject, keys in upper case
+_tcodes_cache=TTLCache(TCODE_CACHE_SIZE,TCODE_CACHE_TTL)
+_subjects_cache=TTLCache(TCODE_CACHE_SIZE,TCODE_CACHE_TTL)
+
+def _auth_subfield_in(tag:str,code:str,values:list)->dict:
+  return {f'{tag}.subfields':{'$elemMatch':{'code':code,'value':{'$in':values}}}}
+
+def _auth_tcode(auth)->str:
+  return ''.join([val for val in auth.get_values('035','a') if val[:1] in {'T', 'P'}])
 
+def _auth_subject(auth)->str:
+  return ''.join(auth.get_values('150','a'))
+
+def resolve_tcodes(subjects:list)->dict:
+  """
+  Return the tcode of each subject (upper case key) with one auth query for the subjects not cached.
+  The subjects not found in the thesaurus are not in the result.
+  """
+  keys=list(dict.fromkeys(subject.upper() for subject in subjects))
+  found,missing=_tcodes_cache.get_many(keys)
+
+  if missing:
+    wanted=set(missing)
+    authset=AuthSet.from_query(_auth_subfield_in('150','a',missing), projection={'035':1,'150':1})
     for auth in authset:
-        val_150a=auth.get_values('150','a')
-        val_150a=''.join([str for str in val_150a] )
-    return val_150a
+      tcode=_auth_tcode(auth)
+      for subject in auth.get_values('150','a'):
+        if subject.upper() in wanted:
+          found[subject.upper()]=tcode
+          _tcodes_cache.set(subject.upper(),tcode)
+
+  return found
+
+def resolve_subjects(tcodes:list)->dict:
+  """
+  Return the subject of each tcode (upper case key) with one auth query for the tcodes not cached.
+  The tcodes not found in the thesaurus are not in the result.
+  """
+  keys=list(dict.fromkeys(tcode.upper() for tcode in tcodes))
+  found,missing=_subjects_cache.get_many(keys)
+
+  if missing:
+    wanted=set(missing)
+    authset=AuthSet.from_query(_auth_subfield_in('035','a',missing), projection={'035':1,'150':1})
+    for auth in authset:
+      subject=_auth_subject(auth)
+      for tcode in auth.get_values('035','a'):
+        if tcode.upper() in wanted:
+          found[tcode.upper()]=subject
+          _subjects_cache.set(tcode.upper(),subject)
+
+  return found
+
+def get_tcodes(subject):
+  # KeyError when the subject is unknown
+  return resolve_tcodes([subject])[subject.upper()]
+
+def get_subject(tcode):
+  # KeyError when the tcode is unknown
+  return resolve_subjects([tcode])[tcode.upper()]
+
+# the only fields of the bib records read by the metadata functions
+CDB_FIELDS=['191','091','269','245','991','650']
+CDB_PROJECTION={tag:1 for tag in CDB_FIELDS}
+
+# symbols looked up by one query of get_data_from_cb_bulk
+CDB_BATCH_SIZE=int(config("CDB_BATCH_SIZE", default=100))
+
+def _cb_datamodel(bib,tcodes_found:dict)->dict:
+  document_symbol=bib.get_values('191', 'a')
+  distribution=bib.get_value('091', 'a')
+  area="UNDOC"
+  publication_date=bib.get_value('269','a')
+  release_date=datetime.now().strftime('%d/%m/%y')
+  sessions=' '.join(bib.get_values('191','c'))
+  subjects=""
+  
+  if publication_date !='':
+    try:
+      publication_date=datetime.strptime(publication_date, '%Y-%m-%d').strftime('%Y-%m-%dT%H:%M:%SZ')
+    except:
+      publication_date=datetime.strptime(publication_date[0:4], '%Y').strftime('%Y-%m-%dT%H:%M:%SZ')
+  title_en=bib.get_value('245', 'a')+" "+bib.get_value('245', 'b')+" "+bib.get_value('245', 'c')
+  #print(f'title_en is {title_en}')
+  agendas=' '.join(bib.get_values('991','b'))
+  # KeyError when a subject is not in the thesaurus
+  tcodes=[tcodes_found[subject.upper()] for subject in bib.get_values('650','a')]
+  return {"symbol":document_symbol[0],"distribution":distribution,"area": area, "publication_date":publication_date, 
+          "release_date":release_date, "sessions":sessions, "title":title_en, "agendas":agendas, "subjects":subjects, "tcodes":tcodes}
 
 def get_data_from_cb(symbols):
   
@@ -512,38 +782,10 @@ def get_data_from_cb(symbols):
     query = Query.from_string("191__a:'"+symbol+"'") 
     #print(f'query is 191__a:'''{symbol}'')
     print(query.to_json())
-    document_symbol=""
-    distribution=""
-    area="UNDOC"
-    publication_date=""
-    release_date=datetime.now().strftime('%d/%m/%y')
-    sessions=""
-    title_en=""
-    agendas=""
-    subjects=""
-    tcodes=""
-
-    for bib in BibSet.from_query(query):
-        document_symbol=bib.get_values('191', 'a')
-        distribution=bib.get_value('091', 'a')
-        publication_date=bib.get_value('269','a')
-        release_date=datetime.now().strftime('%d/%m/%y')
-        sessions=' '.join(bib.get_values('191','c'))
-        
-        if publication_date !='':
-          try:
-            publication_date=datetime.strptime(publication_date, '%Y-%m-%d').strftime('%Y-%m-%dT%H:%M:%SZ')
-          except:
-            publication_date=datetime.strptime(publication_date[0:4], '%Y').strftime('%Y-%m-%dT%H:%M:%SZ')
-        title_en=bib.get_value('245', 'a')+" "+bib.get_value('245', 'b')+" "+bib.get_value('245', 'c')
-        #print(f'title_en is {title_en}')
-        agendas=' '.join(bib.get_values('991','b'))
-        #tcodes=' '.join([get_tcodes(subject) for subject in bib.get_values('650','a')])                         
-        tcodes=[get_tcodes(subject) for subject in bib.get_values('650','a')]                    
-        datamodel={"symbol":document_symbol[0],"distribution":distribution,"area": area, "publication_date":publication_date, 
-                "release_date":release_date, "sessions":sessions, "title":title_en, "agendas":agendas, "subjects":subjects, "tcodes":tcodes}
-        
-        lst.append(datamodel)
+
+    for bib in BibSet.from_query(query, projection=CDB_PROJECTION):
+        tcodes_found=resolve_tcodes(bib.get_values('650','a'))
+        lst.append(_cb_datamodel(bib,tcodes_found))
         #print(f"the list is {lst}")
     return lst
   
@@ -551,6 +793,109 @@ def get_data_from_cb(symbols):
 
     return lst
 
+def get_data_from_cb_bulk(symbols:list)->dict:
+  """
+  Metadata of many symbols with one projected query per CDB_BATCH_SIZE symbols.
+
+  Args:
+      symbols: document symbols as typed by the user
+
+  Returns:
+      dict: stripped symbol -> list of datamodels, the same list get_data_from_cb returns
+  """
+  wanted=list(dict.fromkeys(symbol.strip() for symbol in symbols if symbol.strip()))
+  bibs={symbol:[] for symbol in wanted}
+
+  for i in range(0,len(wanted),CDB_BATCH_SIZE):
+    batch=wanted[i:i+CDB_BATCH_SIZE]
+    query={'191.subfields':{'$elemMatch':{'code':'a','value':{'$in':batch}}}}
+    try:
+      for bib in BibSet.from_query(query, projection=CDB_PROJECTION):
+        for symbol in set(bib.get_values('191','a')):
+          if symbol in bibs:
+            bibs[symbol].append(bib)
+    except Exception as e:
+      print(f"Error while reading the symbols from CDB : {e}")
+
+  # all the subjects of all the records in one thesaurus query
+  try:
+    tcodes_found=resolve_tcodes([subject for found in bibs.values() for bib in found for subject in bib.get_values('650','a')])
+  except Exception as e:
+    print(f"Error while resolving the subjects from CDB : {e}")
+    tcodes_found={}
+
+  result={}
+  for symbol,found in bibs.items():
+    if not found:
+      # not an exact match, let the query of get_data_from_cb decide
+      result[symbol]=get_data_from_cb(symbol)
+      continue
+    result[symbol]=[]
+    for bib in found:
+      try:
+        result[symbol].append(_cb_datamodel(bib,tcodes_found))
+      except Exception as e:
+        # a subject not in the thesaurus for example, the other records of the symbol are kept
+        print(f"Error while reading a record of {symbol} from CDB : {e}")
+  return result
+
+########################################################################
+# titles of the symbols, read in batches and cached
+########################################################################
+
+TITLE_CACHE_SIZE=int(config("TITLE_CACHE_SIZE", default=10000))
+TITLE_CACHE_TTL=int(config("TITLE_CACHE_TTL", default=3600))
+
+# a symbol without record is looked up again after this time
+TITLE_CACHE_NEGATIVE_TTL=int(config("TITLE_CACHE_NEGATIVE_TTL", default=300))
+
+_titles_cache=TTLCache(TITLE_CACHE_SIZE,TITLE_CACHE_TTL)
+
+def _bib_title(bib)->str:
+  """Title of a record : 245 $a, $b and $c joined."""
+  title=bib.get_value('245','a')
+  for code in ['b','c']:
+    part=bib.get_value('245',code)
+    if part!="":
+      title=title+" "+part
+  return title
+
+def resolve_titles(symbols:list)->dict:
+  """
+  Return the title of each symbol with one projected query per CDB_BATCH_SIZE symbols not cached.
+  The symbols without record are not in the result.
+  """
+  wanted=list(dict.fromkeys(symbol for symbol in symbols if symbol))
+  found,missing=_titles_cache.get_many(wanted)
+
+  titles={}
+  for i in range(0,len(missing),CDB_BATCH_SIZE):
+    batch=missing[i:i+CDB_BATCH_SIZE]
+    try:
+      for bib in BibSet.from_query({"symbol":{"$in":batch}}, projection={'191':1,'245':1}):
+        for symbol in bib.get_values('191','a'):
+          if symbol in batch and symbol not in titles:
+            titles[symbol]=_bib_title(bib)
+    except Exception as e:
+      print(f"Error while reading the titles from CDB : {e}")
+      continue
+
+    # a symbol may be known by another field than 191 $a, look it up alone
+    for symbol in batch:
+      if symbol not in titles:
+        for bib in BibSet.from_query({"symbol":symbol}, projection={'191':1,'245':1}):
+          titles[symbol]=_bib_title(bib)
+          break
+
+    for symbol in batch:
+      if symbol in titles:
+        _titles_cache.set(symbol,titles[symbol])
+      else:
+        _titles_cache.set(symbol,None,ttl=TITLE_CACHE_NEGATIVE_TTL)
+
+  titles.update(found)
+  return {symbol:title for symbol,title in titles.items() if title is not None}
+
 # def get_data_from_cb(symbols):
   
 #   lst=[]
@@ -621,20 +966,23 @@ def get_data_from_cb(symbols):
 # create / update metadata  
 ########################################################################
 
-def ods_create_update_metadata(my_symbol,prefix_jobnumber):
+@with_loading_symbol_cache
+def ods_create_update_metadata(my_symbol,prefix_jobnumber,cb_data=None):
+  """cb_data : datamodels of the symbol already read with get_data_from_cb_bulk"""
   
   # a refactoring should be done to avoid DRY
   my_collection = my_database["ods_jobnumber_collection"]
   # call the api to know if this symbol exists already (1 if the symbol exists 0 otherwise)
-  my_matche=ods_get_loading_symbol(my_symbol)["body"]["meta"]["matches"]
+  my_loading_symbol=ods_get_loading_symbol(my_symbol)
+  my_matche=my_loading_symbol["body"]["meta"]["matches"]
   print(f'my_matche is {my_matche}')
   
-  if ods_get_loading_symbol(my_symbol)["body"]["data"]:
-    my_job_numbers=ods_get_loading_symbol(my_symbol)["body"]["data"][0]["job_numbers"]
+  if my_loading_symbol["body"]["data"]:
+    my_job_numbers=my_loading_symbol["body"]["data"][0]["job_numbers"]
 
   if my_matche==0: # the symbol is new we can create 
     # get the data from central DB
-    datamodel=get_data_from_cb(my_symbol)
+    datamodel=cb_data if cb_data is not None else get_data_from_cb(my_symbol)
     
     if len(datamodel)>0:
       
@@ -653,14 +1001,6 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
       my_tcodes=[]
       my_tcodes=datamodel[0]["tcodes"]
 
-      # get the token
-      my_token=get_token()
-
-      # definition of the header
-      headers = {
-              "authorization":  "Access {}".format(my_token),
-              }
-          
       # build the url
       url = config("BASE_URL") + "api/loading/symbol"
 
@@ -671,9 +1011,7 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
 
       # setting the jubnumbers for each language dynamycally
       jobnumbers=[]
-      counter=0
-      for counter in range(7):
-        recup=get_new_job_number(my_symbol,LANGUAGES[counter],prefix_jobnumber)
+      for recup in get_new_job_numbers(my_symbol,LANGUAGES,prefix_jobnumber):
         print(recup)
         jobnumbers.append(recup["jobnumber_value"])
 
@@ -737,7 +1075,8 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
         'data': (None,json.dumps(payload),'application/json'),
       }
       #print(f"data sent is {json.dumps(payload)} /// ")
-      res = requests.post(url, headers=headers,files=files,verify=False)
+      res = ods_api_request("POST", url, files=files)
+      invalidate_loading_symbol(my_symbol)
       
       data=res.json()
       #print(f"creating metadata data is {data} and the url is {url}")
@@ -755,8 +1094,8 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
 
   elif my_matche==1 : # the symbol is not new it's an update
     # get the data from central DB
-    datamodel=get_data_from_cb(my_symbol)
-    my_release_dates=ods_get_loading_symbol(my_symbol)["body"]["data"][0]["release_dates"]
+    datamodel=cb_data if cb_data is not None else get_data_from_cb(my_symbol)
+    my_release_dates=my_loading_symbol["body"]["data"][0]["release_dates"]
     #print(my_release_dates)
     for i in range(7):
       if my_release_dates[i]=="0001-01-01T00:00:00Z" or my_release_dates[i]=="1900-01-01T00:00:00Z":
@@ -784,14 +1123,6 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
       my_tcodes=[]
       my_tcodes=datamodel[0]["tcodes"]
       
-      # get the token
-      my_token=get_token()
-
-      # definition of the header
-      headers = {
-              "authorization":  "Access {}".format(my_token),
-              }
-          
       # build the url
       url = config("BASE_URL") + "api/loading/symbol"
 
@@ -815,13 +1146,14 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
       # check missing values and add missing values generating job numbers
       my_language=0
       
+      #if jobnumber doesn't exist in ODS we will generate the next ones avaialable in one block
+      missing=[i for i in range(len(my_final_job_numbers)) if my_final_job_numbers[i]==""]
+      for i,recup in zip(missing,get_new_job_numbers(my_symbol,[LANGUAGES[i] for i in missing],prefix_jobnumber)):
+        my_final_job_numbers[i]=recup["jobnumber_value"]
+      
       for i in range(len(my_final_job_numbers)):
-        #if jobnumber doesn't exist in ODS we will generate a next one avaialable
-        if my_final_job_numbers[i]=="":
-          recup=get_new_job_number(my_symbol,LANGUAGES[i],prefix_jobnumber)
-          my_final_job_numbers[i]=recup["jobnumber_value"]
-          # if the jobnumbers exist in the ODS we will reuse it and store that job number from the ODS into our collection of jobnumbers
-        else:
+        # if the jobnumbers exist in the ODS we will reuse it and store that job number from the ODS into our collection of jobnumbers
+        if i not in missing:
           print(f'job number for this update action for {LANGUAGES[i]} are {my_final_job_numbers[i]}')
           data1 = {
                   "created_date": datetime.now(), 
@@ -897,7 +1229,8 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
         'data': (None,json.dumps(payload),'application/json'),
       }
       #print(f"data sent is {json.dumps(payload)} /// ")
-      res = requests.post(url, headers=headers,files=files,verify=False)
+      res = ods_api_request("POST", url, files=files)
+      invalidate_loading_symbol(my_symbol)
       data=res.json()
       #print(f"updating metadata data is {data} and the url is {url}")
       if data["status"]==-1:
@@ -922,6 +1255,24 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
     result["update"]=False
     return result
 
+def create_update_summary(docsymbol,result)->dict:
+  """Text displayed for the result of ods_create_update_metadata"""
+  text="-1 this is default value"
+  if (result["status"]== 0 and result["update"]==False):
+    text="Metadata not found in the Central DB/ME"
+  if (result["status"]== -1 and result["update"]==False):
+    text=result["message"]
+  if (result["status"]== 1 and result["update"]==False) :
+    text="Metadata created!!!"
+  if (result["status"]== 2 and result["update"]==True) :
+    text="Metadata updated!!!"
+  if (result["status"]==3) :
+    text="There is a duplicate symbol in ODS!!!"
+  return {
+    "docsymbol":docsymbol,
+    "text":text
+    }
+
 
 #######################################################################
 # Update one metadata field
@@ -929,15 +1280,6 @@ def ods_create_update_metadata(my_symbol,prefix_jobnumber):
 
 def update_one_metadata(my_symbol, fieldName,fieldValue, lang):
 
-  # get the token
-  my_token=get_token()
-
-
-  # definition of the header
-  headers = {
-          "authorization":  "Access {}".format(my_token),
-          }
-
   # creation the data
   payload = {
         "symbol":my_symbol,
@@ -953,7 +1295,8 @@ def update_one_metadata(my_symbol, fieldName,fieldValue, lang):
 
   # building the request
 
-  response = requests.patch(url,headers=headers,data=payload,verify=False)
+  response = ods_api_request("PATCH", url, data=payload)
+  invalidate_loading_symbol(my_symbol)
   #print(f'path result is{response.json()}')
   return response.json()
 
@@ -961,38 +1304,18 @@ def update_one_metadata(my_symbol, fieldName,fieldValue, lang):
 # Send file to ODS
 ########################################################################
 
-def ods_file_upload_simple_file(my_symbol,my_distribution,my_jobnumber,my_language,my_path, my_release_date):
-  
-  # get the token
-  my_token=get_token()
-
-
-  # definition of the header
-  headers = {
-          "authorization":  "Access {}".format(my_token),
-          }
-
-  # creation the data
-  payload = {
+def _file_upload_payload(my_symbol,my_distribution,my_jobnumber,my_language)->dict:
+  return {
         "symbol":my_symbol,
         "area": "UNDOC", 
         "distribution": my_distribution, 
         "perLanguage": {f"{my_language}": { "jobNumber": f"{my_jobnumber}"} }
       }
-  # creation of the file dict
-  files={
-    'data': (None, json.dumps(payload), 'application/json'),
-    f'{my_jobnumber}.pdf':(f'{my_jobnumber}.pdf',open(my_path,'rb'),'application/octet-stream') 
-  }
 
-  # build the url
-  #url=config("BASE_URL") + "api/loading/file"
-  url=base_url + "api/loading/file"
-
-  # building the request
-  #print(f'payload is {payload}')
+def _after_file_upload(response,my_symbol,my_jobnumber,my_language,my_release_date)->dict:
+  """Set the release date of the language once its first file is in ODS."""
+  invalidate_loading_symbol(my_symbol)
   response1={}
-  response = requests.post(url,headers=headers,files=files,verify=False)
   print(f'Status for upload of file with JN {my_jobnumber} is {response.json()["status"]}')
   #print(response.json())
   if my_release_date=="0001-01-01T00:00:00Z" or my_release_date=="1900-01-01T00:00:00Z":
@@ -1002,6 +1325,99 @@ def ods_file_upload_simple_file(my_symbol,my_distribution,my_jobnumber,my_langua
     print(f'patch update is {response1}')
   return response.json()
 
+def ods_file_upload_simple_file(my_symbol,my_distribution,my_jobnumber,my_language,my_path, my_release_date):
+  
+  # creation the data
+  payload = _file_upload_payload(my_symbol,my_distribution,my_jobnumber,my_language)
+
+  # build the url
+  #url=config("BASE_URL") + "api/loading/file"
+  url=base_url + "api/loading/file"
+
+  with open(my_path,'rb') as my_file:
+    # creation of the file dict
+    files={
+      'data': (None, json.dumps(payload), 'application/json'),
+      f'{my_jobnumber}.pdf':(f'{my_jobnumber}.pdf',my_file,'application/octet-stream') 
+    }
+
+    # building the request
+    #print(f'payload is {payload}')
+    response = ods_api_request("POST", url, files=files)
+
+  return _after_file_upload(response,my_symbol,my_jobnumber,my_language,my_release_date)
+
+########################################################################
+# Stream a file from CDB to ODS without the temp folder
+########################################################################
+
+# stream the CDB files straight into the ODS upload (false : go through the temp folder)
+SEND_FILES_STREAMING=str(config("SEND_FILES_STREAMING", default="true")).lower()=="true"
+
+# size of the chunks read from CDB and written to ODS
+STREAM_CHUNK_SIZE=int(config("STREAM_CHUNK_SIZE", default=256*1024))
+
+class MultipartStream:
+  """
+  multipart/form-data body with the json data part followed by one file part
+  whose content is pulled chunk by chunk from an iterator, so only one chunk
+  is held in memory. When the size of the file is known the body has a length
+  and is sent with a Content-Length header, otherwise with chunked encoding.
+  """
+
+  def __init__(self,data:str,file_field:str,file_name:str,chunks,file_size:int=None):
+    boundary=uuid.uuid4().hex
+    self.content_type=f"multipart/form-data; boundary={boundary}"
+    self._head=(f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="data"\r\n'
+                f'Content-Type: application/json\r\n\r\n'
+                f'{data}\r\n'
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{file_field}"; filename="{file_name}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n').encode("utf-8")
+    self._tail=f'\r\n--{boundary}--\r\n'.encode("utf-8")
+    self._chunks=chunks
+    self._length=0 if file_size is None else len(self._head)+file_size+len(self._tail)
+
+  def __len__(self):
+    # 0 lets requests fall back to chunked encoding
+    return self._length
+
+  def __iter__(self):
+    yield self._head
+    for chunk in self._chunks:
+      if chunk:
+        yield chunk
+    yield self._tail
+
+def ods_file_upload_stream(my_symbol,my_distribution,my_jobnumber,my_language,source_response, my_release_date, reopen_source=None):
+  """
+  Same as ods_file_upload_simple_file but the content of the file is read
+  from the streamed CDB response while it is uploaded.
+  A streamed body cannot be sent twice : when ODS refuses the token, the token is renewed and
+  the file is read again from the response returned by reopen_source, then uploaded once more.
+  """
+  payload = _file_upload_payload(my_symbol,my_distribution,my_jobnumber,my_language)
+  url=base_url + "api/loading/file"
+
+  def upload(source):
+    # the announced size is only usable when the body is not re-encoded
+    file_size=None
+    if source.headers.get("Content-Length") and source.headers.get("Content-Encoding","identity")=="identity":
+      file_size=int(source.headers["Content-Length"])
+
+    body=MultipartStream(json.dumps(payload),f'{my_jobnumber}.pdf',f'{my_jobnumber}.pdf',
+                         source.iter_content(chunk_size=STREAM_CHUNK_SIZE),file_size)
+    return ods_api_request("POST", url, headers={"Content-Type":body.content_type}, data=body, retry_unauthorized=False)
+
+  response = upload(source_response)
+  if response.status_code==401 and reopen_source is not None:
+    with reopen_source() as source:
+      if source.status_code==200:
+        response = upload(source)
+
+  return _after_file_upload(response,my_symbol,my_jobnumber,my_language,my_release_date)
+
 
 def get_data_from_undl(docsymbol):
   
@@ -1020,7 +1436,7 @@ def get_data_from_undl(docsymbol):
   agendas=""
   subjects=""
 
-  for bib in BibSet.from_query(query):
+  for bib in BibSet.from_query(query, projection=CDB_PROJECTION):
     if docsymbol==bib.get_value('191', 'a'):
       document_symbol=bib.get_value('191', 'a')
       distribution=bib.get_value('091', 'a')
@@ -1038,6 +1454,92 @@ def get_data_from_undl(docsymbol):
 ####### Function to download file ######################################
 ########################################################################
 
+# number of languages of a symbol transferred at the same time
+SEND_FILES_WORKERS=int(config("SEND_FILES_WORKERS", default=len(LANGUAGES)))
+
+def send_language_file_to_ods(docsymbol,document_symbol,distribution,language,my_jobnumber,release_date,path):
+  """
+  Download the file of one language from CDB and send it to ODS, then report the unit.
+  Returns the report entry and the job number used ("" when it was not used).
+  """
+  start=time.time()
+  timings={}
+  entry,used_jobnumber=_send_language_file_to_ods(docsymbol,document_symbol,distribution,language,my_jobnumber,release_date,path,timings)
+  timings["total"]=time.time()-start
+  report_progress(entry,timings)
+  return entry,used_jobnumber
+
+def _send_language_file_to_ods(docsymbol,document_symbol,distribution,language,my_jobnumber,release_date,path,timings):
+  filename = document_symbol.replace("/", "_") + f"-{language}.pdf"
+  filepath = Path(os.path.join(path, filename))
+
+  try:
+    # getting the file
+    stage=time.time()
+    f = File.latest_by_identifier_language(Identifier('symbol', document_symbol), f'{language}')
+    timings["cdb_lookup"]=time.time()-stage
+
+    if f is None:
+      return {
+              "filename":filename,
+              "docsymbol":docsymbol,
+              "language":language,
+              "jobnumber":"",
+              "result":"file not found in ME/CDB!"
+              },""
+
+    uri = f.uri
+    recup1={"status":0}
+
+    if SEND_FILES_STREAMING:
+      # pipe the CDB response straight into the ODS upload
+      if my_jobnumber!="":
+        stage=time.time()
+        open_source=lambda: http_sessions.get("https://"+uri, stream=True)
+        with open_source() as response:
+          if response.status_code==200:
+            recup1=ods_file_upload_stream(docsymbol,distribution,my_jobnumber,language,response, release_date, reopen_source=open_source)
+        timings["transfer"]=time.time()-stage
+    else:
+      stage=time.time()
+      response = http_sessions.get("https://"+uri, stream=True)
+
+      # download the file on the temp folder
+      filepath.parent.mkdir(parents=True, exist_ok=True)
+      with open(filepath, 'wb') as file:
+          for chunk in response.iter_content(chunk_size=1024):
+              if chunk:
+                  file.write(chunk)
+      timings["download"]=time.time()-stage
+
+      # send the file to ODS
+      if my_jobnumber!="":
+        stage=time.time()
+        recup1=ods_file_upload_simple_file(docsymbol,distribution,my_jobnumber,language,filepath, release_date)
+        timings["upload"]=time.time()-stage
+
+  except Exception as e:
+    print(f'Error while sending {filename} to ODS : {e}')
+    recup1={"status":0}
+
+  if recup1["status"]==1:
+    return {
+            "filename":filename,
+            "docsymbol":docsymbol,
+            "language":language,
+            "jobnumber":my_jobnumber,
+            "result":"downloaded and sent successfully!!!"
+            },my_jobnumber
+
+  return {
+          "filename":filename,
+          "docsymbol":docsymbol,
+          "language":language,
+          "jobnumber":"",
+          "result":"not sent to ODS!!!"
+          },""
+
+@with_loading_symbol_cache
 def download_file_and_send_to_ods(docsymbol):
     
   # define the report list
@@ -1060,13 +1562,6 @@ def download_file_and_send_to_ods(docsymbol):
     used_jobnumbers=[]
     recup_job_numbers=[]
     
-    # setting a default for *nix systems should be safer than testing explicitly
-    # for the platform name
-    path="./ods/tmp"
-    
-    if platform.os.name in ['windows','nt'] :
-      path='ods\\temp'
-    
     # Get job numbers from ODS for all languages
     try:
         result=ods_get_loading_symbol(docsymbol)
@@ -1076,131 +1571,32 @@ def download_file_and_send_to_ods(docsymbol):
         recup_job_numbers=[''] * 7
         release_dates=[''] * 7
     
-    # download the files in all languages
-    for bib in BibSet.from_query(query):
-      my_jobnumber=""
-      document_symbol=bib.get_value('191', 'a')
-      
-      # fixing some issues with the regex returning values 
-      time0=time.time()
-      if len(document_symbol)==len(docsymbol):
-        distribution=bib.get_value('091', 'a')
-        for language in LANGUAGES : 
-          
-          filename = document_symbol.replace("/", "_") + f"-{language}.pdf"  
+    # download the files in all languages, in a scratch folder owned by this operation
+    with scratch.operation_dir("send") as path:
+      for bib in BibSet.from_query(query):
+        document_symbol=bib.get_value('191', 'a')
         
-          #if platform.os.name == 'linux':
-          #  path='ods/temp'
-            
-          
-          filepath = Path(os.path.join(path, filename))
-          filepath.parent.mkdir(parents=True, exist_ok=True)
-          timeFile=time.time()
-          # getting the file
-          f = File.latest_by_identifier_language(Identifier('symbol', document_symbol), f'{language}')
-
-          if f is not None:
-            uri = f.uri
-            response = requests.get("https://"+uri, stream=True)
-
-            # download the file on the temp folder
-            with open(filepath, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        file.write(chunk)
-            #print(f'time to download {filename} from CDB is {time.time()-timeFile}')
-          # write the report and send the file to ODS
-          recup1={}
-          time2=time.time()
-          if f is not None:
-            #print(f'jns {recup_job_numbers}')        
-            if language=="AR":
-              my_jobnumber=recup_job_numbers[0]
-              if my_jobnumber!="":
-                release_date=release_dates[0]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[0],language,filepath, release_date)
-                #print(f' upload of the first file to ODS in {time.time()-time2}')
-                #print(f'  elapsed time for upload of the first file in {time.time()-time0}')
-              else:
-                recup1["status"]=0
-
-            if language=="ZH":
-              my_jobnumber=recup_job_numbers[1]
-              if my_jobnumber!="":
-                release_date=release_dates[1]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[1],language,filepath, release_date)
-              else:
-                recup1["status"]=0
-
-            if language=="EN":
-              my_jobnumber=recup_job_numbers[2]
-              if my_jobnumber!="":
-                release_date=release_dates[2]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[2],language,filepath, release_date)
-                #print(f' upload of the third file to ODS in {time.time()-time2}')
-                #print(f'  elapsed time for upload of the third file in {time.time()-time0}')
-              else:
-                recup1["status"]=0
-            if language=="FR":
-              my_jobnumber=recup_job_numbers[3]
-              if my_jobnumber!="":
-                release_date=release_dates[3]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[3],language,filepath, release_date)
-              else:
-                recup1["status"]=0
-            if language=="RU":
-              my_jobnumber=recup_job_numbers[4]
-              if my_jobnumber!="":
-                release_date=release_dates[4]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[4],language,filepath, release_date)
-              else:
-                recup1["status"]=0
-            if language=="ES":
-              my_jobnumber=recup_job_numbers[5]
-              if my_jobnumber!="":
-                release_date=release_dates[5]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[5],language,filepath, release_date)
-              else:
-                recup1["status"]=0  
-            if language=="DE":
-              my_jobnumber=recup_job_numbers[6]
-              if my_jobnumber!="":
-                release_date=release_dates[6]
-                recup1=ods_file_upload_simple_file(docsymbol,distribution,recup_job_numbers[6],language,filepath, release_date)    
-              else:
-                recup1["status"]=0
-
-            if recup1["status"]==1:
-              used_jobnumbers.append(my_jobnumber)    
-              report.append({
-                              "filename":filename,
-                              "docsymbol":docsymbol,
-                              "language":language,
-                              "jobnumber":my_jobnumber,
-                              "result":"downloaded and sent successfully!!!"
-                              })
-              
-              # time.sleep(3)
-            else:
-              report.append({
-                            "filename":filename,
-                            "docsymbol":docsymbol,
-                            "language":language,
-                            "jobnumber":"",
-                            "result":"not sent to ODS!!!"
-                          })
-            
-          else :
-              report.append({
-                          "filename":filename,
-                          "docsymbol":docsymbol,
-                          "language":language,
-                          "jobnumber":"",
-                          "result":"file not found in ME/CDB!"
-                          })
-          #time.sleep(3)
-          time2=time.time()
-      print(f'Time to upload all files for {docsymbol} is {time.time()-time0} seconds')
+        # fixing some issues with the regex returning values 
+        time0=time.time()
+        if len(document_symbol)==len(docsymbol):
+          distribution=bib.get_value('091', 'a')
+
+          # transfer the languages in parallel, the report keeps the order of LANGUAGES
+          with ThreadPoolExecutor(max_workers=SEND_FILES_WORKERS) as executor:
+            futures=[]
+            for i, language in enumerate(LANGUAGES):
+              my_jobnumber=recup_job_numbers[i] if i < len(recup_job_numbers) else ""
+              release_date=release_dates[i] if i < len(release_dates) else ""
+              futures.append(executor.submit(contextvars.copy_context().run,send_language_file_to_ods,
+                                             docsymbol,document_symbol,distribution,language,my_jobnumber,release_date,path))
+
+            for future in futures:
+              entry,used_jobnumber=future.result()
+              report.append(entry)
+              if used_jobnumber!="":
+                used_jobnumbers.append(used_jobnumber)
+
+        print(f'Time to upload all files for {docsymbol} is {time.time()-time0} seconds')
     
     # If no files were processed but symbol exists in ODS, create entries for all languages
     if not report:
@@ -1214,20 +1610,13 @@ def download_file_and_send_to_ods(docsymbol):
                 "jobnumber": jobnumber,
                 "result": "Symbol exists in ODS but no files found in CDB to download"
             })
+            report_progress(report[-1])
     
     # release not used jobnumbers
     not_used_jobnumbers=list(set(recup_job_numbers) - set(used_jobnumbers))
     for jb in not_used_jobnumbers:
       release_job_number(jb)
 
-    # clean temp folder
-    files = os.listdir(path)
-    
-    # Iterate over each file and delete it
-    for file in files:
-        file_path = os.path.join(path, file)
-        os.remove(file_path)
-        
   else :
 
     report.append({
@@ -1237,14 +1626,136 @@ def download_file_and_send_to_ods(docsymbol):
                 "jobnumber":"",
                 "result":"docsymbol does not exist!!!"
                 })
+    report_progress(report[-1])
 
   # return the report
   return report
 
+########################################################################
+# cache of the symbol variant resolving on documents.un.org
+########################################################################
+
+VARIANT_CACHE_SIZE = int(config("VARIANT_CACHE_SIZE", default=10000))
+VARIANT_CACHE_TTL = int(config("VARIANT_CACHE_TTL", default=30*24*3600))
+
+# a symbol found in no variant may be published later
+VARIANT_CACHE_NEGATIVE_TTL = int(config("VARIANT_CACHE_NEGATIVE_TTL", default=3600))
+
+# cached value of a symbol found in no variant
+NO_VARIANT = "none"
+
+_variant_cache = TTLCache(VARIANT_CACHE_SIZE, VARIANT_CACHE_TTL)
+
+def _variant_collection():
+    # the expired entries are removed by the TTL index of ods.indexes
+    return my_database["ods_actions_variant_cache_collection"]
+
+def _variant_key(docsymbol, lang):
+    return f"{docsymbol.strip()}|{lang.lower()}"
+
+def get_symbol_variant(docsymbol, lang):
+    """
+    Return the variant suffix known to resolve for the symbol and language,
+    NO_VARIANT when none did, or None when it is not known.
+    """
+    key = _variant_key(docsymbol, lang)
+    suffix = _variant_cache.get(key)
+    if suffix is not None:
+        return suffix
+    
+    try:
+        found = _variant_collection().find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+    except Exception as e:
+        print(f"Error while reading the variant cache : {e}")
+        return None
+    
+    if found is None:
+        return None
+    ttl = (found["expires_at"] - datetime.utcnow()).total_seconds()
+    _variant_cache.set(key, found["suffix"], ttl=ttl)
+    return found["suffix"]
+
+def set_symbol_variant(docsymbol, lang, suffix):
+    """Remember the variant suffix that resolved (or NO_VARIANT) in this worker and in Mongo."""
+    key = _variant_key(docsymbol, lang)
+    ttl = VARIANT_CACHE_NEGATIVE_TTL if suffix == NO_VARIANT else VARIANT_CACHE_TTL
+    _variant_cache.set(key, suffix, ttl=ttl)
+    try:
+        _variant_collection().update_one(
+            {"_id": key},
+            {"$set": {"suffix": suffix, "expires_at": datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True)
+    except Exception as e:
+        print(f"Error while saving the variant cache : {e}")
+
+def forget_symbol_variant(docsymbol, lang):
+    key = _variant_key(docsymbol, lang)
+    _variant_cache.pop(key)
+    try:
+        _variant_collection().delete_one({"_id": key})
+    except Exception as e:
+        print(f"Error while cleaning the variant cache : {e}")
+
 ########################################################################
 # Download file from ODS
 ########################################################################
 
+# size of the buffer used to write a file downloaded from ODS
+DOWNLOAD_CHUNK_SIZE = int(config("DOWNLOAD_CHUNK_SIZE", default=64*1024))
+
+# Base URL for ODS file access
+ODS_ACCESS_URL = "https://documents.un.org/api/symbol/access?s={symbol}&t=pdf&l={lang}"
+
+# Symbol variants known by documents.un.org, in order of preference
+SYMBOL_VARIANTS = ["", "(OR)"]
+
+def _variant_url(docsymbol, lang, suffix):
+    # Encode the symbol for URL (encode slashes, dots, etc.)
+    encoded_symbol = urllib.parse.quote(f"{docsymbol.strip()}{suffix}", safe="")
+    return ODS_ACCESS_URL.format(lang=lang, symbol=encoded_symbol)
+
+def _open_pdf(url):
+    """
+    Send the request of url and return (response, missing), the response when its headers
+    announce a PDF, the body is not read yet. Otherwise the response is None and missing tells
+    whether ODS answered that there is no PDF (404, or another content) rather than failed.
+    """
+    try:
+        response = http_sessions.get(url, timeout=10, verify=False, stream=True)
+    except Exception:
+        return None, False
+    if response.status_code == 200 and response.headers.get("Content-Type", "").startswith("application/pdf"):
+        return response, False
+    response.close()
+    return None, response.status_code in (200, 404)
+
+def _probe_variants(docsymbol, lang):
+    """
+    Request all the symbol variants at the same time.
+    Returns the suffix and the open response of the preferred variant serving a PDF, or (None, None),
+    and whether every variant answered that it has no PDF.
+    """
+    with ThreadPoolExecutor(max_workers=len(SYMBOL_VARIANTS)) as executor:
+        answers = list(executor.map(lambda suffix: _open_pdf(_variant_url(docsymbol, lang, suffix)), SYMBOL_VARIANTS))
+    
+    chosen = (None, None)
+    for suffix, (response, _) in zip(SYMBOL_VARIANTS, answers):
+        if response is None:
+            continue
+        if chosen[1] is None:
+            chosen = (suffix, response)
+        else:
+            response.close()
+    return chosen[0], chosen[1], all(missing for _, missing in answers)
+
+def _save_pdf(response, path):
+    """Write the body of an open response into path with a fixed size buffer."""
+    with response:
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+
 def download_file_from_ods(docsymbol, language):
     """
     Download a PDF file from ODS for a given document symbol and language.
@@ -1256,54 +1767,59 @@ def download_file_from_ods(docsymbol, language):
     Returns:
         dict: A dictionary with 'status', 'filepath', and 'message' keys
     """
-    # Base URL for ODS file access
-    URL = "https://documents.un.org/api/symbol/access?s={symbol}&t=pdf&l={lang}"
-    
     # Normalize language to lowercase
     lang = language.lower()
     
-    # Setup output directory using temp_01 to avoid confusion with send to ODS process
-    if platform.system() in ['Windows', 'nt']:
-        output_dir = 'ods\\temp_01'
-    else:
-        output_dir = './ods/tmp_01'
+    # Save using original symbol (no (OR)) for filename
+    safe_name = docsymbol.strip().replace("/", "_")
+    filename = f"{safe_name}-{lang.upper()}.pdf"
     
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
+    # Reuse the file if it was downloaded recently
+    filepath = scratch.recent_download(filename)
+    if filepath:
+        return {
+            "status": 1,
+            "filepath": filepath,
+            "filename": filename,
+            "language": language.upper(),
+            "message": f"File reused from a recent download: {filename}"
+        }
     
-    # Try symbol variants
-    tried_variants = [docsymbol.strip(), f"{docsymbol.strip()}(OR)"]
+    # Go straight to the variant that resolved last time
+    suffix = get_symbol_variant(docsymbol, lang)
     
-    for sym_variant in tried_variants:
-        # Encode the symbol for URL (encode slashes, dots, etc.)
-        encoded_symbol = urllib.parse.quote(sym_variant, safe="")
-        url = URL.format(lang=lang, symbol=encoded_symbol)
-        
-        try:
-            response = requests.get(url, timeout=10, verify=False)
+    if suffix != NO_VARIANT:
+        # Write in a private folder then move the finished file to the download folder (temp_01)
+        with scratch.operation_dir("download") as work_dir, http_sessions.host_slot(ODS_ACCESS_URL):
+            response = None
+            if suffix is not None:
+                response, missing = _open_pdf(_variant_url(docsymbol, lang, suffix))
+                if missing:
+                    forget_symbol_variant(docsymbol, lang)
             
-            if response.status_code == 200 and response.headers.get("Content-Type", "").startswith("application/pdf"):
-                # Save using original symbol (no (OR)) for filename
-                safe_name = docsymbol.strip().replace("/", "_")
-                filename = f"{safe_name}-{lang.upper()}.pdf"
-                filepath = os.path.join(output_dir, filename)
-                
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
-                
-                return {
-                    "status": 1,
-                    "filepath": filepath,
-                    "filename": filename,
-                    "language": language.upper(),
-                    "message": f"File downloaded successfully: {filename}"
-                }
-            else:
-                continue  # Try next variant
-                
-        except Exception as e:
-            # Continue to next variant on error
-            continue
+            # Try all the symbol variants, a miss is only remembered when ODS answered for each of them
+            if response is None:
+                suffix, response, missing = _probe_variants(docsymbol, lang)
+                if response is not None:
+                    set_symbol_variant(docsymbol, lang, suffix)
+                elif missing:
+                    set_symbol_variant(docsymbol, lang, NO_VARIANT)
+            
+            if response is not None:
+                try:
+                    work_path = os.path.join(work_dir, filename)
+                    _save_pdf(response, work_path)
+                    filepath = scratch.publish_download(work_path, filename)
+                    
+                    return {
+                        "status": 1,
+                        "filepath": filepath,
+                        "filename": filename,
+                        "language": language.upper(),
+                        "message": f"File downloaded successfully: {filename}"
+                    }
+                except Exception as e:
+                    print(f"Error while downloading {filename} : {e}")
     
     # If all variants failed
     return {
@@ -1314,10 +1830,249 @@ def download_file_from_ods(docsymbol, language):
         "message": f"Failed to download file for {docsymbol} [{lang}]: File not found or not a PDF"
     }
 
+# downloads running at the same time in a batch
+BATCH_DOWNLOAD_WORKERS=int(config("BATCH_DOWNLOAD_WORKERS", default=8))
+
+# seconds given to a whole batch, kept below the gunicorn --timeout
+BATCH_DOWNLOAD_DEADLINE=int(config("BATCH_DOWNLOAD_DEADLINE", default=600))
+
+def _download_failure(docsymbol, language, reason):
+    """Result of a file of a batch that was not downloaded, reason is a message or an exception."""
+    return {
+        "status": 0,
+        "filepath": None,
+        "filename": None,
+        "language": language.upper(),
+        "message": f"Failed to download file for {docsymbol} [{language.lower()}]: {reason}"
+    }
+
+def download_files_from_ods(pairs, deadline=None):
+    """
+    Download many (docsymbol, language) files from ODS at the same time.
+    
+    Args:
+        pairs (list): (docsymbol, language) tuples
+        deadline (float): seconds given to the whole batch (default: BATCH_DOWNLOAD_DEADLINE)
+    
+    Returns:
+        list: the result of download_file_from_ods for each pair with its 'docsymbol',
+              in the order of pairs (status 0 for the files not finished before the deadline)
+    """
+    if not pairs:
+        return []
+    
+    deadline = BATCH_DOWNLOAD_DEADLINE if deadline is None else deadline
+    executor = ThreadPoolExecutor(max_workers=min(BATCH_DOWNLOAD_WORKERS, len(pairs)))
+    futures = [executor.submit(contextvars.copy_context().run, download_file_from_ods, docsymbol, language)
+               for docsymbol, language in pairs]
+    
+    wait(futures, timeout=deadline)
+    
+    # do not start the downloads still waiting, the running ones end in the background
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = []
+    for (docsymbol, language), future in zip(pairs, futures):
+        if not future.done() or future.cancelled():
+            result = _download_failure(docsymbol, language, "Download not finished before the deadline")
+        elif future.exception() is not None:
+            result = _download_failure(docsymbol, language, future.exception())
+        else:
+            result = future.result()
+        result['docsymbol'] = docsymbol
+        results.append(result)
+    
+    return results
+
+########################################################################
+# Stream a ZIP of files downloaded from ODS
+########################################################################
+
+class _ZipOutput:
+    """Write only file object collecting what zipfile writes until it is drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def stream_zip(pairs, deadline=None):
+    """
+    Download (docsymbol, language) files from ODS at the same time and yield a ZIP of them,
+    each file is added as soon as it is downloaded. The archive ends with download_report.json
+    holding the result of every pair.
+    
+    Args:
+        pairs (list): (docsymbol, language) tuples
+        deadline (float): seconds given to the downloads (default: BATCH_DOWNLOAD_DEADLINE)
+    
+    Yields:
+        bytes: the next part of the archive
+    """
+    pairs = list(dict.fromkeys(pairs))
+    deadline = BATCH_DOWNLOAD_DEADLINE if deadline is None else deadline
+    output = _ZipOutput()
+    report = {}
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, min(BATCH_DOWNLOAD_WORKERS, len(pairs))))
+    futures = {executor.submit(contextvars.copy_context().run, download_file_from_ods, docsymbol, language): (docsymbol, language)
+               for docsymbol, language in pairs}
+    
+    try:
+        # PDF files are already compressed
+        with zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            try:
+                for future in as_completed(futures, timeout=deadline):
+                    docsymbol, language = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = _download_failure(docsymbol, language, e)
+                    result["docsymbol"] = docsymbol
+                    
+                    if result.get("status") == 1:
+                        with open(result["filepath"], "rb") as source, archive.open(result["filename"], "w", force_zip64=True) as entry:
+                            for chunk in iter(lambda: source.read(DOWNLOAD_CHUNK_SIZE), b""):
+                                entry.write(chunk)
+                                data = output.drain()
+                                if data:
+                                    yield data
+                    
+                    report[(docsymbol, language)] = {k: v for k, v in result.items() if k != "filepath"}
+            except FuturesTimeoutError:
+                pass
+            
+            for docsymbol, language in pairs:
+                if (docsymbol, language) not in report:
+                    result = _download_failure(docsymbol, language, "Download not finished before the deadline")
+                    result["docsymbol"] = docsymbol
+                    report[(docsymbol, language)] = {k: v for k, v in result.items() if k != "filepath"}
+            archive.writestr("download_report.json", json.dumps([report[pair] for pair in pairs], indent=2))
+        
+        # the central directory written when the archive is closed
+        yield output.drain()
+    
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+########################################################################
+# Serving the files of undlFiles through the symbol links
+########################################################################
+
+def find_file_record(symbol, lang):
+    """Latest file record of the symbol in the language, None when there is none."""
+    files = mongo.get_database("undlFiles").files
+    return files.find_one(
+        {"identifiers.value": symbol, "languages": lang},
+        sort=[("timestamp", -1)],
+        collation=Collation(locale='en', strength=2)
+    )
+
+def file_validators(record):
+    """
+    ETag and Last-Modified of a file record, stable while the file does not change :
+    its checksum when known, otherwise a hash of its uri and timestamp.
+    """
+    checksum = record.get("checksum")
+    if not checksum:
+        checksum = hashlib.sha1(f"{record.get('uri')}|{record.get('timestamp')}".encode("utf-8")).hexdigest()
+    return str(checksum), record.get("timestamp")
+
+def open_file_stream(uri, range_header=None):
+    """
+    Open the body of a file on S3 without reading it, forwarding the Range of the request.
+    Returns the response (200, 206 or 416) or None when the file cannot be read.
+    """
+    headers = {"Range": range_header} if range_header else {}
+    try:
+        response = http_sessions.get(uri, headers=headers, stream=True, timeout=30)
+    except Exception as e:
+        print(f"Error while opening {uri} : {e}")
+        return None
+    if response.status_code in (200, 206, 416):
+        return response
+    response.close()
+    return None
+
 ########################################################################
 # Extract 191__a values from API by date range
 ########################################################################
 
+# days of a range fetched at the same time
+HARVEST_WORKERS = int(config("HARVEST_WORKERS", default=8))
+
+# days before today still fetched again (0: only today)
+HARVEST_REFRESH_DAYS = int(config("HARVEST_REFRESH_DAYS", default=0))
+
+def _harvest_collection():
+    return my_database["ods_actions_day_symbols_collection"]
+
+def _fetch_day_symbols(url):
+    """Docsymbols (191__a values) published on one day, or None when the API failed."""
+    try:
+        r = http_sessions.get(url, verify=False)
+        if r.status_code != 200:
+            print("Error on", url, r.status_code)
+            return None
+        data = r.json()
+        if not isinstance(data, list):
+            # an error body, not the list of the records of the day
+            print("Error on", url, data)
+            return None
+        return [v for item in data if "191__a" in item for v in item["191__a"]]
+    except Exception as e:
+        print("Error on", url, e)
+        return None
+
+def harvest_days_symbols(days, base_url):
+    """
+    Docsymbols of each day (key YYYYMMDD), closed days are read from the per-day cache
+    and only today, the recent days and the days not cached yet are fetched, at the same time.
+    """
+    ymds = list(dict.fromkeys(day.strftime("%Y%m%d") for day in days))
+    last_closed = (datetime.now() - timedelta(days=HARVEST_REFRESH_DAYS + 1)).strftime("%Y%m%d")
+    keys = {ymd: f"{base_url}|{ymd}" for ymd in ymds}
+    
+    symbols_by_day = {}
+    try:
+        for cached in _harvest_collection().find({"_id": {"$in": [keys[ymd] for ymd in ymds if ymd <= last_closed]}}):
+            symbols_by_day[cached["ymd"]] = cached["symbols"]
+    except Exception as e:
+        print(f"Error while reading the days cache : {e}")
+    
+    missing = [ymd for ymd in ymds if ymd not in symbols_by_day]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(HARVEST_WORKERS, len(missing))) as executor:
+            fetched = list(executor.map(lambda ymd: _fetch_day_symbols(base_url.format(ymd)), missing))
+        
+        for ymd, symbols in zip(missing, fetched):
+            if symbols is None:
+                continue
+            symbols_by_day[ymd] = symbols
+            print(ymd, f"Found {len(symbols)} docsymbols")
+            
+            # a closed day does not change anymore
+            if ymd <= last_closed:
+                try:
+                    _harvest_collection().update_one(
+                        {"_id": keys[ymd]},
+                        {"$set": {"ymd": ymd, "symbols": symbols, "date": datetime.utcnow()}},
+                        upsert=True)
+                except Exception as e:
+                    print(f"Error while saving the days cache : {e}")
+    
+    return symbols_by_day
+
 def extract_191a_values_by_date_range(start_date=None, end_date=None, base_url=None, output_file=None):
     """
     Extract 191__a values (docsymbols) from API endpoint for a date range.
@@ -1339,22 +2094,13 @@ def extract_191a_values_by_date_range(start_date=None, end_date=None, base_url=N
     if base_url is None:
         base_url = "https://y8nxvr2153.execute-api.us-east-1.amazonaws.com/dev/{}/S"
     
-    all_docsymbols = []
-    date = start_date
+    # Every day of the range, fetched at the same time (closed days come from the cache)
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    symbols_by_day = harvest_days_symbols(days, base_url)
     
-    while date <= end_date:
-        ymd = date.strftime("%Y%m%d")
-        url = base_url.format(ymd)
-        try:
-            r = requests.get(url, verify=False)
-            data = r.json()
-            for item in data:
-                if "191__a" in item:
-                    all_docsymbols.extend(item["191__a"])
-            print(ymd, f"Found {len([v for item in data if '191__a' in item for v in item['191__a']])} docsymbols")
-        except Exception as e:
-            print("Error on", ymd, e)
-        date += timedelta(days=1)
+    all_docsymbols = []
+    for day in days:
+        all_docsymbols.extend(symbols_by_day.get(day.strftime("%Y%m%d"), []))
     
     # Remove duplicates while preserving order
     unique_docsymbols = []
@@ -0,0 +1,217 @@
+########################################################################
+# imports
+########################################################################
+
+import mmap
+import os
+import platform
+import threading
+import time
+import uuid
+
+from decouple import config
+
+from ods import http_sessions
+
+########################################################################
+# setup of the cache
+########################################################################
+
+# keep on disk the PDFs served by the symbol links
+PDF_CACHE_ENABLED = str(config("PDF_CACHE_ENABLED", default="true")).lower() == "true"
+
+if platform.system() in ['Windows', 'nt']:
+    PDF_CACHE_DIR = 'ods\\pdf_cache'
+else:
+    PDF_CACHE_DIR = './ods/pdf_cache'
+
+# total size of the cached files, the least recently served ones are removed above it
+PDF_CACHE_MAX_BYTES = int(config("PDF_CACHE_MAX_BYTES", default=1024 * 1024 * 1024))
+
+# serve the cached files through a memory map instead of reading them
+PDF_CACHE_MMAP = str(config("PDF_CACHE_MMAP", default="false")).lower() == "true"
+
+# an eviction goes down to this share of the budget, so it does not run on every new file
+PDF_CACHE_LOW_WATERMARK = 0.9
+
+# unfinished downloads older than this are removed by the eviction
+PDF_CACHE_TMP_MAX_AGE = 3600
+
+CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+_state = {"bytes": None}
+_filling = set()
+_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+########################################################################
+# content-addressed files, the key is the ETag of the file record
+########################################################################
+
+def _path(key: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, key[:2], f"{key}.pdf")
+
+
+def lookup(key: str):
+    """Path of the cached file of key, marked as recently used, or None."""
+    path = _path(key)
+    try:
+        os.utime(path)
+        found = os.path.getsize(path) > 0
+        if not found:
+            # an empty file cannot be mapped, it is never a complete PDF
+            os.remove(path)
+    except OSError:
+        found = False
+    if not found:
+        with _lock:
+            _counters["misses"] += 1
+        return None
+    with _lock:
+        _counters["hits"] += 1
+    return path
+
+
+def open_mapped(path: str) -> mmap.mmap:
+    """Read-only memory map of a cached file."""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_counters, "bytes": _state["bytes"], "max_bytes": PDF_CACHE_MAX_BYTES}
+
+########################################################################
+# filling the cache
+########################################################################
+
+def _claim(key: str) -> bool:
+    """Only one download of a key at a time in this worker."""
+    with _lock:
+        if key in _filling:
+            return False
+        _filling.add(key)
+        return True
+
+
+def _commit(key: str, tmp_path: str, size: int):
+    if size == 0:
+        os.remove(tmp_path)
+        return
+    path = _path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    with _lock:
+        _counters["stores"] += 1
+    # the size of the cache is read from the disk, the other workers also add files to it
+    evict()
+
+
+def _tmp_path() -> str:
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    return os.path.join(PDF_CACHE_DIR, f".tmp-{uuid.uuid4().hex}")
+
+
+def tee(key: str, chunks, expected_size: int = None):
+    """
+    Yield the chunks of a whole file being sent to the browser and keep a copy of them,
+    committed to the cache once complete. Nothing is kept when the browser stops reading.
+    """
+    if not PDF_CACHE_ENABLED or not _claim(key):
+        yield from chunks
+        return
+
+    tmp_path = _tmp_path()
+    size = 0
+    complete = False
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+                yield chunk
+        complete = expected_size is None or size == expected_size
+        if complete:
+            _commit(key, tmp_path, size)
+    finally:
+        with _lock:
+            _filling.discard(key)
+        if not complete and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def fill(key: str, uri: str):
+    """Download the whole file of key into the cache (a partial request was served from S3)."""
+    if not PDF_CACHE_ENABLED or not _claim(key):
+        return
+    tmp_path = _tmp_path()
+    try:
+        with http_sessions.get(uri, stream=True, timeout=30) as response:
+            if response.status_code != 200:
+                return
+            size = 0
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+        expected_size = response.headers.get("Content-Length")
+        if expected_size is None or int(expected_size) == size:
+            _commit(key, tmp_path, size)
+    except Exception as e:
+        print(f"PDF cache fill of {uri} failed : {e}")
+    finally:
+        with _lock:
+            _filling.discard(key)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def fill_in_background(key: str, uri: str):
+    if PDF_CACHE_ENABLED and key not in _filling:
+        threading.Thread(target=fill, args=(key, uri), name="pdf-cache-fill", daemon=True).start()
+
+########################################################################
+# eviction of the least recently used files
+########################################################################
+
+def evict() -> int:
+    """
+    Remove the least recently served files until the cache is under the low watermark
+    of its budget, and the abandoned downloads. Return the number of files removed.
+    """
+    entries = []
+    total = 0
+    removed = 0
+    now = time.time()
+    for root, _, names in os.walk(PDF_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.startswith(".tmp-"):
+                if now - stat.st_mtime > PDF_CACHE_TMP_MAX_AGE:
+                    os.remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    if total > PDF_CACHE_MAX_BYTES:
+        target = PDF_CACHE_MAX_BYTES * PDF_CACHE_LOW_WATERMARK
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+    with _lock:
+        _state["bytes"] = total
+        _counters["evictions"] += removed
+    return removed
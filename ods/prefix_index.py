@@ -0,0 +1,149 @@
+########################################################################
+# imports
+########################################################################
+
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from decouple import config
+
+from ods import mongo
+
+########################################################################
+# setup of the index
+########################################################################
+
+# build the index of the English identifiers when the application starts
+PREFIX_INDEX_ENABLED = str(config("PREFIX_INDEX_ENABLED", default="true")).lower() == "true"
+
+# seconds between two reads of the files added or changed since the last one
+PREFIX_INDEX_REFRESH = int(config("PREFIX_INDEX_REFRESH", default=60))
+
+# seconds between two full rebuilds, which also forget the deleted files
+PREFIX_INDEX_REBUILD = int(config("PREFIX_INDEX_REBUILD", default=86400))
+
+# a refresh bringing more identifiers than this merges them all at once
+PREFIX_INDEX_INSORT_MAX = 1000
+
+_PROJECTION = {"identifiers.value": 1, "timestamp": 1}
+
+########################################################################
+# sorted array of identifiers searched by prefix with bisect
+########################################################################
+
+
+class PrefixIndex:
+    """
+    Identifiers kept sorted in memory, so the ones starting with a prefix are
+    found with a binary search and read in order from there.
+    Each identifier gives the first identifier of its file, used in the document URL.
+    """
+
+    def __init__(self, find_files):
+        self.find_files = find_files
+        self._keys = []
+        self._targets = {}
+        self._last_timestamp = None
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at > 0
+
+    def _read(self, query) -> tuple:
+        targets = {}
+        last_timestamp = None
+        for file in self.find_files(query, _PROJECTION):
+            values = [ident.get("value") for ident in file.get("identifiers", []) if ident.get("value")]
+            for value in values:
+                targets[value] = values[0]
+            timestamp = file.get("timestamp")
+            if timestamp is not None and (last_timestamp is None or timestamp > last_timestamp):
+                last_timestamp = timestamp
+        return targets, last_timestamp
+
+    def build(self):
+        """Read every file and replace the index."""
+        targets, last_timestamp = self._read({})
+        keys = sorted(targets)
+        with self._lock:
+            self._keys, self._targets = keys, targets
+            self._last_timestamp = last_timestamp
+            self._built_at = self._refreshed_at = time.time()
+
+    def refresh(self):
+        """Add the files changed since the last read, rebuild when the index is too old."""
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            if not self.ready or time.time() - self._built_at >= PREFIX_INDEX_REBUILD:
+                self.build()
+                return
+            query = {} if self._last_timestamp is None else {"timestamp": {"$gt": self._last_timestamp}}
+            targets, last_timestamp = self._read(query)
+            with self._lock:
+                new_keys = [key for key in targets if key not in self._targets]
+                self._targets.update(targets)
+                if len(new_keys) > PREFIX_INDEX_INSORT_MAX:
+                    self._keys = sorted(self._targets)
+                else:
+                    for key in new_keys:
+                        insort(self._keys, key)
+                if last_timestamp is not None:
+                    self._last_timestamp = last_timestamp
+                self._refreshed_at = time.time()
+        finally:
+            self._refreshing.release()
+
+    def refresh_in_background(self):
+        """Start a refresh when the last one is older than PREFIX_INDEX_REFRESH, without waiting for it."""
+        if time.time() - self._refreshed_at >= PREFIX_INDEX_REFRESH and not self._refreshing.locked():
+            threading.Thread(target=self._refresh_safely, name="prefix-index-refresh", daemon=True).start()
+
+    def _refresh_safely(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Prefix index refresh failed : {e}")
+
+    def search(self, prefix: str, limit: int, after: str = None, skip: int = 0) -> list:
+        """
+        At most limit (identifier, first identifier of its file) starting with prefix, in order,
+        the ones up to after (the last identifier of the previous page) or the skip first ones left out.
+        """
+        with self._lock:
+            keys, targets = self._keys, self._targets
+            start = bisect_left(keys, prefix)
+            if after is not None:
+                start = max(start, bisect_right(keys, after))
+            start += skip
+            results = []
+            for key in keys[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                results.append((key, targets[key]))
+            return results
+
+########################################################################
+# English identifiers of undlFiles.files
+########################################################################
+
+# filter of the files of the index, also used to read the files while it is being built
+ENGLISH_FILES = {"languages": {"$in": ["EN", "en"]}}
+
+
+def _find_english_files(query, projection):
+    files = mongo.get_database("undlFiles").files
+    return files.find({**query, **ENGLISH_FILES}, projection)
+
+
+english_identifiers = PrefixIndex(_find_english_files)
+
+
+def bootstrap():
+    """Build the index in the background when the application starts."""
+    if PREFIX_INDEX_ENABLED:
+        threading.Thread(target=english_identifiers._refresh_safely, name="prefix-index-build", daemon=True).start()
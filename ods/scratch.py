@@ -0,0 +1,183 @@
+########################################################################
+# imports
+########################################################################
+
+import os
+import platform
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from decouple import config
+
+########################################################################
+# scratch folders
+########################################################################
+
+# SCRATCH_ROOT holds one folder per operation, DOWNLOAD_DIR the files
+# downloaded from ODS waiting to be fetched by the browser
+if platform.system() in ['Windows', 'nt']:
+    SCRATCH_ROOT = 'ods\\temp'
+    DOWNLOAD_DIR = 'ods\\temp_01'
+else:
+    SCRATCH_ROOT = './ods/tmp'
+    DOWNLOAD_DIR = './ods/tmp_01'
+
+# entries older than this are removed by the janitor
+SCRATCH_MAX_AGE = int(config("SCRATCH_MAX_AGE", default=3600))
+
+# total size of both folders above which the oldest entries are removed
+SCRATCH_MAX_BYTES = int(config("SCRATCH_MAX_BYTES", default=2 * 1024 * 1024 * 1024))
+
+# entries younger than this are never removed to respect the quota,
+# they may belong to an operation running in another worker
+SCRATCH_GRACE_SECONDS = int(config("SCRATCH_GRACE_SECONDS", default=600))
+
+# a file downloaded from ODS is reused instead of downloaded again during this time
+DOWNLOAD_REUSE_SECONDS = int(config("DOWNLOAD_REUSE_SECONDS", default=900))
+
+# time between two passes of the janitor
+JANITOR_INTERVAL = int(config("JANITOR_INTERVAL", default=300))
+
+# operation folders in use in this worker
+_active_dirs = set()
+_active_lock = threading.Lock()
+_janitor = {"thread": None}
+
+########################################################################
+# operation folders
+########################################################################
+
+@contextmanager
+def operation_dir(kind: str = "op"):
+    """
+    Create a private folder for one operation and remove it when the block exits,
+    so concurrent operations never touch each other's files.
+    """
+    start_janitor()
+    path = os.path.join(SCRATCH_ROOT, f"{kind}-{uuid.uuid4().hex}")
+    os.makedirs(path, exist_ok=True)
+    path_abs = os.path.abspath(path)
+    with _active_lock:
+        _active_dirs.add(path_abs)
+    try:
+        yield path
+    finally:
+        with _active_lock:
+            _active_dirs.discard(path_abs)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def download_path(filename: str) -> str:
+    return os.path.join(DOWNLOAD_DIR, filename)
+
+
+def recent_download(filename: str):
+    """Return the path of a file downloaded less than DOWNLOAD_REUSE_SECONDS ago, or None."""
+    path = download_path(filename)
+    try:
+        if time.time() - os.path.getmtime(path) < DOWNLOAD_REUSE_SECONDS:
+            return path
+    except OSError:
+        pass
+    return None
+
+
+def publish_download(source: str, filename: str) -> str:
+    """Move a finished file from an operation folder to the download folder in one atomic step."""
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    path = download_path(filename)
+    os.replace(source, path)
+    return path
+
+########################################################################
+# janitor
+########################################################################
+
+def _entry_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+def _remove_entry(path: str) -> bool:
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except OSError as e:
+        print(f"Error removing {path}: {str(e)}")
+        return False
+
+
+def sweep() -> int:
+    """
+    Remove the scratch entries older than SCRATCH_MAX_AGE, then the oldest ones
+    until both folders fit in SCRATCH_MAX_BYTES. Folders of running operations
+    are kept. Returns the number of entries removed.
+    """
+    now = time.time()
+    with _active_lock:
+        active = set(_active_dirs)
+
+    entries = []
+    for folder in (SCRATCH_ROOT, DOWNLOAD_DIR):
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if os.path.abspath(path) in active:
+                continue
+            try:
+                entries.append([os.path.getmtime(path), _entry_size(path), path])
+            except OSError:
+                pass
+
+    removed = 0
+    kept = []
+    for mtime, size, path in entries:
+        if now - mtime > SCRATCH_MAX_AGE:
+            removed += _remove_entry(path)
+        else:
+            kept.append((mtime, size, path))
+
+    total = sum(size for _, size, _ in kept)
+    for mtime, size, path in sorted(kept):
+        if total <= SCRATCH_MAX_BYTES:
+            break
+        if now - mtime < SCRATCH_GRACE_SECONDS:
+            break
+        if _remove_entry(path):
+            removed += 1
+            total -= size
+
+    return removed
+
+
+def _janitor_loop():
+    while True:
+        time.sleep(JANITOR_INTERVAL)
+        try:
+            sweep()
+        except Exception as e:
+            print(f"Scratch janitor error: {str(e)}")
+
+
+def start_janitor():
+    """Start the background janitor of this worker once."""
+    if _janitor["thread"] is None:
+        with _active_lock:
+            if _janitor["thread"] is None:
+                _janitor["thread"] = threading.Thread(target=_janitor_loop, daemon=True)
+                _janitor["thread"].start()
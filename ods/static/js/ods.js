@@ -836,15 +836,15 @@ Vue.component('ods', {
                                                             <div class="row">
                                                                 <div class="col-md-4">
                                                                     <label for="logUserFilter" class="form-label-modern">Filter by User</label>
-                                                                    <input type="text" id="logUserFilter" class="form-control-modern" v-model="logUserFilter" placeholder="Enter username...">
+                                                                    <input type="text" id="logUserFilter" class="form-control-modern" v-model="logUserFilter" @input="scheduleLogsReload" placeholder="Enter username...">
                                                                 </div>
                                                                 <div class="col-md-4">
                                                                     <label for="logActionFilter" class="form-label-modern">Filter by Action</label>
-                                                                    <input type="text" id="logActionFilter" class="form-control-modern" v-model="logActionFilter" placeholder="Enter action...">
+                                                                    <input type="text" id="logActionFilter" class="form-control-modern" v-model="logActionFilter" @input="scheduleLogsReload" placeholder="Enter action...">
                                                                 </div>
                                                                 <div class="col-md-4">
                                                                     <label for="logDateFilter" class="form-label-modern">Filter by Date</label>
-                                                                    <input type="date" id="logDateFilter" class="form-control-modern" v-model="logDateFilter">
+                                                                    <input type="date" id="logDateFilter" class="form-control-modern" v-model="logDateFilter" @change="scheduleLogsReload">
                                                                 </div>
                                                             </div>
                                                             <div class="modern-button-group mt-3">
@@ -880,6 +880,12 @@ Vue.component('ods', {
                                                         </tbody>
                                                         </table>       
                                                     </div>
+                                                        <div class="modern-button-group mt-3" v-if="logsCursor">
+                                                            <button type="button" class="btn-modern btn-secondary-modern" :disabled="logsLoading" @click="loadLogs(false)">
+                                                                <i class="fas fa-chevron-down me-2"></i>
+                                                                Load more logs
+                                                            </button>
+                                                        </div>
                                                 </div>
                                                 </div>
                                             </div>
@@ -1106,6 +1112,9 @@ data: function () {
         show_parameters:false,
         creation_date:"",
         listOfLogs:[],
+        logsCursor:null,
+        logsLoading:false,
+        logsReloadTimer:null,
         logUserFilter:"",
         logActionFilter:"",
         logDateFilter:"",
@@ -1432,10 +1441,20 @@ data: function () {
             return jobNumbers.toString();
         },
 
-        async loadLogs(){
-        // loading the logs
+        async loadLogs(reset = true){
+        // loading the logs one page at a time, newest first, filtered by the server
         try {
-        const my_response = await fetch("./display_logs",{
+            this.logsLoading = true;
+            const params = new URLSearchParams({ limit: 500 });
+            if (this.logUserFilter) params.append("user", this.logUserFilter);
+            if (this.logActionFilter) params.append("action", this.logActionFilter);
+            if (this.logDateFilter) {
+                params.append("start_date", this.logDateFilter);
+                params.append("end_date", this.logDateFilter);
+            }
+            if (!reset && this.logsCursor) params.append("cursor", this.logsCursor);
+
+        const my_response = await fetch(`./display_logs?${params.toString()}`,{
             "method":"GET",
             });
             
@@ -1449,6 +1468,10 @@ data: function () {
             }
             
         const my_data = await my_response.json();
+            if (reset) {
+                this.listOfLogs = [];
+            }
+            this.logsCursor = my_response.headers.get("X-Next-Cursor");
             
             // Robust error handling for malformed responses
             if (Array.isArray(my_data)) {
@@ -1465,9 +1488,17 @@ data: function () {
             }
         } catch (error) {
             notifications.error(`Failed to load logs: ${error.message}`, 'Load Error');
+        } finally {
+            this.logsLoading = false;
         }
         },
         
+        scheduleLogsReload() {
+            // reload the first page once the filters stop changing
+            clearTimeout(this.logsReloadTimer);
+            this.logsReloadTimer = setTimeout(() => this.loadLogs(), 400);
+        },
+        
         formatDateForFilter(dateString) {
             // Convert the date string to YYYY-MM-DD format for comparison
             const date = new Date(dateString);
@@ -1478,6 +1509,7 @@ data: function () {
             this.logUserFilter = "";
             this.logActionFilter = "";
             this.logDateFilter = "";
+            this.scheduleLogsReload();
         },
         
         toggleTheme() {
@@ -1771,6 +1803,60 @@ data: function () {
 
         },
               
+        async runBatchJob(url, dataset, onProgress, onUnit){
+            // enqueue the batch on the server then poll the job until it is finished
+            dataset.append('async', 'true')
+            const my_response = await fetch(url,{
+                "method":"POST",
+                "body":dataset
+                });
+            
+            if (!my_response.ok) {
+                throw new Error(`HTTP error! status: ${my_response.status}`);
+            }
+            
+            const { job_id } = await my_response.json();
+            
+            // follow the finished units live, the browser resumes the stream from its last event
+            if (onUnit && window.EventSource) {
+                await new Promise(resolve => {
+                    const source = new EventSource(`./jobs/${job_id}/events`);
+                    source.addEventListener('unit', event => onUnit(JSON.parse(event.data)));
+                    source.addEventListener('end', () => {
+                        source.close();
+                        resolve();
+                    });
+                    source.onerror = () => {
+                        // closed for good : fall back to polling
+                        if (source.readyState === EventSource.CLOSED) {
+                            resolve();
+                        }
+                    };
+                });
+            }
+            
+            while (true) {
+                await new Promise(resolve => setTimeout(resolve, 2000));
+                
+                const job_response = await fetch(`./jobs/${job_id}`);
+                if (!job_response.ok) {
+                    throw new Error(`HTTP error! status: ${job_response.status}`);
+                }
+                
+                const job = await job_response.json();
+                if (onProgress) {
+                    onProgress(job);
+                }
+                
+                if (job.status === 'done') {
+                    return job.results;
+                }
+                if (job.status === 'failed') {
+                    throw new Error(job.error || 'The job failed');
+                }
+            }
+        },
+
         async displayResultCreateUpdate(){
 
             // Validate input before processing
@@ -1799,21 +1885,12 @@ data: function () {
 
             // loading all the data
             try {
-                const my_response = await fetch("./create_metadata_ods",{
-                    "method":"POST",
-                    "body":dataset
-                    });
-                
-                if (!my_response.ok) {
-                    throw new Error(`HTTP error! status: ${my_response.status}`);
-                }
-                
-                const contentType = my_response.headers.get("content-type");
-                if (!contentType || !contentType.includes("application/json")) {
-                    throw new Error("Response is not JSON");
-                }
-                
-                const my_data = await my_response.json();
+                const my_data = await this.runBatchJob("./create_metadata_ods", dataset, null, unit => {
+                    // display the symbols as soon as they are processed
+                    this.listOfResult1.push(unit.entry);
+                    this.displayResult1 = true;
+                });
+                this.listOfResult1 = [];
 
                 // Robust error handling for malformed responses
                 if (Array.isArray(my_data)) {
@@ -1909,22 +1986,26 @@ data: function () {
                 try {
                     this.addSendFilesLog('info', 'Sending request to server...');
                     
-                    const my_response = await fetch("./exporttoodswithfile",{
-                        "method":"POST",
-                        "body":dataset
-                        });
-                    
-                    if (!my_response.ok) {
-                        throw new Error(`HTTP error! status: ${my_response.status}`);
-                    }
+                    let lastDone = 0;
+                    let streamedUnits = 0;
+                    const my_data = await this.runBatchJob("./exporttoodswithfile", dataset, (job) => {
+                        if (job.done !== lastDone) {
+                            lastDone = job.done;
+                            this.addSendFilesLog('info', `Server progress: ${job.done}/${job.total} symbol(s) processed`);
+                        }
+                    }, (unit) => {
+                        // one event per finished (symbol, language)
+                        streamedUnits = unit.count;
+                        const entry = unit.entry;
+                        const seconds = unit.timings.total !== undefined ? ` (${unit.timings.total.toFixed(1)}s)` : '';
+                        const level = (entry.result || '').toLowerCase().includes('success') ? 'success' : 'info';
+                        this.addSendFilesLog(level, `[${unit.count}] ${entry.docsymbol} [${entry.language}] - ${entry.result}${seconds}`);
+                        this.listOfResult2.push(entry);
+                        this.displayResult2 = true;
+                    });
                     
-                    // Check if response is JSON
-                    const contentType = my_response.headers.get('content-type');
-                    if (!contentType || !contentType.includes('application/json')) {
-                        throw new Error('Response is not JSON');
-                    }
-                                       
-                    const my_data = await my_response.json()
+                    // the results were displayed live, the final list replaces them
+                    this.listOfResult2 = [];
                     
                     this.addSendFilesLog('info', `Received response with ${Array.isArray(my_data) ? my_data.length : 0} result(s)`);
                     
@@ -1947,6 +2028,12 @@ data: function () {
                             const elements = my_data[index];
                             const resultArray = Array.isArray(elements) ? elements : [elements];
                             
+                            // Files already logged live from the progress stream
+                            if (streamedUnits > 0) {
+                                this.listOfResult2 = this.listOfResult2.concat(resultArray);
+                                continue;
+                            }
+                            
                             // Process each file in the result array
                             for (let fileIndex = 0; fileIndex < resultArray.length; fileIndex++) {
                                 const fileResult = resultArray[fileIndex];
@@ -2419,8 +2506,14 @@ data: function () {
                     }
                 }
                 
-                // Trigger browser downloads for successful files
-                await this.triggerFileDownloads(allResults.filter(r => r.status === 1));
+                // Trigger browser downloads for successful files, several files come in one ZIP
+                const downloaded = allResults.filter(r => r.status === 1);
+                if (downloaded.length > 1) {
+                    this.downloadZip([...new Set(downloaded.map(r => r.docsymbol))], this.selectedLanguages);
+                    this.addDownloadLog('info', `Saving ${downloaded.length} file(s) in one ZIP archive`);
+                } else {
+                    await this.triggerFileDownloads(downloaded);
+                }
                 
                 // Clean up temp folder after all downloads are complete
                 try {
@@ -2595,6 +2688,26 @@ data: function () {
             });
         },
         
+        downloadZip(symbols, languages) {
+            // a form post lets the browser save the streamed archive itself
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = './download_zip';
+            form.style.display = 'none';
+            
+            for (const [name, value] of [['docsymbols', symbols.join('\n')], ['languages', languages.join(',')]]) {
+                const input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = name;
+                input.value = value;
+                form.appendChild(input);
+            }
+            
+            document.body.appendChild(form);
+            form.submit();
+            document.body.removeChild(form);
+        },
+        
         async triggerFileDownloads(results) {
             // For each successful download, trigger browser download
             // Add a small delay between downloads to avoid browser blocking
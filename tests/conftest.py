@@ -0,0 +1,30 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# Add the parent directory to the path to import the ods package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def ods_rutines():
+    """Import ods.ods_rutines with its external services mocked"""
+    with patch.dict('os.environ', {'DLX_REST_TESTING': 'true'}):
+        with patch('pymongo.MongoClient'):
+            with patch('dlx.DB'):
+                with patch('boto3.client'):
+                    with patch('decouple.config') as mock_config:
+                        mock_config.side_effect = lambda key, default=None: {
+                            'BASE_URL': 'https://test-api.com/',
+                            'ODS_USERNAME': 'test_user',
+                            'PASSWORD': 'test_pass',
+                            'CLIENT_ID': 'test_client',
+                            'CLIENT_SECRET': 'test_secret',
+                            'CONN': 'mongodb://test',
+                            'JOB_RUN_IN_WEB': 'false'
+                        }.get(key, default)
+
+                        import ods.ods_rutines
+                        yield ods.ods_rutines
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+
+class TestBufferedWriter:
+    """Tests for the batched writer of the logs and analytics"""
+
+    def _writer(self, ods_rutines, **kwargs):
+        from ods.buffered_writer import BufferedWriter
+        collection = MagicMock()
+        writer = BufferedWriter("test", lambda: collection, **kwargs)
+        writer._start = lambda: None
+        return writer, collection
+
+    def test_flush_writes_in_batches(self, ods_rutines):
+        """Test waiting documents are written with insert_many, batch_size at a time"""
+        writer, collection = self._writer(ods_rutines, batch_size=2, max_size=10)
+        for i in range(5):
+            assert writer.put({"n": i})
+
+        assert writer.flush() == 5
+        batches = [c[0][0] for c in collection.insert_many.call_args_list]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert writer.stats() == {"pending": 0, "written": 5, "dropped": 0, "failed": 0}
+
+    def test_full_buffer_drops_and_close_flushes(self, ods_rutines):
+        """Test documents past the buffer size are counted as dropped and close writes the others"""
+        writer, collection = self._writer(ods_rutines, batch_size=10, max_size=2)
+        assert writer.put({"n": 1})
+        assert writer.put({"n": 2})
+        assert not writer.put({"n": 3})
+
+        writer.close()
+        assert not writer.put({"n": 4})
+        assert collection.insert_many.call_args[0][0] == [{"n": 1}, {"n": 2}]
+        assert writer.stats()["dropped"] == 2
+
+    def test_partial_bulk_write_counts_only_the_rejected_documents(self, ods_rutines):
+        """Test the documents written by an unordered insert are counted, only the rejected ones fail"""
+        from pymongo.errors import BulkWriteError
+        writer, collection = self._writer(ods_rutines, batch_size=10, max_size=10)
+        collection.insert_many.side_effect = BulkWriteError({"nInserted": 2, "writeErrors": [{"index": 1, "code": 11000}]})
+        for i in range(3):
+            writer.put({"n": i})
+
+        assert writer.flush() == 2
+        assert writer.stats() == {"pending": 0, "written": 2, "dropped": 0, "failed": 1}
+
+    def test_unreachable_mongo_keeps_the_documents(self, ods_rutines):
+        """Test documents not written because Mongo is unreachable are written by the next flush"""
+        from pymongo.errors import NetworkTimeout
+        writer, collection = self._writer(ods_rutines, batch_size=2, max_size=10)
+        collection.insert_many.side_effect = [None, NetworkTimeout("timed out"), None, None]
+        for i in range(5):
+            writer.put({"n": i})
+
+        assert writer.flush() == 2
+        assert writer.stats() == {"pending": 3, "written": 2, "dropped": 0, "failed": 0}
+        assert writer.flush() == 3
+        assert [c[0][0] for c in collection.insert_many.call_args_list][2:] == [[{"n": 2}, {"n": 3}], [{"n": 4}]]
+        assert writer.stats()["failed"] == 0
@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+
+class TestTTLCache:
+    """Tests for the bounded LRU cache with expiry"""
+
+    @pytest.fixture
+    def TTLCache(self, ods_rutines):
+        from ods.caching import TTLCache
+        yield TTLCache
+
+    def test_least_recently_used_entry_is_dropped(self, TTLCache):
+        cache = TTLCache(2, 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_entries_expire(self, TTLCache):
+        cache = TTLCache(10, 60)
+        cache.set("a", 1, ttl=0.01)
+        cache.set("b", 2)
+        time.sleep(0.02)
+
+        found, missing = cache.get_many(["a", "b"])
+        assert found == {"b": 2}
+        assert missing == ["a"]
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestDirectory:
+    """Tests for the cached sites and users directory"""
+
+    @pytest.fixture
+    def directory(self, ods_rutines, monkeypatch):
+        from ods import directory
+        monkeypatch.setattr(directory, "_state", {"version": None, "checked": 0.0})
+        monkeypatch.setattr(directory, "_cache", {})
+        monkeypatch.setattr(directory, "DIRECTORY_CHECK_INTERVAL", 0)
+        yield directory
+
+    def _collections(self, users, sites, version):
+        collections = {
+            "ods_actions_users_collection": MagicMock(),
+            "ods_actions_sites_collection": MagicMock(),
+            "ods_actions_versions_collection": MagicMock(),
+        }
+        collections["ods_actions_users_collection"].find.side_effect = lambda *args, **kwargs: list(users)
+        collections["ods_actions_sites_collection"].find.side_effect = lambda *args, **kwargs: list(sites)
+        collections["ods_actions_versions_collection"].find_one.side_effect = lambda query: {"version": version[0]}
+        collections["ods_actions_versions_collection"].find_one_and_update.side_effect = \
+            lambda *args, **kwargs: version.__setitem__(0, version[0] + 1) or {"version": version[0]}
+        return collections
+
+    def test_users_are_read_once_until_the_version_changes(self, directory):
+        """Test the users are cached, and reloaded once another worker bumped the version"""
+        users = [
+            {"email": "a@un.org", "password": "hash", "site": "NY", "show_display": True},
+            {"email": "a@un.org", "password": "hash2", "site": "GE"},
+            {"email": "b@un.org", "password": "hash", "site": "GE", "show_parameters": " TRUE "},
+        ]
+        version = [1]
+        collections = self._collections(users, [], version)
+        with patch.object(directory.mongo, "get_collection", side_effect=collections.__getitem__):
+            listing = directory.users()
+            assert [user["email"] for user in listing] == ["a@un.org", "b@un.org"]
+            assert "password" not in listing[0]
+            assert listing[0]["show_display"] == "true" and listing[1]["show_parameters"] == "true"
+            assert len(directory.find_users("a@un.org")) == 2
+            assert collections["ods_actions_users_collection"].find.call_count == 1
+
+            # another worker changed the users
+            users.append({"email": "c@un.org", "password": "hash"})
+            version[0] = 2
+            assert [user["email"] for user in directory.users()] == ["a@un.org", "b@un.org", "c@un.org"]
+            assert collections["ods_actions_users_collection"].find.call_count == 2
+
+    def test_invalidate_reloads_the_sites(self, directory):
+        """Test a change made in this worker is seen at once"""
+        sites = [{"code_site": "NY", "prefix_site": "NX"}]
+        collections = self._collections([], sites, [1])
+        with patch.object(directory.mongo, "get_collection", side_effect=collections.__getitem__):
+            assert directory.site_prefix("NY") == "NX"
+            assert directory.site_prefix("GE") == ""
+
+            sites.append({"code_site": "GE", "prefix_site": "GX"})
+            directory.invalidate()
+            assert directory.site_prefix("GE") == "GX"
+            assert collections["ods_actions_sites_collection"].find.call_count == 2
@@ -0,0 +1,38 @@
+from unittest.mock import MagicMock
+
+
+class TestIndexes:
+    """Tests for the index manifest of the odsActions collections"""
+
+    def _database(self, collections):
+        database = MagicMock()
+        database.__getitem__.side_effect = lambda name: collections.setdefault(name, MagicMock())
+        return database
+
+    def test_missing_indexes(self, ods_rutines):
+        """Test the indexes of the manifest not found are reported by collection"""
+        from ods import indexes
+        collections = {}
+        database = self._database(collections)
+        for name, models in indexes.INDEXES.items():
+            collections[name] = MagicMock()
+            collections[name].index_information.return_value = {"_id_": {}, **{m.document["name"]: {} for m in models}}
+        collections["ods_actions_logs_collection"].index_information.return_value = {"_id_": {}, "date_-1__id_-1": {}}
+
+        assert indexes.missing_indexes(database) == {"ods_actions_logs_collection": ["user_1_date_-1"]}
+
+    def test_collection_scans(self, ods_rutines):
+        """Test a hot query whose winning plan has a COLLSCAN stage is reported"""
+        from ods import indexes
+        collections = {}
+        database = self._database(collections)
+        index_plan = {"queryPlanner": {"winningPlan": {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}}
+        scan_plan = {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}}
+        for name in indexes.INDEXES:
+            collections[name] = MagicMock()
+            cursor = collections[name].find.return_value.limit.return_value
+            cursor.sort.return_value = cursor
+            cursor.explain.return_value = scan_plan if name == "ods_jobnumber_collection" else index_plan
+
+        scans = indexes.collection_scans(database)
+        assert [scan["collection"] for scan in scans] == ["ods_jobnumber_collection"]
@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestJobQueue:
+    """Tests for the Mongo-backed batch job queue"""
+
+    @pytest.fixture
+    def job_queue(self, ods_rutines, monkeypatch):
+        from ods import job_queue
+        monkeypatch.setattr(job_queue, "JOB_RUN_IN_WEB", False)
+        yield job_queue
+
+    def test_enqueue_job(self, job_queue):
+        """Test a job is saved queued with one empty result per item"""
+        collection = MagicMock()
+        with patch.object(job_queue, "_jobs_collection", return_value=collection):
+            job_id = job_queue.enqueue_job("send_files", ["A/1", "A/2"], "user")
+
+        job = collection.insert_one.call_args[0][0]
+        assert job["_id"] == job_id
+        assert job["status"] == job_queue.QUEUED
+        assert job["results"] == [None, None]
+        assert job["total"] == 2
+
+        with pytest.raises(ValueError):
+            job_queue.enqueue_job("unknown", [], "user")
+
+    def test_run_job_resumes_and_stores_each_result(self, job_queue, monkeypatch):
+        """Test a requeued job skips the items already done and stores the others one by one"""
+        collection = MagicMock()
+        collection.update_one.return_value.matched_count = 1
+        processed = []
+        done = MagicMock()
+        monkeypatch.setitem(job_queue.JOB_KINDS, "test", (lambda item, params: processed.append(item) or {"docsymbol": item}, done))
+
+        job = {"_id": "job1", "kind": "test", "params": {}, "items": ["A/1", "A/2", "A/3"],
+               "results": [{"docsymbol": "A/1"}, None, None]}
+        with patch.object(job_queue, "_jobs_collection", return_value=collection):
+            job_queue.run_job(job, "worker-0")
+
+        assert processed == ["A/2", "A/3"]
+        stored = [c[0][1]["$set"] for c in collection.update_one.call_args_list if "$inc" in c[0][1]]
+        assert [list(update)[0] for update in stored] == ["results.1", "results.2"]
+        done.assert_called_once_with(job)
+        assert collection.update_one.call_args[0][1]["$set"]["status"] == job_queue.DONE
+
+    def test_run_job_emits_unit_and_end_events(self, job_queue, ods_rutines, monkeypatch):
+        """Test each reported unit becomes an event, followed by the end of the job"""
+        collection = MagicMock()
+        collection.update_one.return_value.matched_count = 1
+        events = []
+        monkeypatch.setattr(job_queue, "emit_event", lambda job_id, event, data: events.append((event, data)))
+
+        def process(item, params):
+            ods_rutines.report_progress({"docsymbol": item, "language": "EN"}, {"total": 1.23456})
+            return [item]
+
+        monkeypatch.setitem(job_queue.JOB_KINDS, "test", (process, MagicMock()))
+        job = {"_id": "job1", "kind": "test", "params": {}, "items": ["A/1", "A/2"], "results": [None, None]}
+        with patch.object(job_queue, "_jobs_collection", return_value=collection):
+            job_queue.run_job(job, "worker-0")
+
+        assert [event for event, _ in events] == ["unit", "unit", "end"]
+        assert events[0][1] == {"entry": {"docsymbol": "A/1", "language": "EN"}, "timings": {"total": 1.235}}
+        assert events[2][1]["status"] == job_queue.DONE
+
+    def test_heartbeat_survives_a_failed_update(self, job_queue):
+        """Test a failed heartbeat is logged and the next ones are still sent"""
+        collection = MagicMock()
+        collection.update_one.side_effect = [Exception("primary stepped down"), None]
+        stop = MagicMock()
+        stop.wait.side_effect = [False, False, True]
+        with patch.object(job_queue, "_jobs_collection", return_value=collection):
+            job_queue._heartbeat("job1", "worker-0", stop)
+
+        assert collection.update_one.call_count == 2
+
+    def test_stream_events_resumes_after_last_event(self, job_queue, monkeypatch):
+        """Test the stream starts after the Last-Event-ID and stops at the end event"""
+        stored = [
+            {"seq": 1, "event": "unit", "data": {"count": 1}},
+            {"seq": 2, "event": "unit", "data": {"count": 2}},
+            {"seq": 3, "event": "end", "data": {"status": "done"}},
+        ]
+        monkeypatch.setattr(job_queue, "get_events", lambda job_id, after: [e for e in stored if e["seq"] > after])
+
+        stream = list(job_queue.stream_events("job1", 1))
+
+        assert stream[0].startswith("retry:")
+        assert stream[1] == 'id: 2\nevent: unit\ndata: {"count": 2}\n\n'
+        assert stream[2].startswith("id: 3\nevent: end\n")
+        assert len(stream) == 3
+
+    def test_stream_events_waits_for_a_missing_event(self, job_queue, monkeypatch):
+        """Test an event stored after the next one is still sent, in the order of the numbers"""
+        stored = [
+            {"seq": 1, "event": "unit", "data": {"count": 1}},
+            {"seq": 3, "event": "end", "data": {"status": "done"}},
+        ]
+        reads = []
+
+        def get_events(job_id, after):
+            reads.append(after)
+            if len(reads) == 3:
+                stored.insert(1, {"seq": 2, "event": "unit", "data": {"count": 2}})
+            return [e for e in stored if e["seq"] > after]
+
+        monkeypatch.setattr(job_queue, "get_events", get_events)
+        monkeypatch.setattr(job_queue.time, "sleep", lambda seconds: None)
+
+        stream = list(job_queue.stream_events("job1", 0))
+
+        assert [line.split("\n")[0] for line in stream[1:]] == ["id: 1", "id: 2", "id: 3"]
+        assert reads == [0, 1, 1]
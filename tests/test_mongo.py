@@ -0,0 +1,20 @@
+from unittest.mock import MagicMock, patch
+
+
+class TestMongoRegistry:
+    """Tests for the process-wide MongoDB client registry"""
+
+    def test_client_is_shared_within_a_process(self, ods_rutines, monkeypatch):
+        """Test every handle shares one client, and a forked worker gets its own"""
+        from ods import mongo
+        monkeypatch.setattr(mongo, "_clients", {})
+
+        with patch.object(mongo, "MongoClient", side_effect=lambda *args, **kwargs: MagicMock()) as client_class:
+            first = mongo.get_client("mongodb://test")
+            assert mongo.get_client("mongodb://test") is first
+            mongo.get_collection("ods_actions_users_collection", conn="mongodb://test")
+            assert client_class.call_count == 1
+
+            with patch.object(mongo.os, "getpid", return_value=-1):
+                assert mongo.get_client("mongodb://test") is not first
+            assert client_class.call_count == 2
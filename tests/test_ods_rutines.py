@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, MagicMock, call
 from datetime import datetime
 import sys
+import time
 import os
 
 # Add the parent directory to the path to import ods_rutines
@@ -50,17 +51,20 @@ class TestODSRoutines:
                             mock_collection.insert_one.return_value = MagicMock()
                             
                             # Import the function after mocking
+                            import ods.ods_rutines
                             from ods.ods_rutines import add_log
                             
-                            # Act
-                            result = add_log(test_data['date'], test_data['user'], test_data['action'])
+                            # Act (the module may already be imported by another test)
+                            with patch.object(ods.ods_rutines, 'my_database', mock_database):
+                                result = add_log(test_data['date'], test_data['user'], test_data['action'])
+                                ods.ods_rutines.flush_audit()
                             
                             # Assert
                             assert result == 0
-                            mock_collection.insert_one.assert_called_once()
+                            mock_collection.insert_many.assert_called_once()
                             
                             # Verify the log object structure
-                            call_args = mock_collection.insert_one.call_args[0][0]
+                            call_args = mock_collection.insert_many.call_args[0][0][0]
                             assert call_args["user"] == test_data['user']
                             assert call_args["action"] == test_data['action']
                             assert call_args["date"] == test_data['date']
@@ -102,14 +106,443 @@ class TestODSRoutines:
                                 # Assert
                                 assert exists is True
                                 assert job_numbers == ["UN123456", "UN123457"]
-                                # The function calls ods_get_loading_symbol twice (lines 143 and 146)
-                                assert mock_ods_get.call_count == 2
+                                # The function reads the symbol from ODS only once
+                                assert mock_ods_get.call_count == 1
                                 mock_ods_get.assert_has_calls([
-                                    call(test_data['docsymbol']),
                                     call(test_data['docsymbol'])
                                 ])
 
+    def test_get_token_is_cached(self, ods_rutines):
+        """Test the token is requested once and reused until it expires"""
+        ods_rutines._token_cache.update({"token": None, "expires_at": 0.0, "refreshing": False})
+
+        with patch('ods.ods_rutines.http_sessions.request') as mock_request:
+            mock_request.return_value = MagicMock(text='{"token": "abc", "expires_in": 3600}')
+
+            assert ods_rutines.get_token() == "abc"
+            assert ods_rutines.get_token() == "abc"
+            assert mock_request.call_count == 1
+
+    def test_ods_api_request_refreshes_token_on_401(self, ods_rutines):
+        """Test a 401 answer renews the token and replays the request once"""
+        ods_rutines._token_cache.update({"token": "old", "expires_at": 9e12, "refreshing": False})
+
+        with patch('ods.ods_rutines.http_sessions.request') as mock_request:
+            mock_request.side_effect = [
+                MagicMock(status_code=401),
+                MagicMock(text='{"token": "new", "expires_in": 3600}'),
+                MagicMock(status_code=200),
+            ]
+
+            response = ods_rutines.ods_api_request("GET", "https://test-api.com/api/loading/symbol")
+
+            assert response.status_code == 200
+            assert ods_rutines._token_cache["token"] == "new"
+            assert mock_request.call_args_list[0][1]["headers"]["authorization"] == "Access old"
+            assert mock_request.call_args_list[2][1]["headers"]["authorization"] == "Access new"
+
+    def test_upload_stream_is_sent_again_after_a_401(self, ods_rutines):
+        """Test a refused token is renewed and the file read again from CDB for a second upload"""
+        ods_rutines._token_cache.update({"token": "old", "expires_at": 9e12, "refreshing": False})
+        sent = []
+
+        def fake_request(method, url, headers=None, data=None, **kwargs):
+            if "api/loading/file" not in url:
+                return MagicMock(text='{"token": "new", "expires_in": 3600}')
+            sent.append((headers["authorization"], b"".join(data)))
+            status = 401 if len(sent) == 1 else 200
+            response = MagicMock(status_code=status)
+            response.json.return_value = {"status": 1 if status == 200 else 0}
+            return response
+
+        def open_source():
+            source = MagicMock(status_code=200, headers={"Content-Length": "8"})
+            source.iter_content.return_value = iter([b"%PDF", b"-1.7"])
+            source.__enter__.return_value = source
+            return source
+
+        with patch('ods.ods_rutines.http_sessions.request', side_effect=fake_request), \
+             patch.object(ods_rutines, 'invalidate_loading_symbol'):
+            result = ods_rutines.ods_file_upload_stream("A/1", "GENERAL", "NX900001", "EN", open_source(),
+                                                        "2025-01-01T00:00:00Z", reopen_source=open_source)
+
+        assert result == {"status": 1}
+        assert [authorization for authorization, _ in sent] == ["Access old", "Access new"]
+        assert all(b"%PDF-1.7" in body for _, body in sent)
+
+    def test_loading_symbol_cache(self, ods_rutines, test_data):
+        """Test a symbol is read once per operation and read again after invalidation"""
+        answer = {"body": {"meta": {"matches": 1}, "data": [{"job_numbers": ["UN123456"]}]}}
+
+        with patch('ods.ods_rutines.ods_api_request') as mock_request:
+            mock_request.return_value = MagicMock(json=MagicMock(return_value=answer))
+
+            with ods_rutines.loading_symbol_cache():
+                first = ods_rutines.ods_get_loading_symbol(test_data['docsymbol'])
+                first["body"]["data"][0]["job_numbers"].append("changed by caller")
+                second = ods_rutines.ods_get_loading_symbol(" a/res/75/1 ")
+                assert mock_request.call_count == 1
+                assert second["body"]["data"][0]["job_numbers"] == ["UN123456"]
+
+                ods_rutines.invalidate_loading_symbol(test_data['docsymbol'])
+                ods_rutines.ods_get_loading_symbol(test_data['docsymbol'])
+                assert mock_request.call_count == 2
+
+            # outside of an operation nothing is cached
+            ods_rutines.ods_get_loading_symbol(test_data['docsymbol'])
+            assert mock_request.call_count == 3
+
+    def test_get_new_job_numbers_reserves_a_block(self, ods_rutines, test_data):
+        """Test job numbers come from one counter reservation and skip numbers used in ODS"""
+        mock_database = MagicMock()
+        mock_counters = MagicMock()
+        mock_jobnumbers = MagicMock()
+        mock_database.__getitem__.side_effect = lambda name: {
+            "ods_actions_jobnumber_counters_collection": mock_counters,
+            "ods_actions_jobnumbers_collection": mock_jobnumbers,
+        }[name]
+        mock_counters.find_one_and_update.side_effect = [
+            {"_id": "NX", "next_value": 900010},
+            {"_id": "NX", "next_value": 900013},
+        ]
+
+        with patch('ods.ods_rutines.my_database', mock_database):
+            with patch('ods.ods_rutines.check_if_job_number_exists') as mock_exists:
+                mock_exists.side_effect = lambda job_number: job_number == "NX900011"
+
+                records = ods_rutines.get_new_job_numbers(test_data['docsymbol'], ["AR", "ZH", "EN"], "NX")
+
+        assert [record["jobnumber_value"] for record in records] == ["NX900010", "NX900012", "NX900013"]
+        assert [record["language"] for record in records] == ["AR", "ZH", "EN"]
+        # a first block of 3 numbers, then a block of 1 to replace the number used in ODS
+        assert mock_counters.find_one_and_update.call_args_list[0][0][1] == {"$inc": {"next_value": 3}}
+        assert mock_counters.find_one_and_update.call_args_list[1][0][1] == {"$inc": {"next_value": 1}}
+        mock_jobnumbers.insert_many.assert_called_once()
+
+    def test_download_file_and_send_to_ods_keeps_language_order(self, ods_rutines, test_data, tmp_path, monkeypatch):
+        """Test the parallel transfer reports the languages in order and releases unused job numbers"""
+        monkeypatch.chdir(tmp_path)
+        job_numbers = ["NX90000%d" % i for i in range(7)]
+        answer = {"body": {"meta": {"matches": 1},
+                           "data": [{"job_numbers": job_numbers, "release_dates": ["0001-01-01T00:00:00Z"] * 7}]}}
+
+        mock_bib = MagicMock()
+        mock_bib.get_value.side_effect = lambda tag, code: {"191": test_data['docsymbol'], "091": "GENERAL"}[tag]
+
+        def upload(symbol, distribution, jobnumber, language, source, release_date, reopen_source=None):
+            # the first languages finish last
+            time.sleep(0.01 * (7 - ods_rutines.LANGUAGES.index(language)))
+            return {"status": 0 if language == "DE" else 1}
+
+        with patch('ods.ods_rutines.ods_get_loading_symbol', return_value=answer), \
+             patch('ods.ods_rutines.BibSet.from_query', return_value=[mock_bib]), \
+             patch('ods.ods_rutines.File.latest_by_identifier_language',
+                   side_effect=lambda identifier, language: None if language == "ZH" else MagicMock(uri="cdb/file.pdf")), \
+             patch('ods.ods_rutines.http_sessions.get') as mock_get, \
+             patch('ods.ods_rutines.ods_file_upload_stream', side_effect=upload), \
+             patch('ods.ods_rutines.release_job_number') as mock_release:
+            mock_get.return_value.__enter__.return_value.status_code = 200
+
+            report = ods_rutines.download_file_and_send_to_ods(test_data['docsymbol'])
+
+        assert [entry["language"] for entry in report] == ods_rutines.LANGUAGES
+        assert report[1]["result"] == "file not found in ME/CDB!"
+        assert report[6]["result"] == "not sent to ODS!!!"
+        assert report[2]["jobnumber"] == "NX900002"
+        assert sorted(c[0][0] for c in mock_release.call_args_list) == ["NX900001", "NX900006"]
+
+    def test_multipart_stream(self, ods_rutines):
+        """Test the streamed upload body wraps the chunks and announces its exact length"""
+        chunks = [b"%PDF-1.4 ", b"", b"content"]
+        body = ods_rutines.MultipartStream('{"symbol": "A/RES/75/1"}', "NX900001.pdf", "NX900001.pdf",
+                                           iter(chunks), file_size=16)
+        boundary = body.content_type.split("boundary=")[1]
+
+        content = b"".join(body)
+
+        assert len(content) == len(body)
+        assert content.startswith(f"--{boundary}\r\n".encode())
+        assert b'name="data"\r\nContent-Type: application/json\r\n\r\n{"symbol": "A/RES/75/1"}' in content
+        assert b'filename="NX900001.pdf"\r\nContent-Type: application/octet-stream\r\n\r\n%PDF-1.4 content' in content
+        assert content.endswith(f"\r\n--{boundary}--\r\n".encode())
+
+    def test_resolve_tcodes_batches_and_caches(self, ods_rutines):
+        """Test the subjects of a record are resolved with one auth query and then cached"""
+        auth = MagicMock()
+        auth.get_values.side_effect = lambda tag, code: {
+            ('150', 'a'): ["PEACEKEEPING"],
+            ('035', 'a'): ["T0001", "X999"],
+        }[(tag, code)]
+        ods_rutines._tcodes_cache.clear()
+
+        with patch.object(ods_rutines.AuthSet, 'from_query', return_value=[auth]) as mock_query:
+            first = ods_rutines.resolve_tcodes(["Peacekeeping", "UNKNOWN SUBJECT", "peacekeeping"])
+            second = ods_rutines.resolve_tcodes(["PEACEKEEPING"])
+
+        assert first == {"PEACEKEEPING": "T0001"}
+        assert second == {"PEACEKEEPING": "T0001"}
+        assert mock_query.call_count == 1
+        query = mock_query.call_args[0][0]
+        assert query['150.subfields']['$elemMatch']['value']['$in'] == ["PEACEKEEPING", "UNKNOWN SUBJECT"]
+
+    def test_get_data_from_cb_bulk(self, ods_rutines):
+        """Test many symbols are read with one projected query and keyed by symbol"""
+        def make_bib(symbol):
+            bib = MagicMock()
+            values = {('191', 'a'): [symbol], ('191', 'c'): ["75"], ('991', 'b'): [], ('650', 'a'): []}
+            bib.get_values.side_effect = lambda tag, code: values[(tag, code)]
+            bib.get_value.side_effect = lambda tag, code: values.get((tag, code), [""])[0] if (tag, code) in values else ""
+            return bib
+
+        bibs = [make_bib("A/RES/75/1"), make_bib("A/RES/75/2")]
+        with patch.object(ods_rutines.BibSet, 'from_query', return_value=bibs) as mock_query, \
+             patch.object(ods_rutines, 'get_data_from_cb', return_value=[]) as mock_single:
+            result = ods_rutines.get_data_from_cb_bulk(["A/RES/75/1 ", "A/RES/75/2", "A/RES/75/3"])
+
+        assert mock_query.call_count == 1
+        assert mock_query.call_args[1]['projection'] == ods_rutines.CDB_PROJECTION
+        assert [data["symbol"] for data in result["A/RES/75/1"]] == ["A/RES/75/1"]
+        assert [data["symbol"] for data in result["A/RES/75/2"]] == ["A/RES/75/2"]
+        assert result["A/RES/75/3"] == []
+        mock_single.assert_called_once_with("A/RES/75/3")
+
+    def test_download_files_from_ods_keeps_order_and_deadline(self, ods_rutines):
+        """Test the batch downloads run together, keep the order of the pairs and stop at the deadline"""
+        def fake_download(docsymbol, language):
+            if language == "FR":
+                time.sleep(0.5)
+            if docsymbol == "A/3":
+                raise OSError("No space left on device")
+            return {"status": 1, "filename": f"{docsymbol}-{language}.pdf", "language": language.upper()}
+
+        with patch.object(ods_rutines, 'download_file_from_ods', side_effect=fake_download):
+            start = time.time()
+            results = ods_rutines.download_files_from_ods(
+                [("A/1", "EN"), ("A/1", "FR"), ("A/2", "EN"), ("A/3", "EN")], deadline=0.2)
+
+        assert time.time() - start < 0.45
+        assert [r["docsymbol"] for r in results] == ["A/1", "A/1", "A/2", "A/3"]
+        assert [r["status"] for r in results] == [1, 0, 1, 0]
+        assert "deadline" in results[1]["message"]
+        assert results[3]["message"] == "Failed to download file for A/3 [en]: No space left on device"
+
+    def test_download_file_from_ods_streams_the_pdf(self, ods_rutines, tmp_path, monkeypatch):
+        """Test the body is only read for a PDF, written chunk by chunk, and the variant is remembered"""
+        from ods import scratch
+        monkeypatch.setattr(scratch, "SCRATCH_ROOT", str(tmp_path / "tmp"))
+        monkeypatch.setattr(scratch, "DOWNLOAD_DIR", str(tmp_path / "tmp_01"))
+        monkeypatch.setattr(scratch, "start_janitor", lambda: None)
+        monkeypatch.setattr(scratch, "recent_download", lambda filename: None)
+        variants = MagicMock()
+        variants.find_one.return_value = None
+        monkeypatch.setattr(ods_rutines, "_variant_collection", lambda: variants)
+        ods_rutines._variant_cache.clear()
+
+        requested = []
+
+        def fake_get(url, **kwargs):
+            assert kwargs["stream"] is True
+            requested.append(url)
+            if "%28OR%29" in url:
+                response = MagicMock(status_code=200, headers={"Content-Type": "application/pdf"})
+                response.iter_content.return_value = [b"%PDF-1.4 ", b"", b"content"]
+            else:
+                response = MagicMock(status_code=200, headers={"Content-Type": "text/html"})
+            response.__enter__.return_value = response
+            return response
+
+        with patch.object(ods_rutines.http_sessions, 'get', side_effect=fake_get):
+            result = ods_rutines.download_file_from_ods("A/RES/75/1", "en")
+            assert len(requested) == 2
+
+            # the variant that resolved is used directly the next time
+            requested.clear()
+            ods_rutines.download_file_from_ods("A/RES/75/1", "en")
+            assert len(requested) == 1 and "%28OR%29" in requested[0]
+
+        assert result["status"] == 1
+        with open(result["filepath"], "rb") as f:
+            assert f.read() == b"%PDF-1.4 content"
+        assert variants.update_one.call_args[0][1]["$set"]["suffix"] == "(OR)"
+
+    def test_stream_zip(self, ods_rutines, tmp_path):
+        """Test the downloaded files and the report are streamed in one archive"""
+        import io
+        import json
+        import zipfile
+
+        def fake_download(docsymbol, language):
+            if language == "FR":
+                return {"status": 0, "filepath": None, "filename": None, "language": "FR", "message": "not found"}
+            path = tmp_path / f"{docsymbol.replace('/', '_')}-{language}.pdf"
+            path.write_bytes(b"%PDF " + docsymbol.encode())
+            return {"status": 1, "filepath": str(path), "filename": path.name, "language": language}
+
+        with patch.object(ods_rutines, 'download_file_from_ods', side_effect=fake_download):
+            parts = list(ods_rutines.stream_zip([("A/1", "EN"), ("A/1", "FR"), ("A/2", "EN"), ("A/2", "EN")]))
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(parts)))
+        assert sorted(archive.namelist()) == ["A_1-EN.pdf", "A_2-EN.pdf", "download_report.json"]
+        assert archive.read("A_2-EN.pdf") == b"%PDF A/2"
+        report = json.loads(archive.read("download_report.json"))
+        assert [(r["docsymbol"], r["status"]) for r in report] == [("A/1", 1), ("A/1", 0), ("A/2", 1)]
+        assert all("filepath" not in r for r in report)
+
+    def test_extract_191a_uses_days_cache(self, ods_rutines):
+        """Test closed days come from the cache, only the others are fetched and then cached"""
+        from datetime import datetime, timedelta
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        first = today - timedelta(days=2)
+        ymd = lambda day: day.strftime("%Y%m%d")
+        base_url = "https://api.test/{}/S"
+
+        collection = MagicMock()
+        collection.find.return_value = [{"ymd": ymd(first), "symbols": ["A/1", "A/2"]}]
+        fetched = []
+
+        def fake_get(url, **kwargs):
+            fetched.append(url)
+            response = MagicMock(status_code=200)
+            response.json.return_value = [{"191__a": ["A/2", "A/3"]}, {"other": 1}]
+            return response
+
+        with patch.object(ods_rutines, '_harvest_collection', return_value=collection), \
+             patch.object(ods_rutines.http_sessions, 'get', side_effect=fake_get):
+            symbols = ods_rutines.extract_191a_values_by_date_range(first, today, base_url)
+
+        assert symbols == ["A/1", "A/2", "A/3"]
+        assert sorted(fetched) == sorted(base_url.format(ymd(day)) for day in (today - timedelta(days=1), today))
+        # only the closed day fetched is saved, today may still change
+        saved = [c[0][0]["_id"] for c in collection.update_one.call_args_list]
+        assert saved == [f"{base_url}|{ymd(today - timedelta(days=1))}"]
+
+    @pytest.mark.parametrize("status", [429, 500])
+    def test_extract_191a_does_not_cache_an_error(self, ods_rutines, status):
+        """Test a closed day answered with an error body is not cached as a day without symbols"""
+        from datetime import datetime, timedelta
+        day = datetime.now() - timedelta(days=5)
+        collection = MagicMock()
+        collection.find.return_value = []
+        response = MagicMock(status_code=status)
+        response.json.return_value = {"message": "Too Many Requests"}
+
+        with patch.object(ods_rutines, '_harvest_collection', return_value=collection), \
+             patch.object(ods_rutines.http_sessions, 'get', return_value=response):
+            symbols_by_day = ods_rutines.harvest_days_symbols([day], "https://api.test/{}/S")
+
+        assert symbols_by_day == {}
+        collection.update_one.assert_not_called()
+
+    def test_logs_page_keyset_cursor(self, ods_rutines):
+        """Test a page of logs gives the cursor of the next one, built on (date, _id)"""
+        from datetime import datetime
+        from bson import ObjectId
+        logs = [{"_id": ObjectId(), "user": "u", "action": "a", "date": datetime(2025, 1, 3 - i)} for i in range(3)]
+        collection = MagicMock()
+        collection.find.return_value.limit.return_value = logs
+
+        with patch.object(ods_rutines, 'my_database', {"ods_actions_logs_collection": collection}):
+            page, cursor = ods_rutines.logs_page(2, user="U.N")
+
+        assert page == logs[:2]
+        assert collection.find.return_value.limit.call_args[0][0] == 3
+        after = ods_rutines.decode_logs_cursor(cursor)
+        assert after == {"date": logs[1]["date"], "_id": logs[1]["_id"]}
+
+        query = ods_rutines.logs_query(user="U.N", start_date="2025-01-02", end_date="2025-01-02", after=after)
+        user, start, end, keyset = query["$and"]
+        assert user == {"user": {"$regex": "U\\.N", "$options": "i"}}
+        assert end == {"date": {"$lt": datetime(2025, 1, 3)}}
+        assert keyset["$or"][1] == {"date": logs[1]["date"], "_id": {"$lt": logs[1]["_id"]}}
+
+        with pytest.raises(ValueError):
+            ods_rutines.decode_logs_cursor("not a cursor")
+
+    def test_resolve_titles_batches_and_caches(self, ods_rutines, monkeypatch):
+        """Test the titles of a page are read with one query, then come from the cache"""
+        from ods.caching import TTLCache
+        monkeypatch.setattr(ods_rutines, '_titles_cache', TTLCache(100, 60))
+
+        def make_bib(symbol, a, b="", c=""):
+            bib = MagicMock()
+            values = {'a': a, 'b': b, 'c': c}
+            bib.get_values.side_effect = lambda tag, code: [symbol]
+            bib.get_value.side_effect = lambda tag, code: values[code]
+            return bib
+
+        def fake_query(query, projection=None):
+            if isinstance(query["symbol"], dict):
+                return [make_bib("A/1", "Report", "of the", "Council"), make_bib("A/2", "Letter")]
+            return []
+
+        with patch.object(ods_rutines.BibSet, 'from_query', side_effect=fake_query) as mock_query:
+            titles = ods_rutines.resolve_titles(["A/1", "A/2", "A/3"])
+            assert titles == {"A/1": "Report of the Council", "A/2": "Letter"}
+            # one batch query and one lookup of the symbol not matched by 191 $a
+            assert mock_query.call_count == 2
+
+            assert ods_rutines.resolve_titles(["A/2", "A/3"]) == {"A/2": "Letter"}
+            assert mock_query.call_count == 2
+
+    def test_download_file_from_ods_only_remembers_a_definite_miss(self, ods_rutines, tmp_path, monkeypatch):
+        """Test a missing PDF is remembered when ODS answered for every variant, not when it failed"""
+        from ods import scratch
+        monkeypatch.setattr(scratch, "SCRATCH_ROOT", str(tmp_path / "tmp"))
+        monkeypatch.setattr(scratch, "DOWNLOAD_DIR", str(tmp_path / "tmp_01"))
+        monkeypatch.setattr(scratch, "start_janitor", lambda: None)
+        monkeypatch.setattr(scratch, "recent_download", lambda filename: None)
+        variants = MagicMock()
+        variants.find_one.return_value = None
+        monkeypatch.setattr(ods_rutines, "_variant_collection", lambda: variants)
+        ods_rutines._variant_cache.clear()
+
+        def failing_get(url, **kwargs):
+            if "%28OR%29" in url:
+                raise ConnectionError("timed out")
+            return MagicMock(status_code=503, headers={})
+
+        with patch.object(ods_rutines.http_sessions, 'get', side_effect=failing_get):
+            result = ods_rutines.download_file_from_ods("A/RES/75/1", "en")
+
+        assert result["status"] == 0
+        variants.update_one.assert_not_called()
+        assert ods_rutines.get_symbol_variant("A/RES/75/1", "en") is None
+
+        with patch.object(ods_rutines.http_sessions, 'get', return_value=MagicMock(status_code=404, headers={})):
+            result = ods_rutines.download_file_from_ods("A/RES/75/1", "en")
+
+        assert result["status"] == 0
+        assert variants.update_one.call_args[0][1]["$set"]["suffix"] == ods_rutines.NO_VARIANT
+
+    def test_get_data_from_cb_bulk_skips_a_bad_record(self, ods_rutines):
+        """Test a record that cannot be read is skipped, the other records of its symbol are kept"""
+        def make_bib(subjects):
+            bib = MagicMock()
+            values = {('191', 'a'): ["A/RES/75/1"], ('650', 'a'): subjects}
+            bib.get_values.side_effect = lambda tag, code: values.get((tag, code), [])
+            bib.get_value.return_value = ""
+            return bib
+
+        bibs = [make_bib(["UNKNOWN SUBJECT"]), make_bib(["PEACEKEEPING"])]
+        with patch.object(ods_rutines.BibSet, 'from_query', return_value=bibs), \
+             patch.object(ods_rutines, 'resolve_tcodes', return_value={"PEACEKEEPING": "T0001"}):
+            result = ods_rutines.get_data_from_cb_bulk(["A/RES/75/1"])
+
+        assert [data["tcodes"] for data in result["A/RES/75/1"]] == [["T0001"]]
+
+    def test_get_data_from_cb_bulk_survives_a_thesaurus_failure(self, ods_rutines):
+        """Test a failed subjects query does not fail the whole batch"""
+        bib = MagicMock()
+        bib.get_values.side_effect = lambda tag, code: {('191', 'a'): ["A/RES/75/1"], ('650', 'a'): []}.get((tag, code), [])
+        bib.get_value.return_value = ""
+        with patch.object(ods_rutines.BibSet, 'from_query', return_value=[bib]), \
+             patch.object(ods_rutines, 'resolve_tcodes', side_effect=Exception("auths unavailable")):
+            result = ods_rutines.get_data_from_cb_bulk(["A/RES/75/1"])
+
+        assert [data["symbol"] for data in result["A/RES/75/1"]] == ["A/RES/75/1"]
+        assert result["A/RES/75/1"][0]["tcodes"] == []
+
 
 if __name__ == "__main__":
     # Run pytest with specific options
-    pytest.main([__file__, "-v", "--tb=short"])
\ No newline at end of file
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+
+class TestPdfCache:
+    """Tests for the on-disk LRU cache of the PDFs served by the symbol links"""
+
+    @pytest.fixture
+    def pdf_cache(self, ods_rutines, tmp_path, monkeypatch):
+        from ods import pdf_cache
+        monkeypatch.setattr(pdf_cache, "PDF_CACHE_DIR", str(tmp_path / "pdf_cache"))
+        monkeypatch.setattr(pdf_cache, "_state", {"bytes": None})
+        monkeypatch.setattr(pdf_cache, "_counters", {"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+        yield pdf_cache
+
+    def test_tee_keeps_complete_files_only(self, pdf_cache):
+        """Test a file is committed once fully sent, and dropped when the browser stops reading"""
+        assert b"".join(pdf_cache.tee("aa11", iter([b"%PDF", b" body"]), 9)) == b"%PDF body"
+        path = pdf_cache.lookup("aa11")
+        with open(path, "rb") as f:
+            assert f.read() == b"%PDF body"
+
+        stream = pdf_cache.tee("bb22", iter([b"%PDF", b" body"]), 9)
+        next(stream)
+        stream.close()
+        assert pdf_cache.lookup("bb22") is None
+        assert os.listdir(pdf_cache.PDF_CACHE_DIR) == ["aa"]
+        assert pdf_cache.stats()["hits"] == 1 and pdf_cache.stats()["misses"] == 1
+
+    def test_least_recently_used_files_are_evicted(self, pdf_cache, monkeypatch):
+        """Test the files served the longest time ago go first when the budget is exceeded"""
+        monkeypatch.setattr(pdf_cache, "PDF_CACHE_MAX_BYTES", 25)
+        for age, key in [(300, "aa01"), (200, "bb02")]:
+            b"".join(pdf_cache.tee(key, iter([b"x" * 10])))
+            past = time.time() - age
+            os.utime(pdf_cache._path(key), (past, past))
+
+        # the oldest file is served again, so the other one is the least recently used
+        assert pdf_cache.lookup("aa01")
+        b"".join(pdf_cache.tee("cc03", iter([b"x" * 10])))
+
+        assert pdf_cache.lookup("bb02") is None
+        assert pdf_cache.lookup("aa01") and pdf_cache.lookup("cc03")
+        assert pdf_cache.stats()["evictions"] == 1
+        assert pdf_cache.stats()["bytes"] == 20
+
+    def test_empty_files_are_never_served(self, pdf_cache):
+        """Test an empty body is not kept, and an empty file left on disk is a miss"""
+        assert b"".join(pdf_cache.tee("aa11", iter([]))) == b""
+        assert pdf_cache.lookup("aa11") is None
+
+        os.makedirs(os.path.dirname(pdf_cache._path("bb22")))
+        open(pdf_cache._path("bb22"), "wb").close()
+        assert pdf_cache.lookup("bb22") is None
+        assert not os.path.exists(pdf_cache._path("bb22"))
+        assert os.listdir(pdf_cache.PDF_CACHE_DIR) == ["bb"]
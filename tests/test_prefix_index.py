@@ -0,0 +1,62 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+
+class TestPrefixIndex:
+    """Tests for the in-memory prefix index of the identifiers"""
+
+    def _index(self, files):
+        from ods.prefix_index import PrefixIndex
+
+        def find_files(query, projection):
+            since = query.get("timestamp", {}).get("$gt")
+            return [file for file in files if since is None or file["timestamp"] > since]
+
+        return PrefixIndex(find_files)
+
+    def _file(self, day, *values):
+        return {"identifiers": [{"value": value} for value in values], "timestamp": datetime(2025, 1, day)}
+
+    def test_search_by_prefix_with_cursor(self, ods_rutines):
+        """Test the identifiers of a prefix come in order, from the skip or after position"""
+        index = self._index([
+            self._file(1, "A/75/10", "A/75/10/Corr.1"),
+            self._file(2, "A/75/9"),
+            self._file(3, "A/76/1"),
+            self._file(4, "S/2025/1"),
+        ])
+        assert not index.ready
+        index.build()
+
+        assert index.search("A/75/", 10) == [("A/75/10", "A/75/10"), ("A/75/10/Corr.1", "A/75/10"), ("A/75/9", "A/75/9")]
+        assert index.search("A/75/", 2, after="A/75/10") == [("A/75/10/Corr.1", "A/75/10"), ("A/75/9", "A/75/9")]
+        assert index.search("A/75/", 2, skip=2) == [("A/75/9", "A/75/9")]
+        assert index.search("a/75", 10) == []
+
+    def test_refresh_adds_new_files(self, ods_rutines):
+        """Test a refresh only reads the files changed since the last one and keeps the order"""
+        files = [self._file(1, "A/1"), self._file(2, "A/3")]
+        index = self._index(files)
+        index.build()
+
+        files.append(self._file(3, "A/2"))
+        index.refresh()
+        assert [key for key, _ in index.search("A/", 10)] == ["A/1", "A/2", "A/3"]
+
+    def test_browse_reads_the_files_while_the_index_is_built(self, ods_rutines, monkeypatch):
+        """Test the fallback query applies the prefix and the cursor to the same identifier, without collation"""
+        import ods
+        from ods import mongo, prefix_index
+        monkeypatch.setattr(prefix_index, "english_identifiers", self._index([]))
+        files = MagicMock()
+        files.find.return_value.sort.return_value.skip.return_value.limit.return_value = [
+            {"identifiers": [{"value": "A/75/1"}, {"value": "A/75/10/Corr.1"}]},
+        ]
+
+        with patch.object(mongo, "get_database", return_value=MagicMock(files=files)):
+            response = ods.app.test_client().get("/browse_docs?q=A/75/&after=A/75/10&limit=1")
+
+        assert [hit["identifier"] for hit in response.get_json()] == ["A/75/10/Corr.1"]
+        assert files.find.call_args == ((
+            {"identifiers": {"$elemMatch": {"value": {"$regex": "^A/75/", "$gt": "A/75/10"}}},
+             "languages": {"$in": ["EN", "en"]}},),)
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pytest
+
+
+class TestScratch:
+    """Tests for the per-operation scratch folders and their janitor"""
+
+    @pytest.fixture
+    def scratch(self, ods_rutines, tmp_path, monkeypatch):
+        from ods import scratch
+        monkeypatch.setattr(scratch, "SCRATCH_ROOT", str(tmp_path / "tmp"))
+        monkeypatch.setattr(scratch, "DOWNLOAD_DIR", str(tmp_path / "tmp_01"))
+        monkeypatch.setattr(scratch, "start_janitor", lambda: None)
+        yield scratch
+
+    def _write(self, path, size, age):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        past = time.time() - age
+        os.utime(path, (past, past))
+
+    def test_operation_dirs_are_private(self, scratch):
+        """Test each operation gets its own folder, removed when it ends"""
+        with scratch.operation_dir("send") as first, scratch.operation_dir("send") as second:
+            assert first != second
+            assert os.path.isdir(first) and os.path.isdir(second)
+
+            # a sweep during the operation keeps its folder
+            os.utime(first, (0, 0))
+            scratch.sweep()
+            assert os.path.isdir(first)
+
+        assert not os.path.exists(first)
+        assert not os.path.exists(second)
+
+    def test_sweep_by_age_and_quota(self, scratch, monkeypatch):
+        """Test expired files go first, then the oldest ones past the grace time until the quota is met"""
+        monkeypatch.setattr(scratch, "SCRATCH_MAX_AGE", 3600)
+        monkeypatch.setattr(scratch, "SCRATCH_MAX_BYTES", 150)
+        monkeypatch.setattr(scratch, "SCRATCH_GRACE_SECONDS", 900)
+
+        self._write(scratch.download_path("expired.pdf"), 10, 7200)
+        self._write(scratch.download_path("old.pdf"), 100, 1800)
+        self._write(scratch.download_path("recent.pdf"), 100, 600)
+        self._write(scratch.download_path("fresh.pdf"), 100, 10)
+
+        assert scratch.sweep() == 2
+        assert sorted(os.listdir(scratch.DOWNLOAD_DIR)) == ["fresh.pdf", "recent.pdf"]
+
+    def test_recent_download_is_reused(self, scratch, monkeypatch):
+        """Test a recent download is found and an old one is not"""
+        monkeypatch.setattr(scratch, "DOWNLOAD_REUSE_SECONDS", 900)
+        self._write(scratch.download_path("A_1-EN.pdf"), 10, 60)
+        self._write(scratch.download_path("A_1-FR.pdf"), 10, 1800)
+
+        assert scratch.recent_download("A_1-EN.pdf") == scratch.download_path("A_1-EN.pdf")
+        assert scratch.recent_download("A_1-FR.pdf") is None
+        assert scratch.recent_download("A_1-ES.pdf") is None
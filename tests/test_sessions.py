@@ -0,0 +1,27 @@
+import pytest
+
+
+class TestHTTPSessions:
+    """Tests for the pooled HTTP session registry"""
+
+    @pytest.fixture
+    def http_sessions(self, ods_rutines):
+        from ods import http_sessions
+        yield http_sessions
+        http_sessions.close_sessions()
+
+    def test_one_session_per_host(self, http_sessions):
+        """Test sessions are shared per host and separated between hosts"""
+        first = http_sessions.get_session("https://documents.un.org/api/symbol/access?s=A")
+        second = http_sessions.get_session("https://DOCUMENTS.UN.ORG/other")
+        other = http_sessions.get_session("https://test-api.com/api/loading/symbol")
+
+        assert first is second
+        assert first is not other
+
+    def test_pool_settings_are_applied(self, http_sessions):
+        """Test the mounted adapter uses the configured pool size"""
+        adapter = http_sessions.get_session("https://test-api.com/").get_adapter("https://test-api.com/")
+
+        assert isinstance(adapter, http_sessions.PooledAdapter)
+        assert adapter._pool_maxsize == http_sessions.POOL_MAXSIZE
@@ -0,0 +1,91 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestSymbolProxy:
+    """Tests for the PDF proxy of the /<lang>/<symbol> links"""
+
+    RECORD = {"uri": "bucket.s3.amazonaws.com/A_1-EN.pdf", "checksum": "abc123", "timestamp": datetime(2025, 1, 2, 3, 4, 5)}
+
+    @pytest.fixture
+    def client(self, ods_rutines, tmp_path, monkeypatch):
+        import ods
+        from ods import pdf_cache
+        monkeypatch.setattr(pdf_cache, "PDF_CACHE_DIR", str(tmp_path / "pdf_cache"))
+        monkeypatch.setattr(pdf_cache, "fill_in_background", lambda key, uri: None)
+        with patch.object(ods_rutines, "find_file_record", return_value=dict(self.RECORD)):
+            yield ods.app.test_client()
+
+    def _upstream(self, status, body, headers):
+        upstream = MagicMock()
+        upstream.status_code = status
+        upstream.headers = headers
+        upstream.iter_content.return_value = iter([body[i:i + 4] for i in range(0, len(body), 4)])
+        upstream.__enter__.return_value = upstream
+        return upstream
+
+    def test_streams_with_validators(self, client, ods_rutines):
+        """Test the PDF is streamed with the ETag and Last-Modified of the file record"""
+        upstream = self._upstream(200, b"%PDF-1.7 body", {"Content-Length": "13"})
+        with patch.object(ods_rutines, "open_file_stream", return_value=upstream) as mock_open:
+            response = client.get("/en/A/1")
+
+        assert response.status_code == 200
+        assert response.data == b"%PDF-1.7 body"
+        assert response.headers["ETag"] == '"abc123"'
+        assert response.headers["Last-Modified"] == "Thu, 02 Jan 2025 03:04:05 GMT"
+        assert response.headers["Accept-Ranges"] == "bytes"
+        mock_open.assert_called_once_with("https://" + self.RECORD["uri"], None)
+
+    def test_revalidation_and_range(self, client, ods_rutines):
+        """Test a matching If-None-Match gets a 304 without reading S3, and a Range is forwarded"""
+        with patch.object(ods_rutines, "open_file_stream") as mock_open:
+            response = client.get("/en/A/1", headers={"If-None-Match": '"abc123"'})
+        assert response.status_code == 304
+        mock_open.assert_not_called()
+
+        upstream = self._upstream(206, b"%PDF", {"Content-Length": "4", "Content-Range": "bytes 0-3/13"})
+        with patch.object(ods_rutines, "open_file_stream", return_value=upstream) as mock_open:
+            response = client.get("/en/A/1", headers={"Range": "bytes=0-3", "If-Range": '"abc123"'})
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == "bytes 0-3/13"
+        assert mock_open.call_args[0][1] == "bytes=0-3"
+
+        upstream = self._upstream(200, b"%PDF-1.7 body", {})
+        with patch.object(ods_rutines, "open_file_stream", return_value=upstream) as mock_open:
+            client.get("/en/A/1", headers={"Range": "bytes=0-3", "If-Range": '"old"'})
+        assert mock_open.call_args[0][1] is None
+
+    @pytest.mark.parametrize("mapped", [False, True])
+    def test_second_request_is_served_from_the_cache(self, client, ods_rutines, monkeypatch, mapped):
+        """Test a whole file sent once is kept, then served from disk with its Range"""
+        from ods import pdf_cache
+        monkeypatch.setattr(pdf_cache, "PDF_CACHE_MMAP", mapped)
+        upstream = self._upstream(200, b"%PDF-1.7 body", {"Content-Length": "13"})
+        with patch.object(ods_rutines, "open_file_stream", return_value=upstream):
+            assert client.get("/en/A/1").data == b"%PDF-1.7 body"
+
+        with patch.object(ods_rutines, "open_file_stream") as mock_open:
+            response = client.get("/en/A/1", headers={"Range": "bytes=0-3"})
+            assert response.status_code == 206
+            assert response.data == b"%PDF"
+            assert response.headers["Content-Range"] == "bytes 0-3/13"
+            assert response.headers["ETag"] == '"abc123"'
+            response.close()
+        mock_open.assert_not_called()
+
+    @pytest.mark.parametrize("mapped", [False, True])
+    def test_cached_file_removed_meanwhile_is_read_from_s3(self, client, ods_rutines, monkeypatch, tmp_path, mapped):
+        """Test a cached file evicted by another worker after the lookup is streamed from S3"""
+        from ods import pdf_cache
+        monkeypatch.setattr(pdf_cache, "PDF_CACHE_MMAP", mapped)
+        monkeypatch.setattr(pdf_cache, "lookup", lambda key: str(tmp_path / "evicted.pdf"))
+        upstream = self._upstream(200, b"%PDF-1.7 body", {"Content-Length": "13"})
+        with patch.object(ods_rutines, "open_file_stream", return_value=upstream) as mock_open:
+            response = client.get("/en/A/1")
+
+        assert response.status_code == 200
+        assert response.data == b"%PDF-1.7 body"
+        mock_open.assert_called_once()
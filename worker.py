@@ -0,0 +1,23 @@
+########################################################################
+# dedicated worker process of the batch jobs : python worker.py
+########################################################################
+
+import os
+
+# importing the ods package builds the web application, without its startup work here :
+# the web process creates the indexes and builds the prefix index, and the workers are started below
+os.environ["JOB_RUN_IN_WEB"] = "false"
+os.environ["MONGO_ENSURE_INDEXES"] = "false"
+os.environ["PREFIX_INDEX_ENABLED"] = "false"
+
+from ods import job_queue
+
+
+def main():
+    print(f"Starting {job_queue.JOB_WORKERS} job worker(s) on {job_queue.WORKER_ID}")
+    for worker in job_queue.start_workers():
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()